@@ -1,7 +1,52 @@
+from pydantic import BaseModel, field_validator
 from pydantic_settings import BaseSettings
 from functools import lru_cache
 
 
+class Region(BaseModel):
+    """Bounding box polled from OpenSky as one request.
+
+    Bounds left unset are not sent, so a region without any covers the
+    whole planet.
+    """
+
+    name: str
+    lamin: float | None = None
+    lomin: float | None = None
+    lamax: float | None = None
+    lomax: float | None = None
+    poll_interval: int | None = None  # defaults to the global poll_interval
+
+    @property
+    def params(self) -> dict:
+        """OpenSky query parameters selecting this region."""
+        bounds = {"lamin": self.lamin, "lomin": self.lomin, "lamax": self.lamax, "lomax": self.lomax}
+        return {k: v for k, v in bounds.items() if v is not None}
+
+    @property
+    def credit_cost(self) -> int:
+        """OpenSky API credits one poll of this region costs, by its area in square degrees."""
+        lat = (self.lamax if self.lamax is not None else 90.0) - (self.lamin if self.lamin is not None else -90.0)
+        lon = (self.lomax if self.lomax is not None else 180.0) - (self.lomin if self.lomin is not None else -180.0)
+        area = lat * lon
+        if area <= 25:
+            return 1
+        if area <= 100:
+            return 2
+        if area <= 400:
+            return 3
+        return 4
+
+    def contains(self, latitude: float, longitude: float) -> bool:
+        """Whether a position lies inside the region."""
+        return (
+            (self.lamin is None or latitude >= self.lamin)
+            and (self.lamax is None or latitude <= self.lamax)
+            and (self.lomin is None or longitude >= self.lomin)
+            and (self.lomax is None or longitude <= self.lomax)
+        )
+
+
 class Settings(BaseSettings):
     """ADSB Sync service settings."""
 
@@ -9,19 +54,67 @@ class Settings(BaseSettings):
     redis_host: str = "localhost"
     redis_port: int = 6379
     redis_ttl: int = 60
+    generation_grace: int = 60
+    position_encoding: str = "binary"  # "binary" or "json" (legacy readers)
+    redis_batch_size: int = 500
+    redis_write_concurrency: int = 4
+    redis_write_retries: int = 2
+
+    change_stream_length: int = 100  # change sets kept, 0 disables publishing them
+    change_set_max_aircraft: int = 1000  # larger change sets are published as full, without icao24s
+
+    # Track history
+    track_max_points: int = 240  # per aircraft, 0 disables track history
+    track_ttl: int = 3600
+
+    # Warm start: the last published generation is saved here and restored
+    # into an empty Valkey; empty disables it
+    snapshot_path: str = "data/snapshot.bin"
+    snapshot_check_interval: int = 5
+
+    # Replicas: only the holder of the leader lease polls
+    leader_election: bool = True
+    leader_lease_ttl: int = 15
 
     # Polling
     poll_interval: int = 30
     max_backoff: int = 300
+    # Scale poll intervals to spread the remaining OpenSky credits over the day
+    adaptive_polling: bool = True
+    min_poll_interval: int = 10
+    # JSON list of regions, e.g. [{"name": "europe", "lamin": 35, "lomin": -12,
+    # "lamax": 72, "lomax": 32, "poll_interval": 15}]; empty polls the whole planet
+    regions: list[Region] = []
+
+    # Streaming
+    stream_parse: bool = True
+    stream_batch_size: int = 2000
+
+    # Position source
+    source: str = "opensky"  # "opensky", "replay" or "synthetic"
+    record_dir: str = ""  # record every response as gzipped NDJSON here
+    replay_path: str = ""
+    replay_speed: float = 1.0
+    synthetic_aircraft: int = 10000
+    synthetic_seed: int = 0
 
     # Metrics
     metrics_port: int = 9090
+    connectivity_interval: int = 30  # seconds between connectivity probes
 
     # Logging
     log_level: str = "INFO"
 
     model_config = {"env_file": ".env", "env_file_encoding": "utf-8"}
 
+    @field_validator("regions")
+    @classmethod
+    def unique_region_names(cls, regions: list[Region]) -> list[Region]:
+        names = [r.name for r in regions]
+        if len(set(names)) != len(names):
+            raise ValueError("region names must be unique")
+        return regions
+
 
 @lru_cache
 def get_settings() -> Settings:
@@ -1,107 +1,145 @@
+import asyncio
 import json
+import logging
 import socket
 import time
-import threading
-from http.server import HTTPServer, BaseHTTPRequestHandler
 from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
 from app.config import settings
 
+logger = logging.getLogger(__name__)
 
-def check_tcp_connection(host: str, port: int, timeout: float = 2.0) -> dict:
+
+async def check_tcp_connection(host: str, port: int, timeout: float = 2.0) -> dict:
     """Test TCP connectivity to a host:port."""
-    start = time.time()
-    try:
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.settimeout(timeout)
-        result = sock.connect_ex((host, port))
-        latency = (time.time() - start) * 1000
-        sock.close()
-        return {
-            "connected": result == 0,
-            "latency_ms": round(latency, 2),
-            "error": None if result == 0 else f"Connection refused (code: {result})",
-        }
-    except socket.timeout:
+    start = time.monotonic()
+
+    def result(error: str | None) -> dict:
         return {
-            "connected": False,
-            "latency_ms": round((time.time() - start) * 1000, 2),
-            "error": "Connection timed out",
+            "connected": error is None,
+            "latency_ms": round((time.monotonic() - start) * 1000, 2),
+            "error": error,
         }
+
+    try:
+        # Covers DNS resolution too, which runs in the loop's executor
+        _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    except asyncio.TimeoutError:
+        return result("Connection timed out")
     except socket.gaierror as e:
-        return {
-            "connected": False,
-            "latency_ms": round((time.time() - start) * 1000, 2),
-            "error": f"DNS resolution failed: {e}",
-        }
+        return result(f"DNS resolution failed: {e}")
+    except ConnectionRefusedError as e:
+        return result(f"Connection refused (code: {e.errno})")
     except Exception as e:
-        return {
-            "connected": False,
-            "latency_ms": round((time.time() - start) * 1000, 2),
-            "error": str(e),
-        }
+        return result(str(e))
+    writer.close()
+    return result(None)
+
 
+class ConnectivityMonitor:
+    """Probe ADSB-Sync's outbound connections in the background.
 
-def get_connectivity():
-    """Test ADSB-Sync's outbound connections and return results."""
-    connections = []
-
-    # ADSB-Sync -> Valkey
-    valkey_result = check_tcp_connection(settings.redis_host, settings.redis_port)
-    connections.append({
-        "id": "adsb-to-valkey",
-        "source": "ADSB-Sync",
-        "destination": "Valkey",
-        "port": settings.redis_port,
-        "protocol": "TCP",
-        "status": "connected" if valkey_result["connected"] else "blocked",
-        "latency_ms": valkey_result["latency_ms"],
-        "error": valkey_result["error"],
-    })
-
-    # ADSB-Sync -> OpenSky Network
-    opensky_result = check_tcp_connection("opensky-network.org", 443, timeout=5.0)
-    connections.append({
-        "id": "adsb-to-opensky",
-        "source": "ADSB-Sync",
-        "destination": "OpenSky Network",
-        "port": 443,
-        "protocol": "HTTPS",
-        "status": "connected" if opensky_result["connected"] else "blocked",
-        "latency_ms": opensky_result["latency_ms"],
-        "error": opensky_result["error"],
-    })
-
-    return connections
-
-
-class CustomHandler(BaseHTTPRequestHandler):
-    """HTTP handler serving Prometheus metrics and connectivity endpoint."""
-
-    def do_GET(self):
-        if self.path == "/metrics":
-            output = generate_latest()
-            self.send_response(200)
-            self.send_header("Content-Type", CONTENT_TYPE_LATEST)
-            self.end_headers()
-            self.wfile.write(output)
-        elif self.path == "/connectivity":
-            connections = get_connectivity()
-            body = json.dumps(connections).encode("utf-8")
-            self.send_response(200)
-            self.send_header("Content-Type", "application/json")
-            self.end_headers()
-            self.wfile.write(body)
-        else:
-            self.send_response(404)
-            self.end_headers()
-
-    def log_message(self, format, *args):
-        """Suppress default request logging."""
+    Probes run concurrently every ``interval`` seconds and requests are
+    answered from the latest results, so a slow or unreachable destination
+    never holds up a request.
+    """
+
+    def __init__(self, interval: float):
+        self._interval = interval
+        self._connections: list[dict] = []
+        self._checked_at: float | None = None
+
+    async def refresh(self):
+        """Run every probe concurrently and cache the results."""
+        valkey_result, opensky_result = await asyncio.gather(
+            check_tcp_connection(settings.redis_host, settings.redis_port),
+            check_tcp_connection("opensky-network.org", 443, timeout=5.0),
+        )
+        self._connections = [
+            {
+                "id": "adsb-to-valkey",
+                "source": "ADSB-Sync",
+                "destination": "Valkey",
+                "port": settings.redis_port,
+                "protocol": "TCP",
+                "status": "connected" if valkey_result["connected"] else "blocked",
+                "latency_ms": valkey_result["latency_ms"],
+                "error": valkey_result["error"],
+            },
+            {
+                "id": "adsb-to-opensky",
+                "source": "ADSB-Sync",
+                "destination": "OpenSky Network",
+                "port": 443,
+                "protocol": "HTTPS",
+                "status": "connected" if opensky_result["connected"] else "blocked",
+                "latency_ms": opensky_result["latency_ms"],
+                "error": opensky_result["error"],
+            },
+        ]
+        self._checked_at = time.monotonic()
+
+    async def run(self):
+        """Refresh the probes forever, waiting an interval first if they have already run."""
+        if self._checked_at is not None:
+            await asyncio.sleep(self._interval)
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Connectivity probes failed: {e}")
+            await asyncio.sleep(self._interval)
+
+    def get_connectivity(self) -> list[dict]:
+        """Latest probe results, each with the age of the probe in seconds."""
+        if self._checked_at is None:
+            return []
+        age = round(time.monotonic() - self._checked_at, 1)
+        return [{**connection, "age_seconds": age} for connection in self._connections]
+
+
+async def _read_request(reader: asyncio.StreamReader) -> str | None:
+    """Read a request and return its path; the body, if any, is ignored."""
+    request_line = await reader.readline()
+    while (await reader.readline()) not in (b"\r\n", b"\n", b""):
         pass
+    parts = request_line.decode("latin-1").split()
+    if len(parts) < 2 or parts[0] != "GET":
+        return None
+    return parts[1].split("?", 1)[0]
+
+
+def _response(status: str, content_type: str | None = None, body: bytes = b"") -> bytes:
+    headers = [f"HTTP/1.1 {status}", f"Content-Length: {len(body)}", "Connection: close"]
+    if content_type:
+        headers.append(f"Content-Type: {content_type}")
+    return ("\r\n".join(headers) + "\r\n\r\n").encode("latin-1") + body
+
+
+async def start_custom_server(port: int, monitor: ConnectivityMonitor) -> asyncio.Server:
+    """Serve Prometheus metrics and the cached connectivity results on the event loop."""
+
+    def route(path: str | None) -> bytes:
+        if path == "/metrics":
+            return _response("200 OK", CONTENT_TYPE_LATEST, generate_latest())
+        if path == "/connectivity":
+            body = json.dumps(monitor.get_connectivity()).encode("utf-8")
+            return _response("200 OK", "application/json", body)
+        if path is None:
+            return _response("405 Method Not Allowed")
+        return _response("404 Not Found")
 
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            try:
+                response = route(await asyncio.wait_for(_read_request(reader), timeout=10.0))
+            except (ValueError, asyncio.LimitOverrunError):
+                # A request line or header longer than the reader's limit
+                response = _response("400 Bad Request")
+            writer.write(response)
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
 
-def start_custom_server(port: int):
-    """Start a threaded HTTP server for metrics and connectivity."""
-    server = HTTPServer(("0.0.0.0", port), CustomHandler)
-    thread = threading.Thread(target=server.serve_forever, daemon=True)
-    thread.start()
+    return await asyncio.start_server(handle, "0.0.0.0", port)
@@ -0,0 +1,111 @@
+import logging
+import redis.asyncio as redis
+from app.codec import (
+    CURRENT_GENERATION_KEY,
+    GENERATION_SEQUENCE_KEY,
+    geo_key,
+    live_key,
+    positions_key,
+)
+
+logger = logging.getLogger(__name__)
+
+# Keys that together make up one generation
+GENERATION_KEYS = (positions_key, live_key, geo_key)
+
+
+class GenerationStore:
+    """Publish each sync cycle as a new generation and switch readers to it atomically.
+
+    A new generation (positions hash, tracked set and GEO index) starts as a server-side
+    copy of the current one, so only aircraft that changed have to be sent. Readers keep using the previous
+    generation until ``commit`` flips the pointer; the old hash then lingers
+    for ``grace`` seconds for readers that resolved it just before the switch.
+
+    Generation numbers are never handed out twice, even if Valkey loses the
+    sequence along with the rest of its data: readers cache by generation
+    number, so a reused one would bring back what they held for it.
+    """
+
+    def __init__(self, r: redis.Redis, ttl: int, grace: int):
+        self._r = r
+        self._ttl = ttl
+        self._grace = grace
+        self.current: int | None = None
+        self._floor = 0
+
+    def advance_past(self, generation: int):
+        """Only allocate generations after ``generation``, e.g. one restored from a snapshot."""
+        self._floor = max(self._floor, generation)
+
+    async def published(self) -> bool:
+        """Whether Valkey holds a current generation."""
+        return bool(await self._r.exists(CURRENT_GENERATION_KEY))
+
+    async def begin(self, carry: bool = True) -> tuple[int, bool]:
+        """Allocate the next generation, carrying the current one into it if ``carry``.
+
+        Returns the generation and whether the previous generation's
+        positions were carried into it. If not, every aircraft must be
+        written in full.
+        """
+        generation = await self._r.incr(GENERATION_SEQUENCE_KEY)
+        if generation <= self._floor:
+            # The sequence was lost; move it past every generation already used
+            generation = await self._r.incrby(GENERATION_SEQUENCE_KEY, self._floor + 1 - generation)
+        self._floor = generation
+        previous = await self._r.get(CURRENT_GENERATION_KEY)
+        self.current = int(previous) if previous is not None else None
+
+        carried = False
+        if carry and self.current is not None:
+            copied = [
+                await self._r.copy(key(self.current), key(generation))
+                for key in GENERATION_KEYS
+            ]
+            carried = all(copied)
+            if any(copied) and not carried:
+                # A partial copy would leave the index out of step with positions
+                await self._r.delete(*(key(generation) for key in GENERATION_KEYS))
+        if carried:
+            # Don't leak the copy if this process dies before committing
+            for key in GENERATION_KEYS:
+                await self._r.expire(key(generation), self._ttl)
+        else:
+            logger.info("No previous generation to carry forward, writing a full snapshot")
+        return generation, carried
+
+    async def expire_new(self, generation: int):
+        """Give the generation's keys the store's TTL where they have none yet.
+
+        Keys written from scratch rather than copied have no TTL until
+        ``commit``; this keeps them from lingering forever if the process
+        dies or loses the lease before then. Call it after each write.
+        """
+        pipe = self._r.pipeline(transaction=False)
+        for key in GENERATION_KEYS:
+            pipe.expire(key(generation), self._ttl, nx=True)
+        await pipe.execute()
+
+    async def commit(self, generation: int, ttl: int | None = None):
+        """Make the generation current and schedule the previous one for removal.
+
+        The generation expires after ``ttl`` seconds, by default the store's TTL.
+        """
+        ttl = ttl or self._ttl
+        pipe = self._r.pipeline(transaction=True)
+        for key in GENERATION_KEYS:
+            pipe.expire(key(generation), ttl)
+        pipe.set(CURRENT_GENERATION_KEY, generation, ex=ttl)
+        if self.current is not None:
+            for key in GENERATION_KEYS:
+                pipe.expire(key(self.current), self._grace)
+        await pipe.execute()
+        self.current = generation
+
+    async def abort(self, generation: int):
+        """Discard a generation that was not completely written."""
+        try:
+            await self._r.delete(*(key(generation) for key in GENERATION_KEYS))
+        except redis.RedisError as e:
+            logger.warning(f"Failed to discard generation {generation}: {e}")
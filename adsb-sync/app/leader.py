@@ -0,0 +1,108 @@
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+import redis.asyncio as redis
+from app.metrics import LEADER, LEADER_HANDOFF
+
+logger = logging.getLogger(__name__)
+
+LEADER_KEY = "adsb-sync:leader"
+
+# Extend or drop the lease only while this replica still holds it
+RENEW_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class LeaderLease:
+    """Elect the one replica that polls, through a lease held in Valkey.
+
+    The lease is a key holding the leader's id with a TTL of ``ttl`` seconds.
+    The leader renews it every third of the TTL; the other replicas try to
+    take it at the same rate, so one takes over within a TTL and a third of
+    the leader dying, or a third of a TTL after it releases the lease on
+    shutdown.
+
+    ``held`` only trusts the lease until the TTL of the last renewal would
+    have run out, measured from before the renewal was sent, so a leader
+    cut off from Valkey stops publishing before another replica can take over.
+    """
+
+    def __init__(self, r: redis.Redis, ttl: float, key: str = LEADER_KEY):
+        self._r = r
+        self._ttl = ttl
+        self._key = key
+        self.id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._valid_until = 0.0
+        # When another replica's lease was last seen and when it was due to expire
+        self._other_seen: float | None = None
+        self._other_expires = 0.0
+        self._acquired = asyncio.Event()
+
+    @property
+    def held(self) -> bool:
+        return time.monotonic() < self._valid_until
+
+    async def wait_held(self):
+        """Wait until this replica is the leader."""
+        while not self.held:
+            self._acquired.clear()
+            await self._acquired.wait()
+
+    async def _try_acquire(self) -> bool:
+        started = time.monotonic()
+        ttl_ms = int(self._ttl * 1000)
+        if self._valid_until:
+            renewed = await self._r.eval(RENEW_SCRIPT, 1, self._key, self.id, ttl_ms)
+            if renewed:
+                self._valid_until = started + self._ttl
+                return True
+            logger.warning("Lost the leader lease")
+            self._valid_until = 0.0
+        if await self._r.set(self._key, self.id, nx=True, px=ttl_ms):
+            self._valid_until = started + self._ttl
+            if self._other_seen is not None:
+                # The lease lapsed at its expiry, or was released some time after it was last seen
+                vacant_since = self._other_expires if self._other_expires <= started else self._other_seen
+                LEADER_HANDOFF.observe(started - vacant_since)
+                self._other_seen = None
+            logger.info(f"Acquired the leader lease as {self.id}")
+            return True
+        remaining_ms = await self._r.pttl(self._key)
+        self._other_seen = started
+        self._other_expires = started + max(remaining_ms, 0) / 1000
+        return False
+
+    async def run(self):
+        """Hold or contend for the lease forever."""
+        while True:
+            try:
+                if await self._try_acquire():
+                    self._acquired.set()
+            except redis.RedisError as e:
+                logger.warning(f"Failed to refresh the leader lease: {e}")
+            LEADER.set(1 if self.held else 0)
+            await asyncio.sleep(self._ttl / 3)
+
+    async def release(self):
+        """Give the lease up so another replica can take over without waiting for it to expire."""
+        if not self._valid_until:
+            return
+        self._valid_until = 0.0
+        LEADER.set(0)
+        try:
+            await self._r.eval(RELEASE_SCRIPT, 1, self._key, self.id)
+        except redis.RedisError as e:
+            logger.warning(f"Failed to release the leader lease: {e}")
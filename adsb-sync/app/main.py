@@ -1,20 +1,46 @@
 import asyncio
-import json
 import logging
 import time
+from collections.abc import AsyncIterator
 import httpx
 import redis.asyncio as redis
-from app.connectivity import start_custom_server
-from app.config import settings
+from app.codec import (
+    CHANGES_KEY,
+    GEO_MAX_LATITUDE,
+    TRACK_FIELD,
+    decode_position,
+    encode_changes,
+    encode_position,
+    encode_track_point,
+    geo_key,
+    live_key,
+    positions_key,
+    track_key,
+)
+from app.connectivity import ConnectivityMonitor, start_custom_server
+from app.config import Region, settings
+from app.generations import GenerationStore
+from app.leader import LeaderLease
+from app.memory import peak_rss_bytes, reset_peak_rss
 from app.metrics import (
     SYNC_CYCLES_TOTAL,
     SYNC_DURATION_SECONDS,
     AIRCRAFT_STORED,
-    OPENSKY_FETCH_DURATION,
     REDIS_STORE_DURATION,
     CONSECUTIVE_FAILURES,
     CURRENT_BACKOFF,
+    CYCLE_PEAK_MEMORY,
+    AIRCRAFT_WRITES,
+    REGION_AIRCRAFT,
+    RATE_LIMITED,
+    SNAPSHOT_RESTORES,
 )
+from app.scheduler import PollScheduler
+from app.snapshot import SnapshotStore
+from app.sources import PositionSource, create_source
+from app.tracker import CHANGED, SKIP, ChangeTracker, fingerprint
+from app.workers import dumps, run_stage, timed_stage
+from app.writer import BatchWriter
 
 logging.basicConfig(
     level=getattr(logging, settings.log_level),
@@ -22,61 +48,409 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-OPENSKY_URL = "https://opensky-network.org/api/states/all"
+# What run_cycle returns when no region was due, so nothing was polled
+NOT_DUE = -1
+
+
+async def fetch_regions(
+    source: PositionSource, regions: list[Region]
+) -> AsyncIterator[tuple[str, list]]:
+    """Fetch regions concurrently, yielding ``(region name, states)`` batches.
+
+    A single region is streamed straight through. Several regions are merged
+    first, keeping the state with the newest ``last_contact`` for aircraft
+    reported by overlapping regions.
+    """
+    if len(regions) == 1:
+        async for states in source.states(regions[0]):
+            yield regions[0].name, states
+        return
+
+    merged: dict[str, tuple[list, str]] = {}
+    received: dict[str, int] = {}
 
+    async def fetch(region: Region):
+        received[region.name] = 0
+        async for states in source.states(region):
+            received[region.name] += len(states)
+            for state in states:
+                if not state[0]:
+                    continue
+                icao24 = state[0].lower()
+                held = merged.get(icao24)
+                if held is None or (state[4] or 0) > (held[0][4] or 0):
+                    merged[icao24] = (state, region.name)
 
-async def fetch_states(client: httpx.AsyncClient) -> dict | None:
-    """Fetch current aircraft states from OpenSky Network (anonymous access)."""
     try:
-        start = time.monotonic()
-        response = await client.get(OPENSKY_URL, timeout=30.0)
-        response.raise_for_status()
-        OPENSKY_FETCH_DURATION.observe(time.monotonic() - start)
-        return response.json()
-    except httpx.TimeoutException:
-        logger.warning("OpenSky API request timed out")
-        return None
-    except httpx.HTTPStatusError as e:
-        logger.error(f"OpenSky API error: {e.response.status_code}")
-        return None
-    except Exception as e:
-        logger.error(f"Failed to fetch OpenSky data: {e}")
-        return None
+        # A failing region cancels the others rather than leaving them fetching
+        async with asyncio.TaskGroup() as group:
+            for region in regions:
+                group.create_task(fetch(region))
+    except ExceptionGroup as e:
+        # Surface the first failure as a single region's would be
+        raise e.exceptions[0]
+    for name, n in received.items():
+        REGION_AIRCRAFT.labels(region=name).set(n)
+    duplicates = sum(received.values()) - len(merged)
+    if duplicates:
+        logger.debug(f"Dropped {duplicates} duplicate aircraft from overlapping regions")
 
+    by_region: dict[str, list] = {region.name: [] for region in regions}
+    for state, name in merged.values():
+        by_region[name].append(state)
+    merged.clear()
+    size = settings.stream_batch_size
+    for name, states in by_region.items():
+        for i in range(0, len(states), size):
+            yield name, states[i:i + size]
 
-async def store_states(r: redis.Redis, states: list) -> int:
-    """Store aircraft states in Redis with TTL."""
-    start = time.monotonic()
-    count = 0
-    pipe = r.pipeline()
+
+def state_to_record(icao24: str, state: list) -> dict:
+    """Convert an OpenSky state vector into the record stored in Redis."""
+    return {
+        "icao24": icao24,
+        "callsign": state[1].strip() if state[1] else None,
+        "origin_country": state[2],
+        "time_position": state[3],
+        "last_contact": state[4],
+        "longitude": state[5],
+        "latitude": state[6],
+        "baro_altitude": state[7],
+        "on_ground": state[8],
+        "velocity": state[9],
+        "true_track": state[10],
+        "vertical_rate": state[11],
+        "geo_altitude": state[13],
+        "squawk": state[14],
+    }
+
+
+def geo_command(key: str, icao24: str, data: dict) -> tuple:
+    """Command placing an aircraft in the GEO index, or removing it if it has no usable position."""
+    longitude, latitude = data["longitude"], data["latitude"]
+    if longitude is None or latitude is None or abs(latitude) > GEO_MAX_LATITUDE:
+        return ("zrem", key, icao24)
+    return ("geoadd", key, (longitude, latitude, icao24))
+
+
+def track_commands(icao24: str, data: dict) -> list[tuple]:
+    """Commands appending an aircraft's position to its capped track history.
+
+    The entry ID is the time of the position, so appending the same
+    position again, e.g. when a batch is retried, is rejected by Valkey
+    instead of recording a duplicate point.
+    """
+    if not settings.track_max_points or data["longitude"] is None or data["latitude"] is None:
+        return []
+    key = track_key(icao24)
+    reported = data["time_position"] or data["last_contact"]
+    entry_id = f"{int(reported) * 1000}-0" if reported else "*"
+    return [
+        ("xadd", key, {TRACK_FIELD: encode_track_point(data)}, entry_id, settings.track_max_points, True),
+        ("expire", key, settings.track_ttl),
+    ]
+
+
+def is_stale_entry(error: Exception) -> bool:
+    """Whether Valkey rejected a stream entry for not being newer than the last one."""
+    return isinstance(error, redis.ResponseError) and "equal or smaller" in str(error)
+
+
+def encode_record(data: dict) -> bytes | str:
+    """Serialize a position record in the configured encoding."""
+    if settings.position_encoding == "json":
+        return dumps(data)
+    return encode_position(data)
+
+
+def prepare_writes(
+    generation: int, states: list, tracker: ChangeTracker, region: str
+) -> tuple[list[tuple], list[str], dict[str, int]]:
+    """Classify a batch of states and build the commands writing the changed ones.
+
+    Each changed aircraft is written to the positions hash and the GEO
+    index and its position is appended to its track history; newly seen
+    aircraft are added to the tracked set. Aircraft whose state is
+    unchanged are already present through the carried-forward copy of the
+    previous generation and are not sent.
+
+    Returns the commands, the aircraft each command belongs to and the
+    number of aircraft per outcome. CPU-bound, so it runs off the event loop.
+    """
+    key = positions_key(generation)
+    geo = geo_key(generation)
+    live = live_key(generation)
+    outcomes = {CHANGED: 0, SKIP: 0}
+    commands = []
+    owners = []
 
     for state in states:
         if not state[0]:
             continue
 
         icao24 = state[0].lower()
-        data = {
-            "icao24": icao24,
-            "callsign": state[1].strip() if state[1] else None,
-            "origin_country": state[2],
-            "time_position": state[3],
-            "last_contact": state[4],
-            "longitude": state[5],
-            "latitude": state[6],
-            "baro_altitude": state[7],
-            "on_ground": state[8],
-            "velocity": state[9],
-            "true_track": state[10],
-            "vertical_rate": state[11],
-            "geo_altitude": state[13],
-            "squawk": state[14],
-        }
-        pipe.setex(f"aircraft:{icao24}", settings.redis_ttl, json.dumps(data))
-        count += 1
-
-    await pipe.execute()
+        fp = fingerprint(state)
+        outcome = tracker.classify(icao24, fp, region)
+        if outcome == CHANGED:
+            data = state_to_record(icao24, state)
+            value = encode_record(data)
+            commands.append(("hset", key, icao24, value))
+            commands.append(geo_command(geo, icao24, data))
+            owners.extend((icao24, icao24))
+            track = track_commands(icao24, data)
+            commands.extend(track)
+            owners.extend([icao24] * len(track))
+            if not tracker.known(icao24):
+                commands.append(("sadd", live, icao24))
+                owners.append(icao24)
+            tracker.mark_written(icao24, fp, value)
+        outcomes[outcome] += 1
+
+    return commands, owners, outcomes
+
+
+def delete_commands(generation: int, icao24s: list[str]) -> list[tuple]:
+    """Commands removing aircraft from the positions hash, GEO index and tracked set of a generation."""
+    size = settings.redis_batch_size
+    commands = []
+    for i in range(0, len(icao24s), size):
+        chunk = icao24s[i:i + size]
+        commands.append(("hdel", positions_key(generation), *chunk))
+        commands.append(("zrem", geo_key(generation), *chunk))
+        commands.append(("srem", live_key(generation), *chunk))
+    return commands
+
+
+async def delete_aircraft(writer: BatchWriter, generation: int, icao24s: list[str]):
+    """Remove aircraft from a generation, raising if any removal failed."""
+    for result in await timed_stage("delete", writer.write(delete_commands(generation, icao24s))):
+        if isinstance(result, Exception):
+            raise result
+
+
+async def store_states(
+    writer: BatchWriter, generation: int, states: list, tracker: ChangeTracker, region: str
+) -> int:
+    """Write changed aircraft states reported by ``region`` into the generation being built.
+
+    Commands are prepared in a worker thread and only the encoded batch is
+    written from the event loop. Aircraft in a batch that could not be
+    written keep their previous position and are written again next cycle;
+    aircraft new to the generation are removed from it again, so none of
+    their writes that did succeed are left behind.
+    """
+    start = time.monotonic()
+    commands, owners, outcomes = await run_stage(
+        "transform", prepare_writes, generation, states, tracker, region
+    )
+
+    failed = set()
+    results = await timed_stage("write", writer.write(commands))
+    for command, icao24, result in zip(commands, owners, results):
+        if isinstance(result, Exception):
+            if command[0] == "xadd" and is_stale_entry(result):
+                # The track already holds this point or a newer one
+                continue
+            tracker.forget(icao24)
+            failed.add(icao24)
+
+    for outcome, n in outcomes.items():
+        AIRCRAFT_WRITES.labels(result=outcome).inc(n)
     REDIS_STORE_DURATION.observe(time.monotonic() - start)
-    return count
+    if owners and len(failed) == outcomes[CHANGED]:
+        raise redis.RedisError(f"All {len(failed)} aircraft writes failed")
+    if failed:
+        logger.warning(f"{len(failed)} aircraft writes failed, retrying next cycle")
+        # The tracker never adopts these, so nothing else would remove them
+        partial = [icao24 for icao24 in failed if not tracker.known(icao24)]
+        if partial:
+            await delete_aircraft(writer, generation, partial)
+    return sum(outcomes.values())
+
+
+async def publish_changes(
+    writer: BatchWriter, generation: int, full: bool, changes: tuple[list, list, list]
+):
+    """Append a published generation's change set to the changes stream.
+
+    A change set listing more than ``change_set_max_aircraft`` icao24s is
+    published as full and without them, telling consumers to reload, so an
+    entry stays under about 7 bytes per icao24 allowed.
+
+    Best effort: the generation is already live, so a failure is only logged.
+    """
+    if not settings.change_stream_length:
+        return
+    if sum(len(icao24s) for icao24s in changes) > settings.change_set_max_aircraft:
+        full, changes = True, ([], [], [])
+    fields = encode_changes(generation, full, *changes)
+    command = ("xadd", CHANGES_KEY, fields, "*", settings.change_stream_length, True)
+    (result,) = await writer.write([command])
+    if isinstance(result, Exception):
+        logger.warning(f"Failed to publish changes of generation {generation}: {result}")
+
+
+def restore_commands(generation: int, entries: list[tuple[str, bytes]]) -> list[tuple]:
+    """Commands rebuilding a generation from snapshot entries. CPU-bound, so it runs off the event loop."""
+    key = positions_key(generation)
+    geo = geo_key(generation)
+    commands = []
+    for icao24, value in entries:
+        commands.append(("hset", key, icao24, value))
+        commands.append(geo_command(geo, icao24, decode_position(value)))
+    size = settings.redis_batch_size
+    for i in range(0, len(entries), size):
+        commands.append(("sadd", live_key(generation), *(icao24 for icao24, _ in entries[i:i + size])))
+    return commands
+
+
+async def restore_snapshot(
+    writer: BatchWriter,
+    generations: GenerationStore,
+    tracker: ChangeTracker,
+    snapshots: SnapshotStore,
+) -> bool:
+    """Publish the saved snapshot if Valkey has no current generation.
+
+    The restored generation expires when the snapshot's positions would
+    have, and is numbered after the one that was saved, so readers never
+    see that number reused. The tracker is reset, so the next cycle writes
+    a full snapshot rather than trusting what it held before Valkey was
+    emptied.
+    """
+    if await generations.published():
+        return False
+    loaded = await snapshots.load()
+    if loaded is None:
+        return False
+    entries, ttl, saved = loaded
+
+    generations.advance_past(saved)
+    generation, _ = await generations.begin(carry=False)
+    commands = await run_stage("snapshot", restore_commands, generation, entries)
+    for result in await writer.write(commands):
+        if isinstance(result, Exception):
+            logger.error(f"Failed to restore snapshot: {result}")
+            await generations.abort(generation)
+            return False
+    await generations.expire_new(generation)
+    await generations.commit(generation, ttl=ttl)
+    tracker.reset()
+    SNAPSHOT_RESTORES.inc()
+    logger.info(
+        f"Restored {len(entries)} aircraft from the snapshot as generation {generation}, "
+        f"expiring in {ttl}s"
+    )
+    return True
+
+
+async def watch_valkey(
+    writer: BatchWriter,
+    generations: GenerationStore,
+    tracker: ChangeTracker,
+    snapshots: SnapshotStore,
+    lease: LeaderLease | None,
+):
+    """Restore the snapshot as soon as Valkey is found empty, e.g. after a restart."""
+    while True:
+        await asyncio.sleep(settings.snapshot_check_interval)
+        if lease is not None and not lease.held:
+            continue
+        try:
+            if await generations.published():
+                continue
+            async with snapshots.lock:
+                await restore_snapshot(writer, generations, tracker, snapshots)
+        except redis.RedisError as e:
+            logger.debug(f"Cannot check Valkey for a current generation: {e}")
+
+
+async def run_cycle(
+    source: PositionSource,
+    writer: BatchWriter,
+    generations: GenerationStore,
+    tracker: ChangeTracker,
+    schedule: PollScheduler,
+    lease: LeaderLease | None = None,
+) -> int | None:
+    """Stream the due regions into a new generation and publish it.
+
+    Aircraft in regions that are not due are carried forward unchanged. If
+    the previous generation could not be carried, every region is polled.
+    The regions polled are rescheduled according to how the cycle went.
+    With a ``lease``, the generation is only published while it is held.
+
+    Returns the number of aircraft in the published generation, None if
+    the cycle failed and readers were left on the previous generation, or
+    ``NOT_DUE`` if no region was due.
+    """
+    generation = None
+    started = time.monotonic()
+    regions = schedule.due(started)
+    if not regions:
+        return NOT_DUE
+    try:
+        generation, carried = await generations.begin(carry=tracker.synced)
+        if not carried:
+            regions = schedule.regions
+        tracker.begin_cycle(carried, [region.name for region in regions])
+        count = 0
+        try:
+            async for region, states in fetch_regions(source, regions):
+                count += await store_states(writer, generation, states, tracker, region)
+                if not carried:
+                    await generations.expire_new(generation)
+        finally:
+            if source.credits_remaining is not None:
+                schedule.credits_remaining(source.credits_remaining)
+        if len(regions) == 1:
+            REGION_AIRCRAFT.labels(region=regions[0].name).set(count)
+
+        # An empty response for every region is treated as an OpenSky glitch
+        if count or len(regions) < len(schedule.regions):
+            if lease is not None and not lease.held:
+                logger.warning(f"Lost the leader lease, discarding generation {generation}")
+                await generations.abort(generation)
+                return None
+            await delete_aircraft(writer, generation, tracker.removed())
+            await timed_stage("publish", generations.commit(generation))
+            appeared, moved, disappeared = tracker.commit()
+            schedule.polled(regions, started)
+            logger.info(
+                f"Published generation {generation} from {len(regions)} region(s) "
+                f"({count} reported, {len(appeared)} appeared, {len(moved)} moved, "
+                f"{len(disappeared)} disappeared)"
+            )
+            await publish_changes(writer, generation, not carried, (appeared, moved, disappeared))
+            return len(tracker)
+        await generations.abort(generation)
+        schedule.polled(regions, started)
+        return 0
+    except httpx.TimeoutException:
+        logger.warning("OpenSky API request timed out")
+        schedule.failed(regions, time.monotonic())
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code == 429:
+            RATE_LIMITED.inc()
+            wait = schedule.rate_limited(regions, time.monotonic(), source.retry_after)
+            logger.warning(f"OpenSky rate limit reached, retrying in {wait:.0f}s")
+        else:
+            logger.error(f"OpenSky API error: {e.response.status_code}")
+            schedule.failed(regions, time.monotonic())
+    except httpx.TransportError as e:
+        logger.error(f"Failed to reach OpenSky: {e}")
+        schedule.failed(regions, time.monotonic())
+    except redis.RedisError as e:
+        logger.error(f"Failed to store aircraft states: {e}")
+        tracker.reset()
+        schedule.retry(regions, started)
+    except Exception as e:
+        logger.error(f"Failed to fetch OpenSky data: {e}")
+        schedule.retry(regions, started)
+
+    if generation is not None:
+        await generations.abort(generation)
+    return None
 
 
 async def sync_loop():
@@ -84,15 +458,31 @@ async def sync_loop():
     logger.info(f"Starting ADSB sync service")
     logger.info(f"Redis: {settings.redis_host}:{settings.redis_port}")
     logger.info(f"Poll interval: {settings.poll_interval}s, TTL: {settings.redis_ttl}s")
+    schedule = PollScheduler(
+        settings.regions,
+        default_interval=settings.poll_interval,
+        min_interval=settings.min_poll_interval,
+        max_backoff=settings.max_backoff,
+        adaptive=settings.adaptive_polling,
+    )
+    logger.info(f"Regions: {', '.join(r.name for r in schedule.regions)}")
 
-    start_custom_server(settings.metrics_port)
+    # Probes and requests run on this loop; keep a reference so the task lives on.
+    # Probed once up front so /connectivity always has results to serve
+    monitor = ConnectivityMonitor(settings.connectivity_interval)
+    await monitor.refresh()
+    probes = asyncio.create_task(monitor.run())
+    await start_custom_server(settings.metrics_port, monitor)
     logger.info(f"Metrics server started on port {settings.metrics_port}")
 
-    r = redis.Redis(
+    # Sized so every concurrent write batch gets its own connection
+    pool = redis.BlockingConnectionPool(
         host=settings.redis_host,
         port=settings.redis_port,
         decode_responses=True,
+        max_connections=settings.redis_write_concurrency + 1,
     )
+    r = redis.Redis(connection_pool=pool)
 
     # Test Redis connection
     try:
@@ -102,39 +492,103 @@ async def sync_loop():
         logger.error(f"Failed to connect to Redis: {e}")
         raise
 
-    backoff = settings.poll_interval
-    consecutive_failures = 0
+    snapshots = None
+    if settings.snapshot_path:
+        snapshots = SnapshotStore(settings.snapshot_path, ttl=settings.redis_ttl)
+    tracker = ChangeTracker(keep_values=snapshots is not None)
+    generations = GenerationStore(r, ttl=settings.redis_ttl, grace=settings.generation_grace)
+    writer = BatchWriter(
+        r,
+        batch_size=settings.redis_batch_size,
+        concurrency=settings.redis_write_concurrency,
+        max_retries=settings.redis_write_retries,
+    )
+
+    lease = None
+    if settings.leader_election:
+        lease = LeaderLease(r, ttl=settings.leader_lease_ttl)
+        contend = asyncio.create_task(lease.run())
+    if snapshots is not None:
+        watch = asyncio.create_task(watch_valkey(writer, generations, tracker, snapshots, lease))
 
     async with httpx.AsyncClient() as client:
-        while True:
-            cycle_start = time.monotonic()
-            logger.info("Fetching aircraft states from OpenSky...")
-            data = await fetch_states(client)
-
-            if data and "states" in data and data["states"]:
-                count = await store_states(r, data["states"])
-                logger.info(f"Stored {count} aircraft positions in Redis")
-                AIRCRAFT_STORED.set(count)
-                consecutive_failures = 0
-                backoff = settings.poll_interval
+        source = create_source(settings, client)
+        logger.info(f"Position source: {settings.source}")
+        try:
+            await poll(source, writer, generations, tracker, schedule, lease, snapshots)
+        finally:
+            await source.close()
+            if snapshots is not None:
+                watch.cancel()
+            if lease is not None:
+                contend.cancel()
+                await lease.release()
+
+
+async def poll(
+    source: PositionSource,
+    writer: BatchWriter,
+    generations: GenerationStore,
+    tracker: ChangeTracker,
+    schedule: PollScheduler,
+    lease: LeaderLease | None = None,
+    snapshots: SnapshotStore | None = None,
+):
+    """Run sync cycles forever at the times the scheduler sets, while holding the lease.
+
+    With ``snapshots``, an empty Valkey is first warmed from the saved
+    snapshot and each published generation is saved in turn.
+    """
+    consecutive_failures = 0
+    lock = snapshots.lock if snapshots is not None else asyncio.Lock()
+    while True:
+        if lease is not None and not lease.held:
+            logger.info("Standing by until this replica holds the leader lease")
+            await lease.wait_held()
+            # Another replica may have published since this one last did
+            tracker.reset()
+
+        cycle_start = time.monotonic()
+        reset_peak_rss()
+        logger.info("Fetching aircraft states...")
+        async with lock:
+            if snapshots is not None:
+                try:
+                    await restore_snapshot(writer, generations, tracker, snapshots)
+                except redis.RedisError as e:
+                    logger.warning(f"Failed to check for a snapshot to restore: {e}")
+            count = await run_cycle(source, writer, generations, tracker, schedule, lease)
+            # Only a tracker in step with the current generation holds its content
+            if snapshots is not None and tracker.synced and count != NOT_DUE:
+                await snapshots.save(generations.current, tracker.values())
+
+        if count == NOT_DUE:
+            # Nothing was polled, so there is no cycle to account for
+            await asyncio.sleep(schedule.seconds_until_due(time.monotonic()))
+            continue
+        if count:
+            logger.info(f"Stored {count} aircraft positions in Redis")
+            AIRCRAFT_STORED.set(count)
+            consecutive_failures = 0
+            SYNC_CYCLES_TOTAL.labels(status="success").inc()
+        else:
+            consecutive_failures += 1
+            AIRCRAFT_STORED.set(0)
+            if count == 0:
+                logger.info("No aircraft data available")
                 SYNC_CYCLES_TOTAL.labels(status="success").inc()
             else:
-                consecutive_failures += 1
-                AIRCRAFT_STORED.set(0)
-                if data and "states" in data:
-                    logger.info("No aircraft data available")
-                    SYNC_CYCLES_TOTAL.labels(status="success").inc()
-                else:
-                    logger.warning(f"Failed to get data (attempt {consecutive_failures})")
-                    backoff = min(backoff * 2, settings.max_backoff)
-                    logger.info(f"Backing off for {backoff}s")
-                    SYNC_CYCLES_TOTAL.labels(status="failure").inc()
-
-            SYNC_DURATION_SECONDS.observe(time.monotonic() - cycle_start)
-            CONSECUTIVE_FAILURES.set(consecutive_failures)
-            CURRENT_BACKOFF.set(backoff)
-
-            await asyncio.sleep(backoff)
+                logger.warning(f"Failed to get data (attempt {consecutive_failures})")
+                SYNC_CYCLES_TOTAL.labels(status="failure").inc()
+
+        SYNC_DURATION_SECONDS.observe(time.monotonic() - cycle_start)
+        CONSECUTIVE_FAILURES.set(consecutive_failures)
+        CURRENT_BACKOFF.set(schedule.backoff)
+        CYCLE_PEAK_MEMORY.set(peak_rss_bytes())
+
+        delay = schedule.seconds_until_due(time.monotonic())
+        logger.info(f"Next poll in {delay:.0f}s")
+        await asyncio.sleep(delay)
 
 
 def main():
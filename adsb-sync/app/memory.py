@@ -0,0 +1,26 @@
+import resource
+
+_CLEAR_REFS = "/proc/self/clear_refs"
+_STATUS = "/proc/self/status"
+
+
+def reset_peak_rss():
+    """Reset the kernel's peak-RSS watermark so the next reading covers one cycle."""
+    try:
+        with open(_CLEAR_REFS, "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def peak_rss_bytes() -> int:
+    """Return the peak resident set size since the last reset."""
+    try:
+        with open(_STATUS) as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    # No /proc (e.g. macOS dev machines): lifetime peak, reported in bytes there
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
@@ -10,3 +10,23 @@ REDIS_STORE_DURATION = Histogram("adsb_sync_redis_store_seconds", "Redis pipelin
     buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0))
 CONSECUTIVE_FAILURES = Gauge("adsb_sync_consecutive_failures", "Consecutive fetch failures")
 CURRENT_BACKOFF = Gauge("adsb_sync_current_backoff_seconds", "Current backoff interval")
+CYCLE_PEAK_MEMORY = Gauge("adsb_sync_cycle_peak_rss_bytes", "Peak resident memory during the last sync cycle")
+AIRCRAFT_WRITES = Counter("adsb_sync_aircraft_writes_total", "Aircraft by store outcome (changed, skipped)",
+    ["result"])
+REDIS_BATCH_DURATION = Histogram("adsb_sync_redis_batch_seconds", "Redis write batch duration",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0))
+REDIS_BATCH_RETRIES = Counter("adsb_sync_redis_batch_retries_total", "Redis write batches retried")
+REDIS_BATCH_FAILURES = Counter("adsb_sync_redis_batch_failures_total", "Redis write batches that failed after retries")
+REGION_AIRCRAFT = Gauge("adsb_sync_region_aircraft", "Aircraft reported by a region when last polled",
+    ["region"])
+POLL_INTERVAL = Gauge("adsb_sync_poll_interval_seconds", "Current interval between polls of a region",
+    ["region"])
+RATE_LIMIT_REMAINING = Gauge("adsb_sync_rate_limit_remaining", "OpenSky API credits remaining today")
+RATE_LIMITED = Counter("adsb_sync_rate_limited_total", "OpenSky requests rejected by the rate limit")
+STAGE_DURATION = Histogram("adsb_sync_stage_seconds", "Time spent in each stage of a sync cycle",
+    ["stage"], buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0))
+LEADER = Gauge("adsb_sync_leader", "Whether this replica holds the leader lease and polls")
+LEADER_HANDOFF = Histogram("adsb_sync_leader_handoff_seconds",
+    "Time the leader lease stood vacant, after expiring or being released, before this replica took it over",
+    buckets=(1.0, 2.5, 5.0, 10.0, 15.0, 30.0, 60.0, 120.0))
+SNAPSHOT_RESTORES = Counter("adsb_sync_snapshot_restores_total", "Generations restored from the local snapshot")
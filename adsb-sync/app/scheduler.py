@@ -0,0 +1,110 @@
+import datetime
+import logging
+from app.config import Region
+from app.metrics import POLL_INTERVAL, RATE_LIMIT_REMAINING
+
+logger = logging.getLogger(__name__)
+
+
+def seconds_until_quota_reset(now: datetime.datetime) -> float:
+    """Seconds until OpenSky's daily credits are refilled at midnight UTC."""
+    tomorrow = (now + datetime.timedelta(days=1)).date()
+    midnight = datetime.datetime.combine(tomorrow, datetime.time(), tzinfo=datetime.timezone.utc)
+    return (midnight - now).total_seconds()
+
+
+class PollScheduler:
+    """Decide when each region is next polled.
+
+    Polls are scheduled from the start of the cycle that made them, so the
+    cadence does not drift by the time a cycle takes. When OpenSky reports
+    the credits remaining, every region's configured interval is scaled by
+    the same factor so the remaining credits last until the daily refill:
+    faster than configured when there is credit to spare, but never faster
+    than ``min_interval``, and slower when running short.
+
+    After a failure the regions are retried after the rate-limit wait
+    OpenSky asked for, after an exponential backoff of up to
+    ``max_backoff`` for other OpenSky errors, or at their normal interval
+    when OpenSky was not at fault.
+    """
+
+    def __init__(
+        self,
+        regions: list[Region],
+        default_interval: int,
+        min_interval: int,
+        max_backoff: int,
+        adaptive: bool = True,
+    ):
+        self.regions = regions or [Region(name="global")]
+        self._intervals = {r.name: r.poll_interval or default_interval for r in self.regions}
+        self._min_interval = min_interval
+        self._max_backoff = max_backoff
+        self._adaptive = adaptive
+        self._factor = 1.0
+        self._next_due = {r.name: 0.0 for r in self.regions}
+        self.backoff = 0.0
+        for region in self.regions:
+            POLL_INTERVAL.labels(region=region.name).set(self.interval(region))
+
+    def interval(self, region: Region) -> float:
+        """Current interval between polls of a region."""
+        configured = self._intervals[region.name]
+        interval = configured * self._factor
+        if self._factor < 1:
+            interval = max(interval, min(configured, self._min_interval))
+        return interval
+
+    def due(self, now: float) -> list[Region]:
+        """Regions whose poll interval has elapsed."""
+        return [r for r in self.regions if self._next_due[r.name] <= now]
+
+    def seconds_until_due(self, now: float) -> float:
+        """Time until the next region is due."""
+        return max(0.0, min(self._next_due.values()) - now)
+
+    def credits_remaining(self, remaining: int, now: datetime.datetime | None = None):
+        """Adapt intervals to the credits OpenSky reports as remaining today."""
+        RATE_LIMIT_REMAINING.set(remaining)
+        if not self._adaptive:
+            return
+        now = now or datetime.datetime.now(datetime.timezone.utc)
+        # Credits per second spent at the configured intervals
+        rate = sum(r.credit_cost / self._intervals[r.name] for r in self.regions)
+        factor = rate * seconds_until_quota_reset(now) / max(remaining, 1)
+        if abs(factor - self._factor) > 0.05 * self._factor:
+            logger.info(
+                f"{remaining} OpenSky credits left, scaling poll intervals by {factor:.2f}"
+            )
+        self._factor = factor
+        for region in self.regions:
+            POLL_INTERVAL.labels(region=region.name).set(self.interval(region))
+
+    def polled(self, regions: list[Region], started: float):
+        """Schedule the next poll of regions fetched in a cycle that began at ``started``."""
+        self.backoff = 0.0
+        for region in regions:
+            self._next_due[region.name] = started + self.interval(region)
+
+    def rate_limited(self, regions: list[Region], now: float, retry_after: float | None) -> float:
+        """Hold regions back for as long as OpenSky asked; returns the wait."""
+        if retry_after is None:
+            return self.failed(regions, now)
+        self.backoff = retry_after
+        for region in regions:
+            self._next_due[region.name] = now + retry_after
+        return retry_after
+
+    def failed(self, regions: list[Region], now: float) -> float:
+        """Back off exponentially after an OpenSky error; returns the wait."""
+        base = min(self.interval(region) for region in regions)
+        self.backoff = min(max(self.backoff * 2, base), self._max_backoff)
+        for region in regions:
+            self._next_due[region.name] = now + self.backoff
+        return self.backoff
+
+    def retry(self, regions: list[Region], started: float):
+        """Retry regions at their normal interval after a failure not caused by OpenSky."""
+        for region in regions:
+            self._next_due[region.name] = started + self.interval(region)
@@ -0,0 +1,107 @@
+import asyncio
+import logging
+import mmap
+import os
+import struct
+import time
+from pathlib import Path
+from app.workers import run_stage
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"PSNP"
+VERSION = 2
+
+# magic, version, aircraft count, Unix time saved, generation saved
+_HEADER = struct.Struct("<4sHIdQ")
+# icao24, then offset and length of its encoded position in the data section
+_ENTRY = struct.Struct("<6sII")
+
+
+def write_snapshot(path: Path, positions: dict[str, bytes | str], saved_at: float, generation: int):
+    """Write a generation's encoded positions to ``path``, replacing it atomically.
+
+    The file is a fixed-size header, a fixed-width index and then the
+    encoded positions back to back, so it can be memory-mapped and read
+    without parsing anything but the index.
+    """
+    index = bytearray()
+    data = []
+    offset = 0
+    for icao24, value in positions.items():
+        if isinstance(value, str):
+            value = value.encode("utf-8")
+        index += _ENTRY.pack(icao24.encode("ascii"), offset, len(value))
+        data.append(value)
+        offset += len(value)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial = path.with_name(path.name + ".partial")
+    with open(partial, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, len(positions), saved_at, generation))
+        f.write(index)
+        f.writelines(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(partial, path)
+
+
+def read_snapshot(path: Path) -> tuple[float, int, list[tuple[str, bytes]]]:
+    """Read a snapshot back as the time it was saved, its generation and its ``(icao24, encoded position)`` pairs."""
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if len(mm) < _HEADER.size:
+            raise ValueError(f"{path} is truncated")
+        magic, version, count, saved_at, generation = _HEADER.unpack_from(mm, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} snapshot")
+        start = _HEADER.size + count * _ENTRY.size
+        if start > len(mm):
+            raise ValueError(f"{path} is truncated")
+        entries = []
+        for icao24, offset, length in _ENTRY.iter_unpack(mm[_HEADER.size:start]):
+            if start + offset + length > len(mm):
+                raise ValueError(f"{path} is truncated")
+            entries.append((icao24.rstrip(b"\0").decode("ascii"), mm[start + offset:start + offset + length]))
+    return saved_at, generation, entries
+
+
+class SnapshotStore:
+    """Keep the last published generation in a local file for warm starts.
+
+    ``save`` writes the positions the tracker holds after each published
+    generation. ``load`` returns them with the TTL they have left, measured
+    from when they were saved, and the generation they were published as,
+    or nothing once they would have expired.
+    ``lock`` is held around sync cycles and restores so they never overlap.
+    """
+
+    def __init__(self, path: str, ttl: int):
+        self._path = Path(path)
+        self._ttl = ttl
+        self._saved: int | None = None
+        self.lock = asyncio.Lock()
+
+    async def save(self, generation: int | None, positions: dict[str, bytes | str]):
+        """Save a generation's positions unless it is the one saved last."""
+        if generation is None or generation == self._saved:
+            return
+        try:
+            await run_stage("snapshot", write_snapshot, self._path, positions, time.time(), generation)
+            self._saved = generation
+        except OSError as e:
+            logger.warning(f"Failed to save snapshot to {self._path}: {e}")
+
+    async def load(self) -> tuple[list[tuple[str, bytes]], int, int] | None:
+        """The saved positions, their remaining TTL and generation, if there are any still valid."""
+        if not self._path.exists():
+            return None
+        try:
+            saved_at, generation, entries = await run_stage("snapshot", read_snapshot, self._path)
+        except (OSError, ValueError, struct.error) as e:
+            logger.warning(f"Failed to read snapshot {self._path}: {e}")
+            return None
+        ttl = int(self._ttl - (time.time() - saved_at))
+        if ttl <= 0 or not entries:
+            logger.info(f"Snapshot {self._path} has expired, not restoring it")
+            return None
+        return entries, ttl, generation
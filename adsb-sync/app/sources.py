@@ -0,0 +1,328 @@
+import abc
+import asyncio
+import gzip
+import logging
+import math
+import random
+import threading
+import time
+from collections.abc import AsyncIterator
+from pathlib import Path
+import httpx
+from app.config import Region, Settings
+from app.metrics import OPENSKY_FETCH_DURATION
+from app.stream import StateStreamParser
+from app.workers import dumps, loads, run_stage
+
+logger = logging.getLogger(__name__)
+
+OPENSKY_URL = "https://opensky-network.org/api/states/all"
+
+METERS_PER_DEGREE = 111_320.0
+
+# Body bytes collected before handing them to the decoder thread
+DECODE_CHUNK_BYTES = 256 * 1024
+
+
+class PositionSource(abc.ABC):
+    """Where aircraft state vectors come from.
+
+    ``states`` yields the state vectors of one region in batches of at most
+    ``batch_size``, in the OpenSky ``/states/all`` layout. Sources subject
+    to a rate limit report it in ``credits_remaining`` and ``retry_after``.
+    """
+
+    credits_remaining: int | None = None
+    retry_after: float | None = None
+
+    @abc.abstractmethod
+    def states(self, region: Region) -> AsyncIterator[list]:
+        """Yield the state vectors of ``region`` in batches."""
+
+    async def close(self):
+        """Release anything the source holds open."""
+
+
+class OpenSkySource(PositionSource):
+    """Live state vectors from the OpenSky Network API (anonymous access).
+
+    With ``stream_parse`` enabled, state vectors are decoded while the body is
+    still arriving and handed on in batches, so the full response is never
+    materialized. Decoding runs in a worker thread so the event loop is not
+    stalled by large responses.
+    """
+
+    def __init__(self, client: httpx.AsyncClient, batch_size: int, stream_parse: bool = True):
+        self._client = client
+        self._batch_size = batch_size
+        self._stream_parse = stream_parse
+
+    async def states(self, region: Region) -> AsyncIterator[list]:
+        batch_size = self._batch_size
+        fetch_seconds = 0.0
+        start = time.monotonic()
+
+        async with self._client.stream(
+            "GET", OPENSKY_URL, params=region.params, timeout=30.0
+        ) as response:
+            self._read_rate_limit(response.headers)
+            response.raise_for_status()
+
+            if not self._stream_parse:
+                data = await run_stage("decode", loads, await response.aread())
+                if "states" not in data:
+                    raise ValueError("OpenSky response has no states field")
+                states = data["states"] or []
+                OPENSKY_FETCH_DURATION.observe(time.monotonic() - start)
+                for i in range(0, len(states), batch_size):
+                    yield states[i:i + batch_size]
+                return
+
+            parser = StateStreamParser()
+            batch = []
+            async for chunk in response.aiter_bytes(DECODE_CHUNK_BYTES):
+                batch.extend(await run_stage("decode", parser.feed, chunk))
+                if len(batch) >= batch_size:
+                    # Time spent downstream while suspended is not fetch time
+                    fetch_seconds += time.monotonic() - start
+                    full = len(batch) - len(batch) % batch_size
+                    for i in range(0, full, batch_size):
+                        yield batch[i:i + batch_size]
+                    batch = batch[full:]
+                    start = time.monotonic()
+            parser.close()
+            fetch_seconds += time.monotonic() - start
+            OPENSKY_FETCH_DURATION.observe(fetch_seconds)
+            if batch:
+                yield batch
+
+    def _read_rate_limit(self, headers: httpx.Headers):
+        remaining = headers.get("X-Rate-Limit-Remaining")
+        if remaining is not None and remaining.isdigit():
+            self.credits_remaining = int(remaining)
+        retry_after = headers.get("X-Rate-Limit-Retry-After-Seconds")
+        try:
+            self.retry_after = float(retry_after) if retry_after is not None else None
+        except ValueError:
+            self.retry_after = None
+
+
+class RecordingSource(PositionSource):
+    """Pass another source through while recording every response.
+
+    Each complete response becomes one line of gzip-compressed NDJSON,
+    ``{"time": ..., "region": ..., "states": [...]}``, in a file named after
+    the time recording started. A response that fails part way is not
+    recorded.
+    """
+
+    def __init__(self, inner: PositionSource, directory: str):
+        self._inner = inner
+        path = Path(directory)
+        path.mkdir(parents=True, exist_ok=True)
+        self.path = path / time.strftime("opensky-%Y%m%dT%H%M%S.ndjson.gz")
+        self._file = gzip.open(self.path, "at", encoding="utf-8")
+        # Regions are fetched concurrently and written from worker threads
+        self._lock = threading.Lock()
+        logger.info(f"Recording OpenSky responses to {self.path}")
+
+    @property
+    def credits_remaining(self) -> int | None:
+        return self._inner.credits_remaining
+
+    @property
+    def retry_after(self) -> float | None:
+        return self._inner.retry_after
+
+    async def states(self, region: Region) -> AsyncIterator[list]:
+        received = time.time()
+        recorded = []
+        async for batch in self._inner.states(region):
+            recorded.extend(batch)
+            yield batch
+        await asyncio.to_thread(self._write, {"time": received, "region": region.name, "states": recorded})
+
+    def _write(self, response: dict):
+        line = dumps(response) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+
+    async def close(self):
+        await self._inner.close()
+        with self._lock:
+            self._file.close()
+
+
+class ReplaySource(PositionSource):
+    """Play back a recording made by ``RecordingSource``.
+
+    Responses are released no earlier than their recorded offset from the
+    first response divided by ``speed``, so a recording plays back at its
+    original pace at 1.0 and faster above it; poll intervals should be
+    short enough not to hold playback back. The recording restarts from the
+    beginning once exhausted.
+    """
+
+    def __init__(self, path: str, batch_size: int, speed: float = 1.0):
+        self._path = Path(path)
+        self._batch_size = batch_size
+        self._speed = speed
+        self._lines = None
+        self._pending: dict[str, list[dict]] = {}
+        self._origin: float | None = None
+        self._started = 0.0
+        # Regions are fetched concurrently but share one reader
+        self._lock = asyncio.Lock()
+
+    async def states(self, region: Region) -> AsyncIterator[list]:
+        response = await self._next_response(region.name)
+        if response is None:
+            logger.warning(f"Recording {self._path} has no responses for region {region.name}")
+            return
+
+        due = self._started + (response["time"] - self._origin) / self._speed
+        delay = due - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        states = response["states"] or []
+        for i in range(0, len(states), self._batch_size):
+            yield states[i:i + self._batch_size]
+
+    async def _next_response(self, region: str) -> dict | None:
+        """Next recorded response for a region, reading ahead past other regions."""
+        async with self._lock:
+            restarted = False
+            while not self._pending.get(region):
+                line = await asyncio.to_thread(self._readline)
+                if line is None:
+                    if restarted:
+                        return None
+                    logger.info(f"Reached the end of {self._path}, replaying from the start")
+                    restarted = True
+                    self._lines.close()
+                    self._lines = None
+                    self._pending.clear()
+                    self._origin = None
+                    continue
+                response = await run_stage("decode", loads, line)
+                if self._origin is None:
+                    self._origin = response["time"]
+                    self._started = time.monotonic()
+                self._pending.setdefault(response["region"], []).append(response)
+            return self._pending[region].pop(0)
+
+    def _readline(self) -> str | None:
+        if self._lines is None:
+            self._lines = gzip.open(self._path, "rt", encoding="utf-8")
+        return self._lines.readline() or None
+
+    async def close(self):
+        async with self._lock:
+            if self._lines is not None:
+                self._lines.close()
+                self._lines = None
+
+
+class SyntheticSource(PositionSource):
+    """Generate ``count`` aircraft cruising along slowly turning headings.
+
+    Aircraft move by the wall-clock time between polls, so consecutive
+    cycles show realistic position changes. ``seed`` makes the fleet
+    reproducible.
+    """
+
+    def __init__(self, count: int, batch_size: int, seed: int = 0):
+        self._batch_size = batch_size
+        self._rng = random.Random(seed)
+        self._updated = time.time()
+        self._fleet = [self._spawn(i) for i in range(count)]
+        # Regions are generated concurrently in worker threads
+        self._lock = threading.Lock()
+
+    def _spawn(self, index: int) -> dict:
+        rng = self._rng
+        on_ground = rng.random() < 0.05
+        return {
+            "icao24": f"{0x100000 + index:06x}",
+            "callsign": f"SYN{index % 10000:04d}",
+            "latitude": math.degrees(math.asin(rng.uniform(-0.95, 0.95))),
+            "longitude": rng.uniform(-180.0, 180.0),
+            "altitude": 0.0 if on_ground else rng.uniform(3000.0, 12500.0),
+            "velocity": rng.uniform(0.0, 15.0) if on_ground else rng.uniform(180.0, 260.0),
+            "heading": rng.uniform(0.0, 360.0),
+            "on_ground": on_ground,
+        }
+
+    def _advance(self, seconds: float):
+        rng = self._rng
+        for aircraft in self._fleet:
+            aircraft["heading"] = (aircraft["heading"] + rng.gauss(0.0, 0.05) * seconds) % 360.0
+            heading = math.radians(aircraft["heading"])
+            distance = aircraft["velocity"] * seconds / METERS_PER_DEGREE
+            latitude = aircraft["latitude"] + distance * math.cos(heading)
+            if abs(latitude) > 80.0:
+                # Turn back before the poles rather than wrapping over them
+                aircraft["heading"] = (180.0 - aircraft["heading"]) % 360.0
+                latitude = math.copysign(80.0, latitude)
+            aircraft["latitude"] = latitude
+            cos_lat = max(math.cos(math.radians(latitude)), 0.01)
+            longitude = aircraft["longitude"] + distance * math.sin(heading) / cos_lat
+            aircraft["longitude"] = (longitude + 180.0) % 360.0 - 180.0
+
+    def _state(self, aircraft: dict, now: int) -> list:
+        return [
+            aircraft["icao24"],
+            f"{aircraft['callsign']:<8}",
+            "Synthetic",
+            now,
+            now,
+            round(aircraft["longitude"], 4),
+            round(aircraft["latitude"], 4),
+            round(aircraft["altitude"], 1),
+            aircraft["on_ground"],
+            round(aircraft["velocity"], 1),
+            round(aircraft["heading"], 1),
+            0.0,
+            None,
+            round(aircraft["altitude"] + 150.0, 1),
+            None,
+            False,
+            0,
+        ]
+
+    def _snapshot(self, region: Region) -> list:
+        with self._lock:
+            now = time.time()
+            if now > self._updated:
+                self._advance(now - self._updated)
+                self._updated = now
+            return [
+                self._state(aircraft, int(now))
+                for aircraft in self._fleet
+                if region.contains(aircraft["latitude"], aircraft["longitude"])
+            ]
+
+    async def states(self, region: Region) -> AsyncIterator[list]:
+        states = await run_stage("generate", self._snapshot, region)
+        for i in range(0, len(states), self._batch_size):
+            yield states[i:i + self._batch_size]
+
+
+def create_source(settings: Settings, client: httpx.AsyncClient) -> PositionSource:
+    """Build the configured position source, wrapped in a recorder if enabled."""
+    if settings.source == "opensky":
+        source = OpenSkySource(client, settings.stream_batch_size, settings.stream_parse)
+    elif settings.source == "replay":
+        source = ReplaySource(settings.replay_path, settings.stream_batch_size, settings.replay_speed)
+    elif settings.source == "synthetic":
+        source = SyntheticSource(
+            settings.synthetic_aircraft, settings.stream_batch_size, settings.synthetic_seed
+        )
+    else:
+        raise ValueError(f"Unknown position source: {settings.source}")
+
+    if settings.record_dir:
+        source = RecordingSource(source, settings.record_dir)
+    return source
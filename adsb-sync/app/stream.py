@@ -0,0 +1,94 @@
+import codecs
+import json
+
+_decoder = json.JSONDecoder()
+_SKIP = " \t\r\n,"
+
+
+class StateStreamParser:
+    """Incrementally decode the ``states`` array of an OpenSky response.
+
+    Body chunks are fed in as they arrive and every state vector is decoded
+    as soon as its closing bracket has been received, so the raw payload and
+    the decoded document are never held in memory at the same time.
+    """
+
+    def __init__(self):
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._in_states = False
+        self.found = False
+        self.done = False
+
+    def feed(self, chunk: bytes) -> list[list]:
+        """Consume a body chunk and return the state vectors it completed."""
+        if self.done:
+            return []
+        self._buffer += self._text.decode(chunk)
+        states = []
+        pos = 0 if self._in_states else self._find_states()
+
+        if self._in_states:
+            buffer = self._buffer
+            length = len(buffer)
+            while True:
+                while pos < length and buffer[pos] in _SKIP:
+                    pos += 1
+                if pos >= length:
+                    break
+                if buffer[pos] == "]":
+                    self.done = True
+                    pos += 1
+                    break
+                try:
+                    state, end = _decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    # Incomplete state vector, wait for the next chunk
+                    break
+                states.append(state)
+                pos = end
+
+        self._buffer = "" if self.done else self._buffer[pos:]
+        return states
+
+    def close(self):
+        """Verify the whole states array was received."""
+        if not self.found:
+            raise ValueError("OpenSky response has no states field")
+        if not self.done:
+            raise ValueError("OpenSky response ended inside the states array")
+
+    def _find_states(self) -> int:
+        """Locate the opening of the states array and return the offset after it."""
+        buffer = self._buffer
+        length = len(buffer)
+        search = 0
+        while True:
+            key = buffer.find('"states"', search)
+            if key < 0:
+                # Keep a short tail in case the key is split across chunks
+                return max(0, length - len('"states"'))
+            pos = key + len('"states"')
+            while pos < length and buffer[pos] in " \t\r\n":
+                pos += 1
+            if pos >= length:
+                return key
+            if buffer[pos] != ":":
+                search = pos
+                continue
+            pos += 1
+            while pos < length and buffer[pos] in " \t\r\n":
+                pos += 1
+            if pos >= length:
+                return key
+            if buffer[pos] == "[":
+                self.found = True
+                self._in_states = True
+                return pos + 1
+            if buffer.startswith("null", pos):
+                self.found = True
+                self.done = True
+                return length
+            if "null".startswith(buffer[pos:]):
+                return key
+            raise ValueError(f"Unexpected OpenSky states value: {buffer[pos:pos + 16]!r}")
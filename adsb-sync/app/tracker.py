@@ -0,0 +1,126 @@
+CHANGED = "changed"
+SKIP = "skipped"
+
+
+def fingerprint(state: list) -> tuple[int, int]:
+    """Compact fingerprints of the state-vector fields written to Redis and of the position alone."""
+    # Index 12 (sensors) is a list and never stored, so it is left out
+    return hash((*state[1:12], state[13], state[14])), hash((state[5], state[6], state[7]))
+
+
+class ChangeTracker:
+    """Remember the state held for each aircraft in the current generation.
+
+    Writes made during a cycle are staged and only become the baseline for
+    change detection once the cycle's generation is committed, so an aborted
+    cycle cannot make the tracker disagree with what readers see.
+
+    Each aircraft is attributed to the region that last reported it, so a
+    cycle polling only some regions removes only the aircraft those regions
+    no longer report.
+
+    ``synced`` is False until a generation has been committed with this
+    tracker and again after ``reset``: the tracker then does not know what
+    the current generation holds, so the next one must be a full snapshot
+    rather than a copy it cannot prune.
+
+    With ``keep_values``, the encoded position written for each aircraft is
+    kept as well, so ``values`` is the content of the current generation.
+    """
+
+    def __init__(self, keep_values: bool = False):
+        self.synced = False
+        self._keep_values = keep_values
+        self._values: dict[str, bytes | str] = {}
+        self._pending_values: dict[str, bytes | str] = {}
+        self._committed: dict[str, tuple[int, int]] = {}
+        self._regions: dict[str, str] = {}
+        self._pending: dict[str, tuple[int, int]] = {}
+        self._seen: dict[str, str] = {}
+        self._polled: set[str] = set()
+
+    def __len__(self) -> int:
+        return len(self._committed)
+
+    def begin_cycle(self, carried: bool, regions: list[str]):
+        """Start a cycle polling ``regions``; without a carried-forward generation everything is new."""
+        if not carried:
+            self._committed.clear()
+            self._regions.clear()
+            self._values.clear()
+        self._pending = {}
+        self._pending_values = {}
+        self._seen = {}
+        self._polled = set(regions)
+
+    def values(self) -> dict[str, bytes | str]:
+        """Encoded position of every aircraft in the current generation (with ``keep_values``)."""
+        return self._values
+
+    def known(self, icao24: str) -> bool:
+        """Whether the aircraft is already held in the current generation."""
+        return icao24 in self._committed
+
+    def classify(self, icao24: str, fp: tuple[int, int], region: str) -> str:
+        """Decide whether an aircraft reported by ``region`` needs to be written."""
+        self._seen[icao24] = region
+        if self._committed.get(icao24) == fp:
+            return SKIP
+        return CHANGED
+
+    def mark_written(self, icao24: str, fp: tuple[int, int], value: bytes | str | None = None):
+        """Stage a write made to the generation being built."""
+        self._pending[icao24] = fp
+        if self._keep_values:
+            self._pending_values[icao24] = value
+
+    def forget(self, icao24: str):
+        """Drop a staged write that failed; the aircraft stays changed next cycle."""
+        self._pending.pop(icao24, None)
+        self._pending_values.pop(icao24, None)
+
+    def removed(self) -> list[str]:
+        """Aircraft held in the generation that their polled region no longer reports."""
+        return [
+            icao24 for icao24 in self._committed.keys() - self._seen.keys()
+            if self._regions.get(icao24) in self._polled
+        ]
+
+    def commit(self) -> tuple[list[str], list[str], list[str]]:
+        """Adopt the cycle's writes and removals as the new baseline.
+
+        Returns the aircraft that appeared, moved and disappeared this cycle.
+        """
+        disappeared = self.removed()
+        appeared = []
+        moved = []
+        for icao24, (_, position) in self._pending.items():
+            held = self._committed.get(icao24)
+            if held is None:
+                appeared.append(icao24)
+            elif held[1] != position:
+                moved.append(icao24)
+
+        for icao24 in disappeared:
+            del self._committed[icao24]
+            self._values.pop(icao24, None)
+        self._committed.update(self._pending)
+        self._values.update(self._pending_values)
+        self._pending = {}
+        self._pending_values = {}
+        self.synced = True
+        # Rebuilt rather than updated so aircraft whose write failed do not linger
+        self._regions = {
+            icao24: self._seen.get(icao24) or self._regions[icao24] for icao24 in self._committed
+        }
+        return appeared, moved, disappeared
+
+    def reset(self):
+        """Forget everything, e.g. after a failed cycle left Redis in an unknown state."""
+        self.synced = False
+        self._committed.clear()
+        self._regions.clear()
+        self._values.clear()
+        self._pending = {}
+        self._pending_values = {}
+        self._seen = {}
@@ -0,0 +1,50 @@
+import asyncio
+import json
+import time
+from collections.abc import Callable
+from app.metrics import STAGE_DURATION
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is an optional speed-up
+    orjson = None
+
+
+def loads(data: bytes | str):
+    """Decode JSON, with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj) -> str:
+    """Encode JSON, with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj).decode("utf-8")
+    return json.dumps(obj)
+
+
+def _timed(stage: str, fn: Callable, *args):
+    start = time.perf_counter()
+    try:
+        return fn(*args)
+    finally:
+        STAGE_DURATION.labels(stage=stage).observe(time.perf_counter() - start)
+
+
+async def run_stage(stage: str, fn: Callable, *args):
+    """Run a CPU-bound cycle stage in a worker thread and record its duration.
+
+    The event loop keeps serving I/O while the stage runs; only the result
+    comes back to it.
+    """
+    return await asyncio.to_thread(_timed, stage, fn, *args)
+
+
+async def timed_stage(stage: str, awaitable):
+    """Await an I/O-bound cycle stage and record its duration."""
+    start = time.perf_counter()
+    try:
+        return await awaitable
+    finally:
+        STAGE_DURATION.labels(stage=stage).observe(time.perf_counter() - start)
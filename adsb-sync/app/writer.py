@@ -0,0 +1,59 @@
+import asyncio
+import logging
+import time
+import redis.asyncio as redis
+from app.metrics import REDIS_BATCH_DURATION, REDIS_BATCH_RETRIES, REDIS_BATCH_FAILURES
+
+logger = logging.getLogger(__name__)
+
+
+class BatchWriter:
+    """Write Redis commands in bounded, concurrent, individually retried batches.
+
+    Commands are ``(method, *args)`` tuples applied to a non-transactional
+    pipeline, so no single request is large enough to stall Valkey for other
+    clients and a failed batch does not discard the ones around it.
+
+    A batch that fails to reach Valkey is sent again in full, so commands
+    must be idempotent; a command Valkey rejects is not retried, and its
+    error is returned as its result.
+    """
+
+    def __init__(self, r: redis.Redis, batch_size: int, concurrency: int, max_retries: int):
+        self._r = r
+        self._batch_size = batch_size
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._max_retries = max_retries
+
+    async def write(self, commands: list[tuple]) -> list:
+        """Execute commands and return their results in order.
+
+        The result of a command Valkey rejected is the error it replied with,
+        and that of every command in a batch that still failed after all
+        retries is the exception that failed it.
+        """
+        batches = [
+            commands[i:i + self._batch_size]
+            for i in range(0, len(commands), self._batch_size)
+        ]
+        results = await asyncio.gather(*(self._write_batch(batch) for batch in batches))
+        return [result for batch_results in results for result in batch_results]
+
+    async def _write_batch(self, batch: list[tuple]) -> list:
+        async with self._semaphore:
+            for attempt in range(self._max_retries + 1):
+                start = time.monotonic()
+                try:
+                    pipe = self._r.pipeline(transaction=False)
+                    for method, *args in batch:
+                        getattr(pipe, method)(*args)
+                    results = await pipe.execute(raise_on_error=False)
+                    REDIS_BATCH_DURATION.observe(time.monotonic() - start)
+                    return results
+                except redis.RedisError as e:
+                    if attempt == self._max_retries:
+                        logger.error(f"Redis batch of {len(batch)} commands failed: {e}")
+                        REDIS_BATCH_FAILURES.inc()
+                        return [e] * len(batch)
+                    REDIS_BATCH_RETRIES.inc()
+                    await asyncio.sleep(0.1 * 2 ** attempt)
@@ -0,0 +1,36 @@
+"""Shared test fixtures for ADSB-Sync tests."""
+import fakeredis
+import pytest
+
+# OpenSky /states/all field order
+STATE_FIELDS = (
+    "icao24", "callsign", "origin_country", "time_position", "last_contact",
+    "longitude", "latitude", "baro_altitude", "on_ground", "velocity",
+    "true_track", "vertical_rate", "sensors", "geo_altitude", "squawk",
+    "spi", "position_source",
+)
+
+
+@pytest.fixture
+def make_state():
+    """Build an OpenSky state vector, overriding fields by name."""
+
+    def make(icao24: str = "abc123", **fields) -> list:
+        state = [
+            icao24, "TEST123 ", "United States", 1700000000, 1700000001,
+            -122.4194, 37.7749, 10000.0, False, 250.5,
+            90.0, 0.0, None, 10100.0, "1234", False, 0,
+        ]
+        for name, value in fields.items():
+            state[STATE_FIELDS.index(name)] = value
+        return state
+
+    return make
+
+
+@pytest.fixture
+async def redis_client():
+    """In-memory Valkey stand-in, configured like ADSB-Sync's own client."""
+    client = fakeredis.FakeAsyncRedis(server=fakeredis.FakeServer(), decode_responses=True)
+    yield client
+    await client.aclose()
@@ -0,0 +1,43 @@
+"""Tests for the position codec as adsb-sync writes it."""
+from pathlib import Path
+
+import pytest
+
+from app import codec
+from app.codec import decode_position, decode_track_point, encode_position, encode_track_point
+from app.main import state_to_record
+
+
+class TestPositionCodec:
+    """Tests for encoding the records adsb-sync builds from state vectors."""
+
+    def test_record_round_trip(self, make_state):
+        """Test a record built from a state vector decodes unchanged."""
+        record = state_to_record("abc123", make_state())
+
+        assert decode_position(encode_position(record)) == record
+
+    def test_sparse_record_round_trip(self, make_state):
+        """Test missing fields decode as None rather than zero."""
+        state = make_state(
+            callsign=None, time_position=None, longitude=None, latitude=None,
+            baro_altitude=None, velocity=None, true_track=None, vertical_rate=None,
+            geo_altitude=None, squawk=None,
+        )
+        record = state_to_record("abc123", state)
+
+        assert decode_position(encode_position(record)) == record
+
+    def test_track_point(self, make_state):
+        """Test a track point keeps the position time and coordinates."""
+        point = decode_track_point(encode_track_point(state_to_record("abc123", make_state())))
+
+        assert (point["time"], point["longitude"], point["latitude"]) == (1700000000, -122.4194, 37.7749)
+
+    def test_matches_api_server_copy(self):
+        """Test that the reader's copy of the codec is identical to the writer's."""
+        reader_copy = Path(__file__).parents[2] / "api-server" / "app" / "codec.py"
+        if not reader_copy.exists():
+            pytest.skip("api-server sources not available")
+
+        assert reader_copy.read_text() == Path(codec.__file__).read_text()
@@ -0,0 +1,157 @@
+"""Tests for the connectivity probes and the metrics/connectivity server."""
+import asyncio
+import json
+
+import pytest
+
+from app import connectivity
+from app.connectivity import ConnectivityMonitor, check_tcp_connection, start_custom_server
+
+
+async def request(port: int, raw: bytes) -> tuple[str, bytes]:
+    """Send a raw request and return the status line and body."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(raw)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b"\r\n\r\n")
+    return head.split(b"\r\n")[0].decode(), body
+
+
+@pytest.fixture
+async def listener():
+    """A local TCP server that accepts and closes connections."""
+
+    async def accept(reader, writer):
+        writer.close()
+
+    server = await asyncio.start_server(accept, "127.0.0.1", 0)
+    yield server.sockets[0].getsockname()[1]
+    server.close()
+    await server.wait_closed()
+
+
+@pytest.fixture
+def probes(monkeypatch):
+    """Record probed destinations instead of connecting to them."""
+    probed = []
+
+    async def probe(host, port, timeout=2.0):
+        probed.append((host, port))
+        return {"connected": host != "opensky-network.org", "latency_ms": 1.0, "error": None}
+
+    monkeypatch.setattr(connectivity, "check_tcp_connection", probe)
+    return probed
+
+
+@pytest.fixture
+async def server(probes):
+    monitor = ConnectivityMonitor(interval=60)
+    await monitor.refresh()
+    server = await start_custom_server(0, monitor)
+    yield server.sockets[0].getsockname()[1]
+    server.close()
+    await server.wait_closed()
+
+
+class TestCheckTcpConnection:
+    """Tests for check_tcp_connection()."""
+
+    async def test_connected(self, listener):
+        """Test a listening port is reported connected with its latency."""
+        result = await check_tcp_connection("127.0.0.1", listener)
+
+        assert result["connected"] and result["error"] is None
+        assert result["latency_ms"] >= 0
+
+    async def test_refused(self):
+        """Test a port nothing listens on is reported as refused."""
+        # Reuse the port of a listener that has gone away
+        server = await asyncio.start_server(lambda r, w: None, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        server.close()
+        await server.wait_closed()
+
+        result = await check_tcp_connection("127.0.0.1", port)
+
+        assert not result["connected"]
+        assert result["error"].startswith("Connection refused")
+
+    async def test_timeout(self, monkeypatch):
+        """Test a connection that does not complete in time is reported as timed out."""
+
+        async def hang(host, port):
+            await asyncio.sleep(10)
+
+        monkeypatch.setattr(asyncio, "open_connection", hang)
+
+        result = await check_tcp_connection("example.invalid", 443, timeout=0.01)
+
+        assert result == {"connected": False, "latency_ms": result["latency_ms"], "error": "Connection timed out"}
+
+
+class TestConnectivityMonitor:
+    """Tests for the cached probe results."""
+
+    async def test_empty_before_first_probe(self):
+        """Test nothing is reported before the probes have run."""
+        assert ConnectivityMonitor(interval=60).get_connectivity() == []
+
+    async def test_refresh(self, probes):
+        """Test both destinations are probed and reported with the age of the result."""
+        monitor = ConnectivityMonitor(interval=60)
+
+        await monitor.refresh()
+
+        connections = {c["id"]: c for c in monitor.get_connectivity()}
+        assert connections["adsb-to-valkey"]["status"] == "connected"
+        assert connections["adsb-to-opensky"]["status"] == "blocked"
+        assert all(c["age_seconds"] >= 0 for c in connections.values())
+        assert ("opensky-network.org", 443) in probes
+
+    async def test_run_waits_after_initial_refresh(self, probes):
+        """Test run does not probe again straight after an initial refresh."""
+        monitor = ConnectivityMonitor(interval=0.05)
+        await monitor.refresh()
+        probes.clear()
+
+        task = asyncio.create_task(monitor.run())
+        await asyncio.sleep(0.01)
+        assert probes == []
+        await asyncio.sleep(0.08)
+        task.cancel()
+
+        assert len(probes) == 2
+
+
+class TestCustomServer:
+    """Tests for the metrics and connectivity HTTP server."""
+
+    async def test_connectivity(self, server):
+        """Test the cached probe results are served as JSON."""
+        status, body = await request(server, b"GET /connectivity HTTP/1.1\r\nHost: x\r\n\r\n")
+
+        assert status == "HTTP/1.1 200 OK"
+        assert [c["id"] for c in json.loads(body)] == ["adsb-to-valkey", "adsb-to-opensky"]
+
+    async def test_metrics(self, server):
+        """Test Prometheus metrics are served, ignoring any query string."""
+        status, body = await request(server, b"GET /metrics?x=1 HTTP/1.1\r\n\r\n")
+
+        assert status == "HTTP/1.1 200 OK"
+        assert b"# TYPE " in body
+
+    @pytest.mark.parametrize(
+        "raw, expected",
+        [
+            (b"GET /missing HTTP/1.1\r\n\r\n", "HTTP/1.1 404 Not Found"),
+            (b"POST /metrics HTTP/1.1\r\n\r\n", "HTTP/1.1 405 Method Not Allowed"),
+            (b"GET /" + b"a" * 70000 + b" HTTP/1.1\r\n\r\n", "HTTP/1.1 400 Bad Request"),
+        ],
+    )
+    async def test_errors(self, server, raw, expected):
+        """Test unknown paths, other methods and oversized request lines are answered."""
+        status, _ = await request(server, raw)
+
+        assert status == expected
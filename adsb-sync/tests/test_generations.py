@@ -0,0 +1,130 @@
+"""Tests for GenerationStore against an in-memory Valkey."""
+import pytest
+
+from app.codec import CURRENT_GENERATION_KEY, GENERATION_SEQUENCE_KEY, geo_key, live_key, positions_key
+from app.generations import GenerationStore
+
+
+async def write(r, generation: int, icao24: str):
+    """Write one aircraft to a generation the way a sync cycle does."""
+    await r.hset(positions_key(generation), icao24, "position")
+    await r.sadd(live_key(generation), icao24)
+    await r.geoadd(geo_key(generation), (-122.4194, 37.7749, icao24))
+
+
+@pytest.fixture
+def store(redis_client):
+    return GenerationStore(redis_client, ttl=300, grace=30)
+
+
+class TestGenerationStore:
+    """Tests for allocating, carrying, publishing and discarding generations."""
+
+    async def test_first_generation_not_carried(self, store, redis_client):
+        """Test the first generation starts empty and is published on commit."""
+        generation, carried = await store.begin()
+
+        assert (generation, carried) == (1, False)
+        assert not await store.published()
+
+        await write(redis_client, generation, "abc123")
+        await store.commit(generation)
+
+        assert await store.published()
+        assert await redis_client.get(CURRENT_GENERATION_KEY) == "1"
+        assert 0 < await redis_client.ttl(positions_key(1)) <= 300
+
+    async def test_carry_copies_previous(self, store, redis_client):
+        """Test a new generation starts as a copy and the old one lingers for the grace period."""
+        first, _ = await store.begin()
+        await write(redis_client, first, "abc123")
+        await store.commit(first)
+
+        second, carried = await store.begin()
+
+        assert (second, carried) == (2, True)
+        for key in (positions_key, live_key, geo_key):
+            assert await redis_client.exists(key(second))
+            assert 0 < await redis_client.ttl(key(second)) <= 300
+        # Readers stay on the first generation until commit
+        assert await redis_client.get(CURRENT_GENERATION_KEY) == "1"
+
+        await store.commit(second)
+
+        assert await redis_client.get(CURRENT_GENERATION_KEY) == "2"
+        assert 0 < await redis_client.ttl(positions_key(first)) <= 30
+
+    async def test_no_carry(self, store, redis_client):
+        """Test carry=False builds a generation from scratch."""
+        first, _ = await store.begin()
+        await write(redis_client, first, "abc123")
+        await store.commit(first)
+
+        second, carried = await store.begin(carry=False)
+
+        assert not carried
+        assert not await redis_client.exists(positions_key(second))
+
+    async def test_partial_copy_discarded(self, store, redis_client):
+        """Test a previous generation missing a key is not carried at all."""
+        first, _ = await store.begin()
+        await write(redis_client, first, "abc123")
+        await store.commit(first)
+        await redis_client.delete(geo_key(first))
+
+        second, carried = await store.begin()
+
+        assert not carried
+        assert not await redis_client.exists(positions_key(second), live_key(second))
+
+    async def test_abort(self, store, redis_client):
+        """Test an aborted generation is deleted and never published."""
+        generation, _ = await store.begin()
+        await write(redis_client, generation, "abc123")
+
+        await store.abort(generation)
+
+        assert not await redis_client.exists(positions_key(generation), live_key(generation), geo_key(generation))
+        assert not await store.published()
+
+    async def test_expire_new(self, store, redis_client):
+        """Test keys written from scratch get a TTL, and a shorter one already set is kept."""
+        generation, _ = await store.begin()
+        await write(redis_client, generation, "abc123")
+        await redis_client.expire(geo_key(generation), 10)
+
+        await store.expire_new(generation)
+
+        assert 0 < await redis_client.ttl(positions_key(generation)) <= 300
+        assert 0 < await redis_client.ttl(live_key(generation)) <= 300
+        assert await redis_client.ttl(geo_key(generation)) <= 10
+
+    async def test_commit_ttl(self, store, redis_client):
+        """Test commit can publish a generation with a shorter TTL."""
+        generation, _ = await store.begin()
+        await write(redis_client, generation, "abc123")
+
+        await store.commit(generation, ttl=60)
+
+        assert 0 < await redis_client.ttl(positions_key(generation)) <= 60
+        assert 0 < await redis_client.ttl(CURRENT_GENERATION_KEY) <= 60
+
+    async def test_sequence_not_reused_after_data_loss(self, store, redis_client):
+        """Test generation numbers keep rising after Valkey loses the sequence."""
+        for _ in range(3):
+            generation, _ = await store.begin()
+            await store.commit(generation)
+
+        await redis_client.flushall()
+        generation, carried = await store.begin()
+
+        assert (generation, carried) == (4, False)
+        assert await redis_client.get(GENERATION_SEQUENCE_KEY) == "4"
+
+    async def test_advance_past_restored_generation(self, store, redis_client):
+        """Test a generation restored from a snapshot is never handed out again."""
+        store.advance_past(41)
+
+        generation, _ = await store.begin()
+
+        assert generation == 42
@@ -0,0 +1,117 @@
+"""Tests for LeaderLease against an in-memory Valkey."""
+import asyncio
+
+import pytest
+
+from app.leader import LEADER_KEY, LeaderLease
+from app.metrics import LEADER_HANDOFF
+
+
+def handoffs() -> tuple[float, float]:
+    """Number and total of observed handoff times so far."""
+    samples = {s.name: s.value for s in LEADER_HANDOFF.collect()[0].samples}
+    return samples["adsb_sync_leader_handoff_seconds_count"], samples["adsb_sync_leader_handoff_seconds_sum"]
+
+
+@pytest.fixture
+def leases(redis_client):
+    return LeaderLease(redis_client, ttl=0.3), LeaderLease(redis_client, ttl=0.3)
+
+
+class TestLeaderLease:
+    """Tests for acquiring, renewing, losing and handing over the lease."""
+
+    async def test_acquire(self, leases, redis_client):
+        """Test the first replica takes the lease and the second stands by."""
+        first, second = leases
+
+        assert await first._try_acquire()
+        assert not await second._try_acquire()
+
+        assert first.held and not second.held
+        assert await redis_client.get(LEADER_KEY) == first.id
+        assert 0 < await redis_client.pttl(LEADER_KEY) <= 300
+
+    async def test_renew(self, leases, redis_client):
+        """Test the leader keeps the lease by renewing it before it expires."""
+        first, second = leases
+        await first._try_acquire()
+
+        for _ in range(3):
+            await asyncio.sleep(0.15)
+            assert await first._try_acquire()
+            assert not await second._try_acquire()
+
+        assert first.held
+        assert await redis_client.get(LEADER_KEY) == first.id
+
+    async def test_lost(self, leases, redis_client):
+        """Test a leader whose lease was taken over stops trusting it."""
+        first, second = leases
+        await first._try_acquire()
+        await redis_client.delete(LEADER_KEY)
+        await second._try_acquire()
+
+        assert not await first._try_acquire()
+        assert not first.held
+        assert await redis_client.get(LEADER_KEY) == second.id
+
+    async def test_held_lapses_without_renewal(self, leases):
+        """Test a leader cut off from Valkey stops trusting the lease once its TTL runs out."""
+        first, _ = leases
+        await first._try_acquire()
+
+        await asyncio.sleep(0.35)
+
+        assert not first.held
+
+    async def test_handoff_after_expiry(self, leases):
+        """Test the handoff time is measured from when the old lease expired."""
+        first, second = leases
+        await first._try_acquire()
+        await second._try_acquire()
+        count, total = handoffs()
+
+        # The leader dies; the standby next tries a little after the lease expired
+        await asyncio.sleep(0.4)
+        assert await second._try_acquire()
+
+        new_count, new_total = handoffs()
+        assert new_count == count + 1
+        assert 0.05 <= new_total - total <= 0.2
+
+    async def test_handoff_after_release(self, leases):
+        """Test a released lease is taken over by the next try, at most one try after it was seen held."""
+        first, second = leases
+        await first._try_acquire()
+        await second._try_acquire()
+        _, total = handoffs()
+
+        await asyncio.sleep(0.05)
+        await first.release()
+        assert not first.held
+        assert await second._try_acquire()
+
+        _, new_total = handoffs()
+        assert 0.05 <= new_total - total < 0.3
+
+    async def test_release_keeps_other_lease(self, leases, redis_client):
+        """Test releasing a lease that was already taken over leaves the new leader's alone."""
+        first, second = leases
+        await first._try_acquire()
+        await redis_client.delete(LEADER_KEY)
+        await second._try_acquire()
+
+        await first.release()
+
+        assert await redis_client.get(LEADER_KEY) == second.id
+
+    async def test_run_and_wait_held(self, leases):
+        """Test a contending replica is woken once it becomes the leader."""
+        first, _ = leases
+        task = asyncio.create_task(first.run())
+        try:
+            await asyncio.wait_for(first.wait_held(), timeout=1.0)
+            assert first.held
+        finally:
+            task.cancel()
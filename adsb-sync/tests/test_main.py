@@ -0,0 +1,433 @@
+"""Tests for the sync cycle in app.main."""
+import asyncio
+
+import httpx
+import pytest
+
+import redis.asyncio as redis
+from prometheus_client import REGISTRY
+
+from app.codec import CHANGES_KEY, CURRENT_GENERATION_KEY, decode_changes, geo_key, live_key, positions_key
+from app.config import Region
+from app.generations import GenerationStore
+from app import main
+from app.main import (
+    NOT_DUE,
+    fetch_regions,
+    poll,
+    publish_changes,
+    restore_snapshot,
+    run_cycle,
+    settings,
+    store_states,
+)
+from app.scheduler import PollScheduler
+from app.snapshot import SnapshotStore
+from app.sources import PositionSource
+from app.tracker import CHANGED, ChangeTracker, fingerprint
+from app.writer import BatchWriter
+
+
+class StubSource(PositionSource):
+    """Serve fixed responses per region; a response that is an exception is raised instead."""
+
+    def __init__(self, responses: dict[str, list[list] | Exception]):
+        self.responses = responses
+        self.polled: list[str] = []
+        self.cancelled: list[str] = []
+
+    async def states(self, region: Region):
+        self.polled.append(region.name)
+        response = self.responses[region.name]
+        await asyncio.sleep(0)
+        if isinstance(response, Exception):
+            raise response
+        if response is None:
+            # A region still streaming when another fails
+            try:
+                await asyncio.sleep(3600)
+            except asyncio.CancelledError:
+                self.cancelled.append(region.name)
+                raise
+        for state in response or []:
+            yield [state]
+
+
+class FailingWriter(BatchWriter):
+    """Fail the commands of the given method for the given aircraft, writing the rest."""
+
+    def __init__(self, r, method: str, icao24s: set[str]):
+        super().__init__(r, batch_size=100, concurrency=1, max_retries=0)
+        self.method = method
+        self.icao24s = icao24s
+
+    def failing(self, command: tuple) -> bool:
+        return command[0] == self.method and any(a in self.icao24s for a in command[1:] if isinstance(a, str))
+
+    async def write(self, commands: list[tuple]) -> list:
+        results = iter(await super().write([c for c in commands if not self.failing(c)]))
+        return [redis.ResponseError("failed") if self.failing(c) else next(results) for c in commands]
+
+
+class Cycle:
+    """Everything a sync cycle needs, backed by an in-memory Valkey."""
+
+    def __init__(self, r, regions: list[Region]):
+        self.r = r
+        self.writer = BatchWriter(r, batch_size=100, concurrency=2, max_retries=0)
+        self.generations = GenerationStore(r, ttl=300, grace=30)
+        self.tracker = ChangeTracker()
+        self.schedule = PollScheduler(regions, 60, 10, 300, adaptive=False)
+
+    async def run(self, source: PositionSource, **kwargs) -> int | None:
+        return await run_cycle(source, self.writer, self.generations, self.tracker, self.schedule, **kwargs)
+
+
+@pytest.fixture
+def cycle(redis_client):
+    return Cycle(redis_client, [Region(name="east"), Region(name="west")])
+
+
+async def fetch_all(source: PositionSource, regions: list[Region]) -> list[tuple[str, list]]:
+    return [(name, state) async for name, states in fetch_regions(source, regions) for state in states]
+
+
+class TestFetchRegions:
+    """Tests for fetching and merging several regions."""
+
+    async def test_single_region(self, make_state):
+        """Test one region is streamed straight through."""
+        source = StubSource({"global": [make_state("abc123"), make_state("def456")]})
+
+        result = await fetch_all(source, [Region(name="global")])
+
+        assert [(name, state[0]) for name, state in result] == [("global", "abc123"), ("global", "def456")]
+
+    async def test_overlap_keeps_newest(self, make_state):
+        """Test an aircraft reported by overlapping regions is kept once, with its newest state."""
+        source = StubSource({
+            "east": [make_state("abc123", last_contact=100), make_state("def456")],
+            "west": [make_state("ABC123", last_contact=200), make_state(None)],
+        })
+
+        result = await fetch_all(source, [Region(name="east"), Region(name="west")])
+
+        assert sorted((name, state[0]) for name, state in result) == [("east", "def456"), ("west", "ABC123")]
+
+    async def test_failed_region_cancels_others(self, make_state):
+        """Test one region failing fails the fetch and cancels the regions still running."""
+        error = httpx.ConnectTimeout("timed out")
+        source = StubSource({"east": error, "west": None})
+
+        with pytest.raises(httpx.ConnectTimeout):
+            await fetch_all(source, [Region(name="east"), Region(name="west")])
+
+        assert source.cancelled == ["west"]
+
+
+class TestRunCycle:
+    """Tests for polling regions into a published generation."""
+
+    async def test_first_cycle_publishes(self, cycle, make_state):
+        """Test the first cycle writes every aircraft into a new, published generation."""
+        source = StubSource({"east": [make_state("abc123")], "west": [make_state("def456", longitude=10.0)]})
+
+        assert await cycle.run(source) == 2
+
+        assert await cycle.r.get(CURRENT_GENERATION_KEY) == "1"
+        assert sorted(await cycle.r.hkeys(positions_key(1))) == ["abc123", "def456"]
+        assert await cycle.r.smembers(live_key(1)) == {"abc123", "def456"}
+        assert sorted(await cycle.r.zrange(geo_key(1), 0, -1)) == ["abc123", "def456"]
+        assert cycle.schedule.due(0.0) == []
+
+    async def test_carried_cycle_writes_changes_only(self, cycle, make_state):
+        """Test a later cycle carries the generation forward, rewriting only what changed."""
+        source = StubSource({
+            "east": [make_state("abc123"), make_state("def456")],
+            "west": [make_state("789abc")],
+        })
+        await cycle.run(source)
+        await cycle.r.hset(positions_key(1), "abc123", "marker")
+
+        # abc123 is unchanged, def456 moved and 789abc disappeared
+        source.responses = {"east": [make_state("abc123"), make_state("def456", latitude=38.0)], "west": []}
+        cycle.schedule.polled(cycle.schedule.regions, -60.0)
+
+        assert await cycle.run(source) == 2
+
+        assert await cycle.r.get(CURRENT_GENERATION_KEY) == "2"
+        assert await cycle.r.hget(positions_key(2), "abc123") == "marker"
+        assert sorted(await cycle.r.hkeys(positions_key(2))) == ["abc123", "def456"]
+        assert await cycle.r.smembers(live_key(2)) == {"abc123", "def456"}
+        assert sorted(await cycle.r.zrange(geo_key(2), 0, -1)) == ["abc123", "def456"]
+        assert 0 < await cycle.r.ttl(positions_key(1)) <= 30
+
+    async def test_only_due_regions_polled(self, make_state, redis_client):
+        """Test a region that is not due is not polled and keeps its aircraft."""
+        fast, slow = Region(name="fast", poll_interval=10), Region(name="slow", poll_interval=600)
+        cycle = Cycle(redis_client, [fast, slow])
+        source = StubSource({"fast": [make_state("abc123")], "slow": [make_state("def456")]})
+        await cycle.run(source)
+
+        cycle.schedule.polled([fast], -10.0)
+        source.responses["fast"] = []
+        source.polled.clear()
+
+        assert await cycle.run(source) == 1
+        assert source.polled == ["fast"]
+        assert await cycle.r.smembers(live_key(2)) == {"def456"}
+
+    async def test_not_due(self, cycle, make_state):
+        """Test nothing is polled or published when no region is due."""
+        source = StubSource({"east": [make_state()], "west": []})
+        await cycle.run(source)
+
+        assert await cycle.run(source) == NOT_DUE
+        assert await cycle.r.get(CURRENT_GENERATION_KEY) == "1"
+
+    async def test_empty_response_not_published(self, cycle):
+        """Test a cycle in which every region reported nothing keeps the previous generation."""
+        source = StubSource({"east": [], "west": []})
+
+        assert await cycle.run(source) == 0
+        assert await cycle.r.get(CURRENT_GENERATION_KEY) is None
+        assert await cycle.r.keys("aircraft:positions:*") == []
+
+    async def test_lease_lost(self, cycle, make_state):
+        """Test a generation built without the leader lease is discarded."""
+
+        class Lost:
+            held = False
+
+        source = StubSource({"east": [make_state()], "west": []})
+
+        assert await cycle.run(source, lease=Lost()) is None
+        assert await cycle.r.get(CURRENT_GENERATION_KEY) is None
+        assert await cycle.r.keys("aircraft:positions:*") == []
+
+    async def test_rate_limited(self, cycle):
+        """Test a rate-limited cycle holds its regions back for as long as OpenSky asked."""
+        response = httpx.Response(429, request=httpx.Request("GET", "https://opensky-network.org"))
+        source = StubSource({"east": httpx.HTTPStatusError("429", request=response.request, response=response), "west": []})
+        source.retry_after = 120.0
+
+        assert await cycle.run(source) is None
+        assert cycle.schedule.backoff == 120.0
+
+    async def test_valkey_failure_resets_tracker(self, cycle, make_state):
+        """Test a cycle that cannot write to Valkey is discarded and the next one is written in full."""
+        source = StubSource({"east": [make_state("abc123")], "west": []})
+        await cycle.run(source)
+        cycle.writer = FailingWriter(cycle.r, "hset", {"abc123", "def456"})
+        source.responses["east"] = [make_state("abc123", latitude=38.0), make_state("def456")]
+        cycle.schedule.polled(cycle.schedule.regions, -60.0)
+
+        assert await cycle.run(source) is None
+
+        assert not cycle.tracker.synced
+        assert await cycle.r.get(CURRENT_GENERATION_KEY) == "1"
+        assert not await cycle.r.exists(positions_key(2))
+        assert cycle.schedule.backoff == 0.0
+
+    async def test_failed_region_fails_cycle(self, cycle, make_state):
+        """Test a region that fails leaves readers on no generation and backs both regions off."""
+        source = StubSource({"east": httpx.ConnectTimeout("timed out"), "west": [make_state()]})
+
+        assert await cycle.run(source) is None
+
+        assert await cycle.r.get(CURRENT_GENERATION_KEY) is None
+        assert await cycle.r.keys("aircraft:positions:*") == []
+        assert cycle.schedule.due(0.0) == []
+        assert cycle.schedule.backoff == 60
+
+
+class TestStoreStates:
+    """Tests for writing a batch of states into a generation."""
+
+    @pytest.mark.parametrize("method", ["hset", "sadd"])
+    async def test_partial_new_aircraft_removed(self, redis_client, make_state, method):
+        """Test a new aircraft with a failed write leaves none of its other writes behind."""
+        writer = FailingWriter(redis_client, method, {"def456"})
+        tracker = ChangeTracker()
+        tracker.begin_cycle(False, ["global"])
+
+        await store_states(writer, 1, [make_state("abc123"), make_state("def456")], tracker, "global")
+        tracker.commit()
+
+        assert await redis_client.hkeys(positions_key(1)) == ["abc123"]
+        assert await redis_client.smembers(live_key(1)) == {"abc123"}
+        assert await redis_client.zrange(geo_key(1), 0, -1) == ["abc123"]
+        assert not tracker.known("def456")
+
+    async def test_partial_known_aircraft_kept(self, redis_client, make_state):
+        """Test a known aircraft whose update failed keeps its entries and is rewritten next cycle."""
+        tracker = ChangeTracker()
+        tracker.begin_cycle(False, ["global"])
+        writer = BatchWriter(redis_client, batch_size=100, concurrency=1, max_retries=0)
+        await store_states(writer, 1, [make_state("abc123"), make_state("def456")], tracker, "global")
+        tracker.commit()
+
+        tracker.begin_cycle(True, ["global"])
+        writer = FailingWriter(redis_client, "hset", {"def456"})
+        moved = [make_state("abc123", latitude=38.0), make_state("def456", latitude=38.0)]
+        await store_states(writer, 1, moved, tracker, "global")
+        tracker.commit()
+
+        assert await redis_client.smembers(live_key(1)) == {"abc123", "def456"}
+        tracker.begin_cycle(True, ["global"])
+        assert tracker.classify("def456", fingerprint(moved[1]), "global") == CHANGED
+
+
+class TestPublishChanges:
+    """Tests for the per-generation change stream."""
+
+    async def test_change_set(self, redis_client):
+        """Test a change set lists the icao24s that appeared, moved and disappeared."""
+        writer = BatchWriter(redis_client, batch_size=100, concurrency=1, max_retries=0)
+
+        await publish_changes(writer, 5, False, (["abc123"], ["def456"], []))
+
+        [(_, fields)] = await redis_client.xrange(CHANGES_KEY)
+        assert decode_changes(fields) == {
+            "generation": 5, "full": False, "appeared": ["abc123"], "moved": ["def456"], "disappeared": [],
+        }
+
+    async def test_large_change_set_published_as_full(self, redis_client, monkeypatch):
+        """Test a change set over the cap is published as full, without its icao24s."""
+        monkeypatch.setattr(settings, "change_set_max_aircraft", 2)
+        writer = BatchWriter(redis_client, batch_size=100, concurrency=1, max_retries=0)
+
+        await publish_changes(writer, 5, False, (["abc123"], ["def456", "fed654"], []))
+
+        [(_, fields)] = await redis_client.xrange(CHANGES_KEY)
+        assert decode_changes(fields) == {
+            "generation": 5, "full": True, "appeared": [], "moved": [], "disappeared": [],
+        }
+
+    async def test_disabled(self, redis_client, monkeypatch):
+        """Test nothing is published with a change stream length of 0."""
+        monkeypatch.setattr(settings, "change_stream_length", 0)
+        writer = BatchWriter(redis_client, batch_size=100, concurrency=1, max_retries=0)
+
+        await publish_changes(writer, 5, False, (["abc123"], [], []))
+
+        assert not await redis_client.exists(CHANGES_KEY)
+
+
+class TestRestoreSnapshot:
+    """Tests for warming an empty Valkey from the saved snapshot."""
+
+    @pytest.fixture
+    async def saved(self, redis_client, make_state, tmp_path):
+        """A published generation saved to a snapshot, and a cycle using keep_values like sync_loop does."""
+        cycle = Cycle(redis_client, [Region(name="global")])
+        cycle.tracker = ChangeTracker(keep_values=True)
+        snapshots = SnapshotStore(str(tmp_path / "snapshot.bin"), ttl=300)
+        await cycle.run(StubSource({"global": [make_state("abc123"), make_state("def456")]}))
+        await snapshots.save(cycle.generations.current, cycle.tracker.values())
+        return cycle, snapshots
+
+    async def test_restore_after_data_loss(self, saved):
+        """Test an emptied Valkey gets the saved positions back under a new generation number."""
+        cycle, snapshots = saved
+        await cycle.r.flushall()
+
+        assert await restore_snapshot(cycle.writer, cycle.generations, cycle.tracker, snapshots)
+
+        generation = int(await cycle.r.get(CURRENT_GENERATION_KEY))
+        assert generation == 2
+        assert sorted(await cycle.r.hkeys(positions_key(generation))) == ["abc123", "def456"]
+        assert await cycle.r.smembers(live_key(generation)) == {"abc123", "def456"}
+        assert await cycle.r.zcard(geo_key(generation)) == 2
+        assert 0 < await cycle.r.ttl(positions_key(generation)) <= 300
+        assert not cycle.tracker.synced
+
+    async def test_not_restored_over_current_generation(self, saved):
+        """Test a snapshot is not restored while Valkey holds a current generation."""
+        cycle, snapshots = saved
+
+        assert not await restore_snapshot(cycle.writer, cycle.generations, cycle.tracker, snapshots)
+        assert await cycle.r.get(CURRENT_GENERATION_KEY) == "1"
+
+    async def test_failed_restore_discarded(self, saved):
+        """Test a restore that could not be written leaves Valkey without a generation."""
+        cycle, snapshots = saved
+        await cycle.r.flushall()
+        writer = FailingWriter(cycle.r, "hset", {"abc123"})
+
+        assert not await restore_snapshot(writer, cycle.generations, cycle.tracker, snapshots)
+        assert await cycle.r.get(CURRENT_GENERATION_KEY) is None
+        assert await cycle.r.keys("aircraft:*:*") == ["aircraft:generation:seq"]
+
+
+class StopPolling(Exception):
+    """Ends the otherwise endless poll loop."""
+
+
+def cycles(status: str) -> float:
+    return REGISTRY.get_sample_value("adsb_sync_cycles_total", {"status": status}) or 0.0
+
+
+class TestPoll:
+    """Tests for the poll loop's accounting around each cycle."""
+
+    @pytest.fixture
+    def outcomes(self, monkeypatch):
+        """Make run_cycle return the queued outcomes, then stop the loop."""
+        queued = []
+
+        async def fake_run_cycle(source, writer, generations, tracker, schedule, lease=None):
+            if not queued:
+                raise StopPolling()
+            count = queued.pop(0)
+            if count is not None and count != NOT_DUE:
+                tracker.synced = True
+            return count
+
+        monkeypatch.setattr(main, "run_cycle", fake_run_cycle)
+        return queued
+
+    async def test_accounting(self, cycle, outcomes):
+        """Test published, empty and failed cycles are counted, and cycles with nothing due are not."""
+        outcomes.extend([NOT_DUE, 3, 0, None, None, NOT_DUE])
+        success, failure = cycles("success"), cycles("failure")
+
+        with pytest.raises(StopPolling):
+            await poll(StubSource({}), cycle.writer, cycle.generations, cycle.tracker, cycle.schedule)
+
+        assert cycles("success") == success + 2
+        assert cycles("failure") == failure + 2
+        assert REGISTRY.get_sample_value("adsb_sync_consecutive_failures") == 3
+
+    async def test_snapshot_saved_after_published_cycles(self, cycle, outcomes, tmp_path, monkeypatch):
+        """Test the snapshot is saved after a cycle that ran, but not after one with nothing due."""
+        snapshots = SnapshotStore(str(tmp_path / "snapshot.bin"), ttl=300)
+        saved = []
+
+        async def save(generation, positions):
+            saved.append(generation)
+
+        monkeypatch.setattr(snapshots, "save", save)
+        cycle.generations.current = 4
+        outcomes.extend([3, NOT_DUE])
+
+        with pytest.raises(StopPolling):
+            await poll(StubSource({}), cycle.writer, cycle.generations, cycle.tracker, cycle.schedule, snapshots=snapshots)
+
+        assert saved == [4]
+
+    async def test_standby_until_leader(self, cycle, outcomes):
+        """Test a standby replica waits for the lease and then forgets what it tracked."""
+
+        class Lease:
+            held = False
+
+            async def wait_held(self):
+                self.held = True
+
+        cycle.tracker.synced = True
+
+        with pytest.raises(StopPolling):
+            await poll(StubSource({}), cycle.writer, cycle.generations, cycle.tracker, cycle.schedule, lease=Lease())
+
+        assert not cycle.tracker.synced
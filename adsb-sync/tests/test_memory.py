@@ -0,0 +1,30 @@
+"""Tests for peak memory readings."""
+import resource
+import sys
+
+import pytest
+
+from app import memory
+
+
+class TestPeakRss:
+    """Tests for reset_peak_rss() and peak_rss_bytes()."""
+
+    @pytest.mark.skipif(not sys.platform.startswith("linux"), reason="reads /proc")
+    def test_reads_high_water_mark(self):
+        """Test the peak covers memory allocated since the reset."""
+        memory.reset_peak_rss()
+        before = memory.peak_rss_bytes()
+        block = b"\x01" * (64 * 1024 * 1024)
+
+        assert memory.peak_rss_bytes() >= before + 32 * 1024 * 1024
+        del block
+
+    def test_without_proc(self, monkeypatch, tmp_path):
+        """Test the lifetime peak is reported where /proc is not available."""
+        monkeypatch.setattr(memory, "_STATUS", str(tmp_path / "missing"))
+        monkeypatch.setattr(memory, "_CLEAR_REFS", str(tmp_path / "missing" / "clear_refs"))
+
+        memory.reset_peak_rss()
+
+        assert memory.peak_rss_bytes() == resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
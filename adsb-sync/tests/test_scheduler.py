@@ -0,0 +1,132 @@
+"""Tests for PollScheduler and region credit costs."""
+import datetime
+
+import pytest
+
+from app.config import Region
+from app.scheduler import PollScheduler, seconds_until_quota_reset
+
+NOON = datetime.datetime(2025, 1, 1, 12, tzinfo=datetime.timezone.utc)
+
+
+def scheduler(*regions: Region, interval: int = 60, min_interval: int = 10, max_backoff: int = 300, adaptive: bool = True):
+    return PollScheduler(list(regions), interval, min_interval, max_backoff, adaptive)
+
+
+class TestCreditCost:
+    """Tests for Region.credit_cost."""
+
+    @pytest.mark.parametrize(
+        "size, cost",
+        [(5, 1), (10, 2), (20, 3), (21, 4)],
+    )
+    def test_cost_by_area(self, size, cost):
+        """Test the cost steps at 25, 100 and 400 square degrees."""
+        region = Region(name="box", lamin=0, lomin=0, lamax=size, lomax=size)
+
+        assert region.credit_cost == cost
+
+    def test_unbounded_region(self):
+        """Test a region without bounds costs as much as the whole planet."""
+        assert Region(name="global").credit_cost == 4
+
+
+class TestPollScheduler:
+    """Tests for when regions are due and how intervals adapt to credits."""
+
+    def test_quota_reset(self):
+        """Test the credits refill at the next midnight UTC."""
+        assert seconds_until_quota_reset(NOON) == 12 * 3600
+
+    def test_all_due_at_start(self):
+        """Test every region is polled on the first cycle."""
+        s = scheduler(Region(name="a"), Region(name="b"))
+
+        assert [r.name for r in s.due(0.0)] == ["a", "b"]
+
+    def test_polled_schedules_from_cycle_start(self):
+        """Test the next poll is measured from when the cycle began."""
+        fast = Region(name="fast", poll_interval=30)
+        slow = Region(name="slow")
+        s = scheduler(fast, slow)
+
+        s.polled([fast, slow], started=100.0)
+
+        assert s.due(129.0) == []
+        assert s.due(130.0) == [fast]
+        assert s.seconds_until_due(110.0) == 20.0
+        assert s.due(160.0) == [fast, slow]
+
+    def test_spare_credits_speed_up(self):
+        """Test intervals shrink with credit to spare, but not below min_interval."""
+        region = Region(name="box", lamin=0, lomin=0, lamax=5, lomax=5)
+        s = scheduler(region)
+
+        # One credit a minute for 12 hours needs 720 credits; 1440 allows twice the rate
+        s.credits_remaining(1440, NOON)
+        assert s.interval(region) == pytest.approx(30.0)
+
+        s.credits_remaining(1_000_000, NOON)
+        assert s.interval(region) == 10
+
+    def test_short_credits_slow_down(self):
+        """Test intervals stretch so the remaining credits last until the refill."""
+        region = Region(name="global")
+        s = scheduler(region)
+
+        # Four credits a minute for 12 hours needs 2880 credits; 720 allows a quarter
+        s.credits_remaining(720, NOON)
+
+        assert s.interval(region) == pytest.approx(240.0)
+
+    def test_no_credits_left(self):
+        """Test running out of credits stretches intervals to the refill instead of dividing by zero."""
+        region = Region(name="global")
+        s = scheduler(region)
+
+        s.credits_remaining(0, NOON)
+
+        assert s.interval(region) == pytest.approx(4 * 12 * 3600)
+
+    def test_not_adaptive(self):
+        """Test the configured interval is kept when adaptation is off."""
+        region = Region(name="global")
+        s = scheduler(region, adaptive=False)
+
+        s.credits_remaining(1, NOON)
+
+        assert s.interval(region) == 60
+
+    def test_failed_backs_off_exponentially(self):
+        """Test consecutive failures double the wait up to max_backoff, and a success resets it."""
+        region = Region(name="global")
+        s = scheduler(region, max_backoff=200)
+
+        assert [s.failed([region], 0.0) for _ in range(3)] == [60, 120, 200]
+        assert s.due(199.0) == []
+
+        s.polled([region], 200.0)
+        assert s.backoff == 0.0
+        assert s.failed([region], 0.0) == 60
+
+    def test_rate_limited(self):
+        """Test regions wait as long as OpenSky asked, or back off if it did not say."""
+        region = Region(name="global")
+        s = scheduler(region)
+
+        assert s.rate_limited([region], 100.0, 500.0) == 500.0
+        assert s.due(599.0) == []
+        assert s.due(600.0) == [region]
+        # Without a wait from OpenSky it backs off from there, up to max_backoff
+        assert s.rate_limited([region], 100.0, None) == 300
+
+    def test_retry_keeps_interval(self):
+        """Test a failure not caused by OpenSky retries at the normal interval without backoff."""
+        region = Region(name="global")
+        s = scheduler(region)
+
+        s.retry([region], 100.0)
+
+        assert s.backoff == 0.0
+        assert s.due(159.0) == []
+        assert s.due(160.0) == [region]
@@ -0,0 +1,108 @@
+"""Tests for snapshot files and SnapshotStore."""
+import time
+
+import pytest
+
+from app.snapshot import SnapshotStore, read_snapshot, write_snapshot
+
+POSITIONS = {"abc123": b"\x01\x02\x00\x03", "def456": "text value", "789abc": b""}
+
+
+class TestSnapshotFile:
+    """Tests for write_snapshot() and read_snapshot()."""
+
+    def test_round_trip(self, tmp_path):
+        """Test positions, save time and generation are read back as written."""
+        path = tmp_path / "snapshot.bin"
+        write_snapshot(path, POSITIONS, 1700000000.5, 42)
+
+        saved_at, generation, entries = read_snapshot(path)
+
+        assert saved_at == 1700000000.5
+        assert generation == 42
+        assert entries == [
+            ("abc123", b"\x01\x02\x00\x03"),
+            ("def456", b"text value"),
+            ("789abc", b""),
+        ]
+        assert not (tmp_path / "snapshot.bin.partial").exists()
+
+    def test_short_icao24(self, tmp_path):
+        """Test icao24s shorter than the fixed width lose their padding."""
+        path = tmp_path / "snapshot.bin"
+        write_snapshot(path, {"abc": b"x"}, 0.0, 1)
+
+        assert read_snapshot(path)[2] == [("abc", b"x")]
+
+    def test_empty(self, tmp_path):
+        """Test a generation without aircraft round trips."""
+        path = tmp_path / "snapshot.bin"
+        write_snapshot(path, {}, 0.0, 1)
+
+        assert read_snapshot(path) == (0.0, 1, [])
+
+    @pytest.mark.parametrize("keep", [0, 10, 30, -3])
+    def test_truncated(self, tmp_path, keep):
+        """Test a file cut short anywhere is rejected rather than misread."""
+        path = tmp_path / "snapshot.bin"
+        write_snapshot(path, POSITIONS, 0.0, 1)
+        data = path.read_bytes()
+        path.write_bytes(data[:keep])
+
+        with pytest.raises(ValueError):
+            read_snapshot(path)
+
+    def test_wrong_version(self, tmp_path):
+        """Test a file from another format version is rejected."""
+        path = tmp_path / "snapshot.bin"
+        write_snapshot(path, POSITIONS, 0.0, 1)
+        data = bytearray(path.read_bytes())
+        data[4] = 1
+        path.write_bytes(bytes(data))
+
+        with pytest.raises(ValueError, match="version"):
+            read_snapshot(path)
+
+
+class TestSnapshotStore:
+    """Tests for saving and loading snapshots for warm starts."""
+
+    async def test_save_and_load(self, tmp_path):
+        """Test a saved generation loads with the TTL it has left."""
+        store = SnapshotStore(str(tmp_path / "snapshot.bin"), ttl=300)
+        await store.save(7, POSITIONS)
+
+        entries, ttl, generation = await store.load()
+
+        assert dict(entries)["abc123"] == POSITIONS["abc123"]
+        assert 298 <= ttl <= 300
+        assert generation == 7
+
+    async def test_no_snapshot(self, tmp_path):
+        """Test nothing is loaded before a snapshot is saved."""
+        assert await SnapshotStore(str(tmp_path / "snapshot.bin"), ttl=300).load() is None
+
+    async def test_expired(self, tmp_path):
+        """Test a snapshot older than the TTL is not restored."""
+        path = tmp_path / "snapshot.bin"
+        write_snapshot(path, POSITIONS, time.time() - 301, 7)
+
+        assert await SnapshotStore(str(path), ttl=300).load() is None
+
+    async def test_unreadable(self, tmp_path):
+        """Test a corrupt snapshot is skipped instead of failing the start."""
+        path = tmp_path / "snapshot.bin"
+        path.write_bytes(b"not a snapshot at all")
+
+        assert await SnapshotStore(str(path), ttl=300).load() is None
+
+    async def test_save_skips_same_generation(self, tmp_path):
+        """Test a generation is only written once."""
+        path = tmp_path / "snapshot.bin"
+        store = SnapshotStore(str(path), ttl=300)
+        await store.save(7, POSITIONS)
+        await store.save(7, {"abc123": b"newer"})
+        await store.save(None, {"abc123": b"newer"})
+
+        entries, _, _ = await store.load()
+        assert len(entries) == 3
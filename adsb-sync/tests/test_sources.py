@@ -0,0 +1,196 @@
+"""Tests for position sources."""
+import asyncio
+import gzip
+import json
+
+import httpx
+import pytest
+
+from app.config import Region, Settings
+from app.sources import (
+    OPENSKY_URL,
+    OpenSkySource,
+    PositionSource,
+    RecordingSource,
+    ReplaySource,
+    SyntheticSource,
+    create_source,
+)
+
+REGIONS = [Region(name=f"region-{i}") for i in range(10)]
+
+
+class FakeSource(PositionSource):
+    """Report a different, sizeable set of aircraft for each region and poll."""
+
+    def __init__(self, make_state):
+        self._make_state = make_state
+        self.polls: dict[str, int] = {}
+        self.closed = False
+
+    def response(self, region: str, poll: int) -> list[list]:
+        return [
+            self._make_state(f"{int(region.rsplit('-', 1)[1]):02x}{n:04x}", time_position=poll)
+            for n in range(200)
+        ]
+
+    async def states(self, region: Region):
+        poll = self.polls.get(region.name, 0)
+        self.polls[region.name] = poll + 1
+        states = self.response(region.name, poll)
+        for i in range(0, len(states), 50):
+            await asyncio.sleep(0)
+            yield states[i:i + 50]
+
+    async def close(self):
+        self.closed = True
+
+
+async def collect(source: PositionSource, region: Region) -> list[list]:
+    return [state async for batch in source.states(region) for state in batch]
+
+
+async def poll_all(source: PositionSource) -> dict[str, list[list]]:
+    """Poll every region concurrently, as fetch_regions does."""
+    results = await asyncio.gather(*(collect(source, region) for region in REGIONS))
+    return {region.name: states for region, states in zip(REGIONS, results)}
+
+
+@pytest.fixture
+async def recording(tmp_path, make_state):
+    """Record three concurrent polls of every region and return the file and what was served."""
+    fake = FakeSource(make_state)
+    recorder = RecordingSource(fake, str(tmp_path))
+    served = [await poll_all(recorder) for _ in range(3)]
+    await recorder.close()
+    assert fake.closed
+    return recorder.path, served
+
+
+class TestRecordReplay:
+    """Tests for recording responses and playing them back with regions polled concurrently."""
+
+    async def test_recording_is_readable(self, recording):
+        """Test concurrent regions each record one intact line per response."""
+        path, served = recording
+
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            responses = [json.loads(line) for line in f]
+
+        assert len(responses) == 3 * len(REGIONS)
+        for region in REGIONS:
+            recorded = [r["states"] for r in responses if r["region"] == region.name]
+            assert recorded == [poll[region.name] for poll in served]
+
+    async def test_replay_round_trip(self, recording):
+        """Test concurrent regions are replayed in recorded order and restart at the end."""
+        path, served = recording
+        replay = ReplaySource(str(path), batch_size=64, speed=1_000_000)
+
+        # One more round than was recorded, which replays from the start
+        replayed = [await poll_all(replay) for _ in range(4)]
+        await replay.close()
+
+        assert replayed == served + served[:1]
+
+    async def test_replay_unknown_region(self, recording):
+        """Test a region missing from the recording yields nothing."""
+        path, _ = recording
+        replay = ReplaySource(str(path), batch_size=64, speed=1_000_000)
+
+        assert await collect(replay, Region(name="elsewhere")) == []
+        await replay.close()
+
+
+class TestSyntheticSource:
+    """Tests for generated aircraft."""
+
+    async def test_reproducible_and_within_region(self):
+        """Test the same seed generates the same fleet, filtered to the region."""
+        region = Region(name="north", lamin=0, lomin=-180, lamax=90, lomax=180)
+        first = await collect(SyntheticSource(500, batch_size=64, seed=1), region)
+        second = await collect(SyntheticSource(500, batch_size=64, seed=1), region)
+
+        assert 0 < len(first) < 500
+        assert [s[0] for s in first] == [s[0] for s in second]
+        assert all(s[6] >= 0 for s in first)
+
+    async def test_concurrent_regions_cover_fleet(self):
+        """Test regions generated concurrently together report every aircraft once."""
+        source = SyntheticSource(500, batch_size=64)
+        halves = [
+            Region(name="west", lamin=-90, lomin=-180, lamax=90, lomax=0),
+            Region(name="east", lamin=-90, lomin=0, lamax=90, lomax=180),
+        ]
+
+        results = await asyncio.gather(*(collect(source, region) for region in halves))
+
+        icao24s = [s[0] for states in results for s in states]
+        assert len(set(icao24s)) == 500
+
+
+class TestOpenSkySource:
+    """Tests for fetching live state vectors."""
+
+    @pytest.fixture
+    def body(self, make_state):
+        return json.dumps({"time": 1700000000, "states": [make_state(f"{n:06x}") for n in range(7)]})
+
+    def client(self, body: str, status: int = 200, headers: dict | None = None) -> httpx.AsyncClient:
+        def handler(request: httpx.Request) -> httpx.Response:
+            assert str(request.url).startswith(OPENSKY_URL)
+            return httpx.Response(status, text=body, headers=headers or {})
+
+        return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    @pytest.mark.parametrize("stream_parse", [True, False])
+    async def test_batches(self, body, stream_parse):
+        """Test state vectors arrive in batches of at most batch_size, parsed either way."""
+        source = OpenSkySource(self.client(body), batch_size=3, stream_parse=stream_parse)
+
+        batches = [batch async for batch in source.states(Region(name="global"))]
+
+        assert [len(b) for b in batches] == [3, 3, 1]
+
+    async def test_rate_limit_headers(self, body):
+        """Test the remaining credits and retry wait are read from the response."""
+        headers = {"X-Rate-Limit-Remaining": "120", "X-Rate-Limit-Retry-After-Seconds": "30"}
+        source = OpenSkySource(self.client(body, 429, headers), batch_size=3)
+
+        with pytest.raises(httpx.HTTPStatusError):
+            await collect(source, Region(name="global"))
+
+        assert source.credits_remaining == 120
+        assert source.retry_after == 30.0
+
+    async def test_missing_states(self):
+        """Test a response without states fails rather than reporting no aircraft."""
+        source = OpenSkySource(self.client('{"time": 1700000000}'), batch_size=3)
+
+        with pytest.raises(ValueError):
+            await collect(source, Region(name="global"))
+
+
+class TestCreateSource:
+    """Tests for choosing the configured source."""
+
+    def test_sources(self, tmp_path):
+        """Test each source setting builds its source, wrapped in a recorder if asked."""
+        client = httpx.AsyncClient()
+
+        assert isinstance(create_source(Settings(source="opensky"), client), OpenSkySource)
+        assert isinstance(create_source(Settings(source="synthetic", synthetic_aircraft=1), client), SyntheticSource)
+        assert isinstance(create_source(Settings(source="replay", replay_path="x.gz"), client), ReplaySource)
+        recorder = create_source(Settings(record_dir=str(tmp_path)), client)
+        assert isinstance(recorder, RecordingSource)
+        recorder._file.close()
+
+    def test_unknown_source(self):
+        """Test an unknown source setting is rejected."""
+        with pytest.raises(ValueError, match="Unknown position source"):
+            create_source(Settings(source="carrier-pigeon"), httpx.AsyncClient())
+
+    def test_abstract(self):
+        """Test a source must implement states."""
+        with pytest.raises(TypeError):
+            PositionSource()
@@ -0,0 +1,98 @@
+"""Tests for StateStreamParser."""
+import json
+import random
+
+import pytest
+
+from app.stream import StateStreamParser
+
+
+def parse(chunks: list[bytes]) -> list[list]:
+    parser = StateStreamParser()
+    states = []
+    for chunk in chunks:
+        states.extend(parser.feed(chunk))
+    parser.close()
+    return states
+
+
+def split_randomly(body: bytes, rng: random.Random) -> list[bytes]:
+    """Cut ``body`` at random offsets, including inside multi-byte characters."""
+    cuts = sorted(rng.sample(range(1, len(body)), k=min(len(body) - 1, rng.randint(1, 40))))
+    return [body[start:end] for start, end in zip([0, *cuts], [*cuts, len(body)])]
+
+
+@pytest.fixture
+def states(make_state):
+    return [
+        make_state("abc123"),
+        make_state("def456", callsign="ÜBER  ", origin_country="Österreich"),
+        make_state("789abc", longitude=None, latitude=None, sensors=[1, 2]),
+    ]
+
+
+class TestStateStreamParser:
+    """Tests for incremental decoding of the states array."""
+
+    def test_single_chunk(self, states):
+        """Test a whole response in one chunk."""
+        body = json.dumps({"time": 1700000000, "states": states}).encode("utf-8")
+
+        assert parse([body]) == states
+
+    @pytest.mark.parametrize("seed", range(50))
+    def test_random_chunking(self, states, seed):
+        """Test the result does not depend on where chunk boundaries fall."""
+        rng = random.Random(seed)
+        body = json.dumps(
+            {"time": 1700000000, "states": states}, ensure_ascii=False, indent=rng.choice([None, 2])
+        ).encode("utf-8")
+
+        assert parse(split_randomly(body, rng)) == states
+
+    def test_byte_at_a_time(self, states):
+        """Test the key and the array opening are found when split across every byte."""
+        body = json.dumps({"time": 1700000000, "states": states}).encode("utf-8")
+
+        assert parse([body[i:i + 1] for i in range(len(body))]) == states
+
+    def test_states_after_other_fields(self, states):
+        """Test a string value of "states" is not mistaken for the key."""
+        body = json.dumps({"kind": "states", "states": states}).encode("utf-8")
+
+        assert parse([body]) == states
+
+    def test_null_states(self):
+        """Test OpenSky's null states field yields nothing."""
+        assert parse([b'{"time": 1700000000, "states": null}']) == []
+
+    def test_ignores_data_after_array(self, states):
+        """Test nothing is decoded once the array has closed."""
+        parser = StateStreamParser()
+        body = json.dumps({"states": states[:1]}).encode("utf-8")
+
+        assert parser.feed(body) == states[:1]
+        assert parser.feed(b'[["ignored"]]') == []
+        assert parser.done
+
+    def test_missing_states(self):
+        """Test a response without a states field is rejected."""
+        parser = StateStreamParser()
+        parser.feed(b'{"time": 1700000000}')
+
+        with pytest.raises(ValueError, match="no states field"):
+            parser.close()
+
+    def test_truncated(self, states):
+        """Test a response cut off inside the array is rejected."""
+        body = json.dumps({"states": states}).encode("utf-8")
+        parser = StateStreamParser()
+        parser.feed(body[:-10])
+
+        with pytest.raises(ValueError, match="ended inside"):
+            parser.close()
+
+    def test_unexpected_value(self):
+        """Test a states field that is neither an array nor null is rejected."""
+        with pytest.raises(ValueError, match="Unexpected"):
+            StateStreamParser().feed(b'{"states": 42}')
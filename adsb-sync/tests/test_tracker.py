@@ -0,0 +1,134 @@
+"""Tests for ChangeTracker."""
+from app.tracker import CHANGED, SKIP, ChangeTracker, fingerprint
+
+
+def write_cycle(tracker: ChangeTracker, states: list[list], region: str = "global", carried: bool = True):
+    """Run one cycle that writes every changed aircraft, without committing it."""
+    tracker.begin_cycle(carried, [region])
+    for state in states:
+        fp = fingerprint(state)
+        if tracker.classify(state[0], fp, region) == CHANGED:
+            tracker.mark_written(state[0], fp, f"value-{state[0]}")
+
+
+class TestFingerprint:
+    """Tests for fingerprint()."""
+
+    def test_ignores_sensors(self, make_state):
+        """Test the sensors list, which is never stored, does not count as a change."""
+        assert fingerprint(make_state(sensors=[1])) == fingerprint(make_state(sensors=[2]))
+
+    def test_position_part(self, make_state):
+        """Test only a change of position changes the position fingerprint."""
+        state = make_state()
+        faster = fingerprint(make_state(velocity=300.0))
+        moved = fingerprint(make_state(latitude=38.0))
+
+        assert faster[0] != fingerprint(state)[0]
+        assert faster[1] == fingerprint(state)[1]
+        assert moved[1] != fingerprint(state)[1]
+
+
+class TestChangeTracker:
+    """Tests for staging, committing and aborting cycles."""
+
+    def test_first_cycle_writes_everything(self, make_state):
+        """Test every aircraft is new to an empty tracker and appears on commit."""
+        tracker = ChangeTracker()
+        write_cycle(tracker, [make_state("abc123"), make_state("def456")], carried=False)
+
+        appeared, moved, disappeared = tracker.commit()
+
+        assert sorted(appeared) == ["abc123", "def456"]
+        assert moved == [] and disappeared == []
+        assert tracker.synced
+        assert len(tracker) == 2
+
+    def test_unchanged_aircraft_skipped(self, make_state):
+        """Test an aircraft reported unchanged after a commit is skipped."""
+        tracker = ChangeTracker()
+        write_cycle(tracker, [make_state()])
+        tracker.commit()
+
+        tracker.begin_cycle(True, ["global"])
+
+        assert tracker.classify("abc123", fingerprint(make_state()), "global") == SKIP
+        assert tracker.classify("abc123", fingerprint(make_state(latitude=38.0)), "global") == CHANGED
+
+    def test_staged_writes_not_baseline_until_commit(self, make_state):
+        """Test a write staged in an uncommitted cycle is written again next cycle."""
+        tracker = ChangeTracker()
+        write_cycle(tracker, [make_state()])
+
+        # Abandoned, as after a failed cycle whose generation was aborted
+        tracker.begin_cycle(True, ["global"])
+
+        assert not tracker.known("abc123")
+        assert tracker.classify("abc123", fingerprint(make_state()), "global") == CHANGED
+
+    def test_forget_failed_write(self, make_state):
+        """Test a write dropped with forget is not adopted on commit."""
+        tracker = ChangeTracker(keep_values=True)
+        write_cycle(tracker, [make_state("abc123"), make_state("def456")], carried=False)
+        tracker.forget("def456")
+
+        appeared, _, _ = tracker.commit()
+
+        assert appeared == ["abc123"]
+        assert not tracker.known("def456")
+        assert tracker.values() == {"abc123": "value-abc123"}
+
+    def test_moved_and_disappeared(self, make_state):
+        """Test commit reports aircraft that moved and those no longer reported."""
+        tracker = ChangeTracker(keep_values=True)
+        write_cycle(tracker, [make_state("abc123"), make_state("def456"), make_state("789abc")], carried=False)
+        tracker.commit()
+
+        write_cycle(tracker, [make_state("abc123", latitude=38.0), make_state("def456", velocity=300.0)])
+
+        assert tracker.removed() == ["789abc"]
+        appeared, moved, disappeared = tracker.commit()
+        assert appeared == []
+        assert moved == ["abc123"]
+        assert disappeared == ["789abc"]
+        assert sorted(tracker.values()) == ["abc123", "def456"]
+
+    def test_removal_limited_to_polled_regions(self, make_state):
+        """Test a cycle polling one region keeps aircraft reported by the others."""
+        tracker = ChangeTracker()
+        tracker.begin_cycle(False, ["east", "west"])
+        for icao24, region in (("abc123", "east"), ("def456", "west")):
+            fp = fingerprint(make_state(icao24))
+            tracker.classify(icao24, fp, region)
+            tracker.mark_written(icao24, fp)
+        tracker.commit()
+
+        write_cycle(tracker, [], region="east")
+
+        assert tracker.removed() == ["abc123"]
+        tracker.commit()
+        assert tracker.known("def456")
+        assert not tracker.known("abc123")
+
+    def test_uncarried_cycle_starts_over(self, make_state):
+        """Test a cycle without a carried-forward generation treats everything as new."""
+        tracker = ChangeTracker()
+        write_cycle(tracker, [make_state()])
+        tracker.commit()
+
+        write_cycle(tracker, [make_state()], carried=False)
+
+        appeared, _, _ = tracker.commit()
+        assert appeared == ["abc123"]
+
+    def test_reset(self, make_state):
+        """Test reset forgets the baseline and marks the tracker unsynced."""
+        tracker = ChangeTracker(keep_values=True)
+        write_cycle(tracker, [make_state()])
+        tracker.commit()
+
+        tracker.reset()
+
+        assert not tracker.synced
+        assert len(tracker) == 0
+        assert tracker.values() == {}
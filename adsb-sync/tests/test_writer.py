@@ -0,0 +1,59 @@
+"""Tests for BatchWriter and idempotent track writes."""
+from app.codec import positions_key, track_key
+from app.main import state_to_record, store_states, track_commands
+from app.tracker import ChangeTracker
+from app.writer import BatchWriter
+
+
+class TestBatchWriter:
+    """Tests for batched, per-command results."""
+
+    async def test_results_in_order(self, redis_client):
+        """Test results come back in command order across batches."""
+        writer = BatchWriter(redis_client, batch_size=2, concurrency=2, max_retries=0)
+        commands = [("set", f"key:{i}", i) for i in range(5)] + [("incr", "key:0")]
+
+        results = await writer.write(commands)
+
+        assert results == [True] * 5 + [1]
+
+    async def test_rejected_command_returns_error(self, redis_client):
+        """Test a command Valkey rejects fails alone, with its error as the result."""
+        writer = BatchWriter(redis_client, batch_size=10, concurrency=1, max_retries=0)
+        await redis_client.set("text", "not a number")
+
+        results = await writer.write([("incr", "text"), ("set", "other", 1)])
+
+        assert isinstance(results[0], Exception)
+        assert results[1] is True
+
+
+class TestTrackWrites:
+    """Tests for appending positions to track histories."""
+
+    def test_entry_id_is_position_time(self, make_state):
+        """Test the stream entry ID is the time of the position."""
+        xadd, _ = track_commands("abc123", state_to_record("abc123", make_state()))
+
+        assert xadd[3] == "1700000000000-0"
+
+    def test_no_position_no_track(self, make_state):
+        """Test aircraft without a position are not added to their track."""
+        state = make_state(longitude=None, latitude=None)
+
+        assert track_commands("abc123", state_to_record("abc123", state)) == []
+
+    async def test_retried_batch_adds_no_duplicates(self, redis_client, make_state):
+        """Test writing the same states twice appends each position once, without failures."""
+        writer = BatchWriter(redis_client, batch_size=100, concurrency=1, max_retries=0)
+        tracker = ChangeTracker()
+        states = [make_state("abc123"), make_state("def456")]
+
+        # As when a cycle is retried before its generation was committed
+        for _ in range(2):
+            tracker.begin_cycle(False, ["global"])
+            assert await store_states(writer, 1, states, tracker, "global") == 2
+
+        assert await redis_client.xlen(track_key("abc123")) == 1
+        assert await redis_client.xlen(track_key("def456")) == 1
+        assert await redis_client.hlen(positions_key(1)) == 2
@@ -0,0 +1,210 @@
+"""Valkey contract for live aircraft positions: key layout and encoding.
+
+Written by adsb-sync and read by api-server. Both services are built from
+their own Docker context, so this module is kept identical in each of them.
+
+Each sync cycle is published as a generation: a hash of icao24 -> encoded
+position under ``positions_key(generation)``, the set of tracked icao24s
+under ``live_key(generation)`` and a GEO index of the same aircraft under
+``geo_key(generation)``. ``CURRENT_GENERATION_KEY`` points at
+the complete generation readers should use and is switched atomically once
+a cycle has been fully written.
+
+Independently of generations, ``track_key(icao24)`` is a capped stream of
+recent positions per aircraft; each entry holds one packed track point in
+its ``TRACK_FIELD`` field. Every published generation also appends its
+change set to the ``CHANGES_KEY`` stream (see ``encode_changes``).
+
+Layout (version 1, little-endian): magic, version, presence flags, icao24,
+callsign, squawk, time_position, last_contact, seven float64 measurements,
+then a length-prefixed origin_country. Values that are not a byte string
+starting with ``MAGIC`` are decoded as the legacy JSON format.
+"""
+import json
+import math
+import struct
+
+MAGIC = 0xA5
+VERSION = 1
+
+CURRENT_GENERATION_KEY = "aircraft:generation"
+GENERATION_SEQUENCE_KEY = "aircraft:generation:seq"
+CHANGES_KEY = "aircraft:changes"
+
+# Valkey GEO indexes only accept Web Mercator latitudes
+GEO_MAX_LATITUDE = 85.05112878
+
+TRACK_FIELD = "p"
+
+_HEADER = struct.Struct("<BB")
+_V1 = struct.Struct("<BBH6s8s4sII7dB")
+
+_TEXT_FIELDS = ("callsign", "squawk")
+_INT_FIELDS = ("time_position", "last_contact")
+_FLOAT_FIELDS = (
+    "longitude",
+    "latitude",
+    "baro_altitude",
+    "velocity",
+    "true_track",
+    "vertical_rate",
+    "geo_altitude",
+)
+_NULLABLE = ("origin_country", *_TEXT_FIELDS, *_INT_FIELDS, *_FLOAT_FIELDS)
+_ON_GROUND = 1 << len(_NULLABLE)
+
+# time_position, longitude, latitude, then float32 (NaN when unknown) extras
+_TRACK_POINT = struct.Struct("<Iddfff")
+_TRACK_EXTRAS = ("baro_altitude", "true_track", "velocity")
+
+
+def positions_key(generation: int) -> str:
+    """Hash holding every position of one generation."""
+    return f"aircraft:positions:{generation}"
+
+
+def live_key(generation: int) -> str:
+    """Set of the icao24s tracked in one generation."""
+    return f"aircraft:live:{generation}"
+
+
+def geo_key(generation: int) -> str:
+    """GEO index of the positions of one generation."""
+    return f"aircraft:geo:{generation}"
+
+
+def track_key(icao24: str) -> str:
+    """Stream of recent track points of one aircraft."""
+    return f"aircraft:track:{icao24}"
+
+
+def encode_position(data: dict) -> bytes:
+    """Encode a position record, falling back to JSON if it does not fit the layout."""
+    try:
+        return _encode_v1(data)
+    except (struct.error, UnicodeEncodeError, ValueError, TypeError):
+        return json.dumps(data).encode("utf-8")
+
+
+def decode_position(raw: bytes | str) -> dict:
+    """Decode a position record written in either the binary or the JSON format."""
+    if isinstance(raw, str):
+        return json.loads(raw)
+    if raw[:1] != bytes((MAGIC,)):
+        return json.loads(raw)
+
+    _, version = _HEADER.unpack_from(raw)
+    if version == 1:
+        return _decode_v1(raw)
+    raise ValueError(f"Unsupported position encoding version: {version}")
+
+
+def _encode_v1(data: dict) -> bytes:
+    flags = 0
+    for bit, field in enumerate(_NULLABLE):
+        if data.get(field) is not None:
+            flags |= 1 << bit
+    if data.get("on_ground"):
+        flags |= _ON_GROUND
+
+    icao24 = data["icao24"].encode("ascii")
+    if len(icao24) != 6:
+        raise ValueError("icao24 must be 6 characters")
+    texts = []
+    for field, size in zip(_TEXT_FIELDS, (8, 4)):
+        value = (data.get(field) or "").encode("ascii")
+        if len(value) > size:
+            raise ValueError(f"{field} longer than {size} bytes")
+        texts.append(value)
+    country = (data.get("origin_country") or "").encode("utf-8")
+
+    return _V1.pack(
+        MAGIC,
+        VERSION,
+        flags,
+        icao24,
+        *texts,
+        *(int(data.get(field) or 0) for field in _INT_FIELDS),
+        *(float(data.get(field) or 0.0) for field in _FLOAT_FIELDS),
+        len(country),
+    ) + country
+
+
+def _decode_v1(raw: bytes) -> dict:
+    (
+        _, _, flags, icao24, callsign, squawk, time_position, last_contact,
+        longitude, latitude, baro_altitude, velocity, true_track, vertical_rate,
+        geo_altitude, country_len,
+    ) = _V1.unpack_from(raw)
+    end = _V1.size + country_len
+
+    # Bit order follows _NULLABLE
+    return {
+        "icao24": icao24.decode("ascii"),
+        "callsign": callsign.rstrip(b"\0").decode("ascii") if flags & 0x2 else None,
+        "origin_country": raw[_V1.size:end].decode("utf-8") if flags & 0x1 else None,
+        "time_position": time_position if flags & 0x8 else None,
+        "last_contact": last_contact if flags & 0x10 else None,
+        "longitude": longitude if flags & 0x20 else None,
+        "latitude": latitude if flags & 0x40 else None,
+        "baro_altitude": baro_altitude if flags & 0x80 else None,
+        "on_ground": bool(flags & _ON_GROUND),
+        "velocity": velocity if flags & 0x100 else None,
+        "true_track": true_track if flags & 0x200 else None,
+        "vertical_rate": vertical_rate if flags & 0x400 else None,
+        "geo_altitude": geo_altitude if flags & 0x800 else None,
+        "squawk": squawk.rstrip(b"\0").decode("ascii") if flags & 0x4 else None,
+    }
+
+
+def encode_changes(
+    generation: int, full: bool, appeared: list[str], moved: list[str], disappeared: list[str]
+) -> dict[str, str | int]:
+    """Stream entry fields describing what a generation changed.
+
+    ``full`` marks a generation written from scratch rather than carried
+    forward, after which consumers should reload instead of applying it.
+    icao24 lists are comma-separated.
+    """
+    return {
+        "generation": generation,
+        "full": int(full),
+        "appeared": ",".join(appeared),
+        "moved": ",".join(moved),
+        "disappeared": ",".join(disappeared),
+    }
+
+
+def decode_changes(fields: dict) -> dict:
+    """Decode change set fields written by ``encode_changes``."""
+    fields = {
+        (k.decode() if isinstance(k, bytes) else k): (v.decode() if isinstance(v, bytes) else v)
+        for k, v in fields.items()
+    }
+    return {
+        "generation": int(fields["generation"]),
+        "full": fields.get("full") == "1",
+        **{
+            name: fields[name].split(",") if fields.get(name) else []
+            for name in ("appeared", "moved", "disappeared")
+        },
+    }
+
+
+def encode_track_point(data: dict) -> bytes:
+    """Pack the time and position of a record with a known position into a track point."""
+    return _TRACK_POINT.pack(
+        int(data.get("time_position") or data.get("last_contact") or 0),
+        float(data["longitude"]),
+        float(data["latitude"]),
+        *(math.nan if data.get(field) is None else float(data[field]) for field in _TRACK_EXTRAS),
+    )
+
+
+def decode_track_point(raw: bytes) -> dict:
+    """Unpack a track point written by ``encode_track_point``."""
+    time_position, longitude, latitude, *extras = _TRACK_POINT.unpack(raw)
+    point = {"time": time_position, "longitude": longitude, "latitude": latitude}
+    for field, value in zip(_TRACK_EXTRAS, extras):
+        point[field] = None if math.isnan(value) else value
+    return point
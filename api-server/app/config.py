@@ -16,6 +16,26 @@ class Settings(BaseSettings):
     redis_host: str = "localhost"
     redis_port: int = 6379
     redis_ttl: int = 60
+    generation_cache_seconds: float = 1.0
+
+    # Registry metadata cached in-process for detail lookups; the database's
+    # metadata version stamp is checked this often and drops it when it moves
+    metadata_cache_size: int = 10000  # aircraft, 0 disables the cache
+    metadata_cache_ttl: float = 3600.0
+    metadata_version_check_seconds: float = 30.0
+
+    # Search pages are shared between API servers through Valkey for this
+    # long, keyed by metadata version; 0 disables it
+    search_cache_ttl: int = 60
+
+    # Search totals: "exact", "capped" (exact up to search_count_cap, then a
+    # lower bound) or "estimated" (the query planner's row estimate)
+    search_count: str = "exact"
+    search_count_cap: int = 10000
+    search_count_cache_seconds: float = 30.0  # exact totals are reused this long, 0 disables
+
+    # Positions older than this are not extrapolated
+    extrapolate_max_seconds: int = 2100
 
     # Service discovery (for health checks & connectivity)
     frontend_host: str = "frontend"
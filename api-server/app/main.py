@@ -4,9 +4,12 @@ import time
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from prometheus_fastapi_instrumentator import Instrumentator
+from sqlalchemy import text
+from sqlalchemy.exc import ProgrammingError
 from app.config import settings
 from app.database import engine
 from app.metrics import SERVICE_UP, SERVICE_LATENCY, AIRCRAFT_TRACKED
+from app.services.metadata_cache import metadata_cache
 from app.services.redis_client import redis_client
 from app.routers.aircraft import router as aircraft_router
 from app.routers.health import router as health_router
@@ -17,6 +20,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# PostgreSQL error code for a missing table
+UNDEFINED_TABLE = "42P01"
+
 
 async def _health_probe_loop():
     """Background loop that updates Prometheus metrics every 15s."""
@@ -40,6 +46,34 @@ async def _health_probe_loop():
         await asyncio.sleep(15)
 
 
+async def _metadata_version_loop():
+    """Background loop that follows the registry's metadata version stamp.
+
+    Cached metadata is dropped when the stamp moves. Without the stamp (the
+    migration adding it has not been applied) entries just expire; that is
+    logged once, and the stamp is picked up if the migration is applied later.
+    """
+    stamp_missing = False
+    while True:
+        try:
+            async with engine.connect() as conn:
+                version = await conn.scalar(text("SELECT version FROM metadata_version"))
+            metadata_cache.set_version(version)
+            stamp_missing = False
+        except ProgrammingError as e:
+            if getattr(e.orig, "sqlstate", None) != UNDEFINED_TABLE:
+                logger.warning(f"Metadata version check error: {e}")
+            elif not stamp_missing:
+                logger.warning(
+                    "No metadata_version table (db-install migration 002 not applied); "
+                    "cached metadata will only expire"
+                )
+                stamp_missing = True
+        except Exception as e:
+            logger.warning(f"Metadata version check error: {e}")
+        await asyncio.sleep(settings.metadata_version_check_seconds)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Manage application startup and shutdown."""
@@ -47,9 +81,11 @@ async def lifespan(app: FastAPI):
     await redis_client.connect()
     logger.info("Connected to Redis")
     probe_task = asyncio.create_task(_health_probe_loop())
+    version_task = asyncio.create_task(_metadata_version_loop())
     yield
     logger.info("Shutting down API server...")
     probe_task.cancel()
+    version_task.cancel()
     await redis_client.disconnect()
     await engine.dispose()
     logger.info("Cleanup complete")
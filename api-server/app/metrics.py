@@ -14,3 +14,18 @@ SERVICE_LATENCY = Histogram(
 CACHE_HITS = Counter("planespotter_cache_hits_total", "Redis cache hits for position lookups")
 CACHE_MISSES = Counter("planespotter_cache_misses_total", "Redis cache misses for position lookups")
 AIRCRAFT_TRACKED = Gauge("planespotter_aircraft_tracked_total", "Aircraft positions currently in Redis")
+METADATA_CACHE_HITS = Counter(
+    "planespotter_metadata_cache_hits_total", "Aircraft metadata lookups served from the in-process cache"
+)
+METADATA_CACHE_MISSES = Counter(
+    "planespotter_metadata_cache_misses_total", "Aircraft metadata lookups that went to the database"
+)
+METADATA_CACHE_EVICTIONS = Counter(
+    "planespotter_metadata_cache_evictions_total", "Aircraft metadata evicted from the in-process cache to make room"
+)
+SEARCH_CACHE_HITS = Counter("planespotter_search_cache_hits_total", "Aircraft searches served from Valkey")
+SEARCH_CACHE_MISSES = Counter("planespotter_search_cache_misses_total", "Aircraft searches run against the database")
+SEARCH_CACHE_SAVED_SECONDS = Counter(
+    "planespotter_search_cache_saved_seconds_total",
+    "Database time cached searches took when they were run, saved again by each hit",
+)
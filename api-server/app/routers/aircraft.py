@@ -5,100 +5,231 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
 from app.schemas.aircraft import (
     AircraftBase,
+    AircraftLiveResponse,
     AircraftSearchParams,
+    AircraftTrack,
     AircraftWithPosition,
     PaginatedResponse,
 )
-from app.services.aircraft import AircraftService
-from app.services.redis_client import redis_client
+from app.config import settings
+from app.metrics import SEARCH_CACHE_HITS, SEARCH_CACHE_MISSES, SEARCH_CACHE_SAVED_SECONDS
+from app.services.aircraft import SEARCH_FIELDS, AircraftService, decode_cursor, encode_cursor
+from app.services.metadata_cache import metadata_cache
+from app.services.redis_client import redis_client, search_key
 import math
+import time
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/aircraft", tags=["aircraft"])
 
 
-@router.get("", response_model=PaginatedResponse)
+def _search_fields(params: AircraftSearchParams) -> tuple[str, ...]:
+    """The item fields a search asked for, all of them by default."""
+    if not params.fields:
+        return SEARCH_FIELDS
+    fields = {name.strip() for name in params.fields.split(",") if name.strip()}
+    unknown = fields - set(SEARCH_FIELDS)
+    if unknown:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}; choose from {', '.join(SEARCH_FIELDS)}",
+        )
+    # In schema order, so equivalent lists share a cached page
+    return tuple(name for name in SEARCH_FIELDS if name in fields)
+
+
+def _canonical_query(
+    params: AircraftSearchParams, status: str | None, generation: int | None, fields: tuple[str, ...]
+) -> dict:
+    """Search parameters normalized so equivalent searches share a cached page."""
+    def term(value: str | None) -> str | None:
+        return value.lower() if value else None
+
+    return {
+        "registration": term(params.registration),
+        "icao24": term(params.icao24),
+        "manufacturer": term(params.manufacturer),
+        "model": term(params.model),
+        "operator": term(params.operator),
+        "owner": term(params.owner),
+        "status": status,
+        # Status-filtered pages depend on the tracked set, so last one generation
+        "generation": generation if status else None,
+        "page": None if params.cursor else params.page,
+        "per_page": params.per_page,
+        "cursor": params.cursor,
+        "count": params.count or settings.search_count,
+        "fields": list(fields),
+    }
+
+
+async def _search_page(
+    service: AircraftService, params: AircraftSearchParams, status: str | None, fields: tuple[str, ...]
+) -> dict:
+    """Run a search against the database as a cacheable page, without airborne flags."""
+    after = before = None
+    if params.cursor:
+        try:
+            direction, key = decode_cursor(params.cursor)
+        except ValueError:
+            raise HTTPException(status_code=422, detail="cursor is not valid")
+        if direction == 'next':
+            after = key
+        else:
+            before = key
+
+    # The status filter is applied in SQL, so totals and pages match it
+    aircraft_list, total, total_exact = await service.search(
+        registration=params.registration,
+        icao24=params.icao24,
+        manufacturer=params.manufacturer,
+        model=params.model,
+        operator=params.operator,
+        owner=params.owner,
+        status=status,
+        page=params.page,
+        per_page=params.per_page,
+        after=after,
+        before=before,
+        count=params.count,
+        fields=fields,
+    )
+
+    # Pages carry one extra row that only says whether there are more, so
+    # paging does not rely on the total, which may be capped or estimated
+    more = len(aircraft_list) > params.per_page
+    if before is not None:
+        has_next, has_prev = True, more
+        aircraft_list = aircraft_list[-params.per_page:]
+    else:
+        has_next, has_prev = more, after is not None or params.page > 1
+        aircraft_list = aircraft_list[:params.per_page]
+
+    items = [row._asdict() for row in aircraft_list]
+    return {
+        "items": items,
+        "total": total,
+        "total_exact": total_exact,
+        "pages": math.ceil(total / params.per_page) if total > 0 else 1,
+        "next_cursor": encode_cursor('next', items[-1]["icao24"]) if has_next and items else None,
+        "prev_cursor": encode_cursor('prev', items[0]["icao24"]) if has_prev and items else None,
+    }
+
+
+@router.get("", response_model=PaginatedResponse, response_model_exclude_unset=True)
 async def search_aircraft(
     params: Annotated[AircraftSearchParams, Query()],
     db: AsyncSession = Depends(get_db),
 ):
-    """Search aircraft registry with pagination and filters."""
-    service = AircraftService(db)
-    logger.info(f"Search request: status={params.status!r}, type={type(params.status)}")
-
-    # If filtering by status, we need a different approach
-    if params.status in ('airborne', 'ground'):
-        logger.info(f"Applying status filter: {params.status}")
-        # Get more results from DB, then filter by status
-        aircraft_list, _ = await service.search(
-            registration=params.registration,
-            icao24=params.icao24,
-            manufacturer=params.manufacturer,
-            model=params.model,
-            operator=params.operator,
-            owner=params.owner,
-            page=1,
-            per_page=1000,  # Get more to filter from
-        )
+    """Search aircraft registry with pagination and filters.
 
-        # Filter by airborne status
-        filtered_items = []
-        for a in aircraft_list:
-            is_airborne = await redis_client.is_airborne(a.icao24)
-            if (params.status == 'airborne' and is_airborne) or (params.status == 'ground' and not is_airborne):
-                item = AircraftBase.model_validate(a)
-                item.is_airborne = is_airborne
-                filtered_items.append(item)
-
-        # Apply pagination to filtered results
-        total = len(filtered_items)
-        logger.info(f"Filtered to {total} aircraft with status={params.status}")
-        pages = math.ceil(total / params.per_page) if total > 0 else 1
-        start = (params.page - 1) * params.per_page
-        end = start + params.per_page
-        items = filtered_items[start:end]
-    else:
-        # Normal search without status filter
-        aircraft_list, total = await service.search(
-            registration=params.registration,
-            icao24=params.icao24,
-            manufacturer=params.manufacturer,
-            model=params.model,
-            operator=params.operator,
-            owner=params.owner,
-            page=params.page,
-            per_page=params.per_page,
-        )
+    Pages are cached in Valkey and shared by every API server, keyed by the
+    normalized query and the registry's metadata version. Airborne flags
+    are not cached; they are looked up fresh for every response.
 
-        pages = math.ceil(total / params.per_page) if total > 0 else 1
+    With ``fields``, items carry only those fields, and only those columns
+    are read from the database.
+    """
+    status = params.status if params.status in ('airborne', 'ground') else None
+    fields = _search_fields(params)
 
-        # Check airborne status for each aircraft
-        items = []
-        for a in aircraft_list:
-            is_airborne = await redis_client.is_airborne(a.icao24)
-            item = AircraftBase.model_validate(a)
-            item.is_airborne = is_airborne
-            items.append(item)
+    key = page = None
+    if settings.search_cache_ttl > 0:
+        generation = await redis_client.get_generation() if status else None
+        key = search_key(metadata_cache.version, _canonical_query(params, status, generation, fields))
+        page = await redis_client.get_search(key)
+    if page is not None:
+        SEARCH_CACHE_HITS.inc()
+        SEARCH_CACHE_SAVED_SECONDS.inc(page["seconds"])
+    else:
+        SEARCH_CACHE_MISSES.inc()
+        started = time.perf_counter()
+        page = await _search_page(AircraftService(db), params, status, fields)
+        page["seconds"] = round(time.perf_counter() - started, 6)
+        if key is not None:
+            await redis_client.set_search(key, page, settings.search_cache_ttl)
+
+    if status:
+        airborne = [status == 'airborne'] * len(page["items"])
+    else:
+        # Check airborne status for the whole page in one round trip
+        airborne = await redis_client.airborne_many([a["icao24"] for a in page["items"]])
+    items = [
+        AircraftBase(**item, is_airborne=is_airborne)
+        for item, is_airborne in zip(page["items"], airborne)
+    ]
 
     return PaginatedResponse(
         items=items,
-        total=total,
+        total=page["total"],
+        total_exact=page["total_exact"],
         page=params.page,
         per_page=params.per_page,
-        pages=pages,
+        pages=page["pages"],
+        next_cursor=page["next_cursor"],
+        prev_cursor=page["prev_cursor"],
+    )
+
+
+@router.get("/nearby", response_model=AircraftLiveResponse)
+async def aircraft_nearby(
+    lat: float = Query(..., ge=-90, le=90, description="Latitude of the query point"),
+    lon: float = Query(..., ge=-180, le=180, description="Longitude of the query point"),
+    radius_km: float = Query(50.0, gt=0, le=2000, description="Search radius in km"),
+    limit: int = Query(100, ge=1, le=500, description="Maximum aircraft returned"),
+    extrapolate: bool = Query(False, description="Also estimate each position forward to now"),
+    db: AsyncSession = Depends(get_db),
+):
+    """Live aircraft within a radius of a point, nearest first."""
+    hits = await redis_client.search_nearby(lat, lon, radius_km, limit)
+    items = await AircraftService(db).get_live(hits, extrapolate=extrapolate)
+    return AircraftLiveResponse(items=items, count=len(items))
+
+
+@router.get("/within", response_model=AircraftLiveResponse)
+async def aircraft_within(
+    bbox: str = Query(..., description="Bounding box as lamin,lomin,lamax,lomax"),
+    limit: int = Query(100, ge=1, le=500, description="Maximum aircraft returned"),
+    extrapolate: bool = Query(False, description="Also estimate each position forward to now"),
+    db: AsyncSession = Depends(get_db),
+):
+    """Live aircraft inside a bounding box."""
+    try:
+        lamin, lomin, lamax, lomax = (float(v) for v in bbox.split(","))
+    except ValueError:
+        raise HTTPException(status_code=422, detail="bbox must be lamin,lomin,lamax,lomax")
+    if not (-90 <= lamin < lamax <= 90 and -180 <= lomin <= 180 and -180 <= lomax <= 180):
+        raise HTTPException(status_code=422, detail="bbox is out of range")
+
+    icao24s = await redis_client.search_within(lamin, lomin, lamax, lomax, limit)
+    items = await AircraftService(db).get_live(
+        [(icao24, None) for icao24 in icao24s], extrapolate=extrapolate
     )
+    return AircraftLiveResponse(items=items, count=len(items))
 
 
 @router.get("/{icao24}", response_model=AircraftWithPosition)
 async def get_aircraft(
     icao24: str,
+    extrapolate: bool = Query(False, description="Also estimate the position forward to now"),
     db: AsyncSession = Depends(get_db),
 ):
     """Get aircraft details with live position data."""
     service = AircraftService(db)
-    aircraft = await service.get_by_icao24(icao24)
+    aircraft = await service.get_by_icao24(icao24, extrapolate=extrapolate)
 
     if not aircraft:
         raise HTTPException(status_code=404, detail="Aircraft not found")
 
     return aircraft
+
+
+@router.get("/{icao24}/track", response_model=AircraftTrack)
+async def get_aircraft_track(
+    icao24: str,
+    since: int | None = Query(None, ge=0, description="Only points recorded after this Unix timestamp"),
+    max_points: int | None = Query(None, ge=1, le=1000, description="Down-sample to at most this many points"),
+):
+    """Recent track of an aircraft from its position history."""
+    points = await redis_client.get_track(icao24, since=since, max_points=max_points)
+    return AircraftTrack(icao24=icao24.lower(), points=points, count=len(points))
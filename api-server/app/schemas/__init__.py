@@ -1,18 +1,28 @@
 from app.schemas.aircraft import (
     AircraftBase,
     AircraftDetail,
+    AircraftLive,
+    AircraftLiveResponse,
     AircraftPosition,
+    AircraftTrack,
     AircraftWithPosition,
+    EstimatedPosition,
     PaginatedResponse,
+    TrackPoint,
 )
 from app.schemas.health import ServiceHealth, HealthCheckResponse
 
 __all__ = [
     "AircraftBase",
     "AircraftDetail",
+    "AircraftLive",
+    "AircraftLiveResponse",
     "AircraftPosition",
+    "AircraftTrack",
     "AircraftWithPosition",
+    "EstimatedPosition",
     "PaginatedResponse",
+    "TrackPoint",
     "ServiceHealth",
     "HealthCheckResponse",
 ]
@@ -41,6 +41,16 @@ class AircraftDetail(AircraftBase):
     category: str | None = None
 
 
+class EstimatedPosition(BaseModel):
+    """Position dead-reckoned from the last report to the time of the request."""
+
+    time: int = Field(..., description="Unix timestamp the position is estimated for")
+    longitude: float = Field(..., description="Estimated WGS-84 longitude")
+    latitude: float = Field(..., description="Estimated WGS-84 latitude")
+    baro_altitude: float | None = Field(None, description="Estimated barometric altitude in meters")
+    geo_altitude: float | None = Field(None, description="Estimated geometric altitude in meters")
+
+
 class AircraftPosition(BaseModel):
     """Real-time aircraft position from OpenSky state vector."""
 
@@ -58,6 +68,8 @@ class AircraftPosition(BaseModel):
     vertical_rate: float | None = Field(None, description="Vertical rate in m/s")
     geo_altitude: float | None = Field(None, description="Geometric altitude in meters")
     squawk: str | None = Field(None, description="Transponder code")
+    age_seconds: float | None = Field(None, description="Seconds since the position was reported (with extrapolate)")
+    estimated: EstimatedPosition | None = Field(None, description="Estimated current position (with extrapolate)")
 
 
 class AircraftWithPosition(AircraftDetail):
@@ -67,6 +79,40 @@ class AircraftWithPosition(AircraftDetail):
     is_airborne: bool = Field(False, description="Whether aircraft is currently tracked")
 
 
+class AircraftLive(AircraftBase):
+    """Tracked aircraft from a geospatial query with its live position."""
+
+    position: AircraftPosition = Field(..., description="Current position")
+    distance_km: float | None = Field(None, description="Distance from the query point in km")
+    is_airborne: bool = Field(True, description="Whether aircraft is currently tracked")
+
+
+class AircraftLiveResponse(BaseModel):
+    """Result of a geospatial query over live aircraft."""
+
+    items: list[AircraftLive]
+    count: int = Field(..., description="Number of aircraft returned")
+
+
+class TrackPoint(BaseModel):
+    """One recorded position of an aircraft."""
+
+    time: int = Field(..., description="Unix timestamp of position")
+    longitude: float = Field(..., description="WGS-84 longitude")
+    latitude: float = Field(..., description="WGS-84 latitude")
+    baro_altitude: float | None = Field(None, description="Barometric altitude in meters")
+    true_track: float | None = Field(None, description="Track angle in degrees")
+    velocity: float | None = Field(None, description="Ground speed in m/s")
+
+
+class AircraftTrack(BaseModel):
+    """Recent track of an aircraft, oldest point first."""
+
+    icao24: str = Field(..., description="ICAO 24-bit address")
+    points: list[TrackPoint]
+    count: int = Field(..., description="Number of points returned")
+
+
 class AircraftSearchParams(BaseModel):
     """Query parameters for aircraft search endpoint."""
 
@@ -79,6 +125,15 @@ class AircraftSearchParams(BaseModel):
     status: str | None = Field(None, description="Filter by flight status: 'airborne' or 'ground'")
     page: int = Field(1, ge=1, description="Page number")
     per_page: int = Field(20, ge=1, le=100, description="Items per page")
+    cursor: str | None = Field(None, description="next_cursor or prev_cursor of a previous response; replaces page")
+    fields: str | None = Field(
+        None, description="Comma-separated item fields to return, e.g. registration,model; icao24 and is_airborne always are"
+    )
+    count: str | None = Field(
+        None,
+        pattern="^(exact|capped|estimated)$",
+        description="How total is counted: 'exact', 'capped' or 'estimated' (default set by the server)",
+    )
 
     model_config = {"extra": "forbid"}
 
@@ -88,6 +143,9 @@ class PaginatedResponse(BaseModel):
 
     items: list[AircraftBase]
     total: int = Field(..., description="Total number of matching records")
+    total_exact: bool = Field(True, description="False when total is a lower bound or an estimate")
     page: int = Field(..., description="Current page number")
     per_page: int = Field(..., description="Items per page")
     pages: int = Field(..., description="Total number of pages")
+    next_cursor: str | None = Field(None, description="Cursor for the following page, if there is one")
+    prev_cursor: str | None = Field(None, description="Cursor for the preceding page, if there is one")
@@ -1,10 +1,104 @@
+import asyncio
+import base64
+import json
+import time
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import Row, String, bindparam, func, literal_column, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+from app.config import settings
 from app.models.aircraft import AircraftMetadata
-from app.schemas.aircraft import AircraftPosition, AircraftWithPosition
+from app.schemas.aircraft import (
+    AircraftBase,
+    AircraftDetail,
+    AircraftLive,
+    AircraftPosition,
+    AircraftWithPosition,
+)
+from app.services.dead_reckoning import extrapolate as dead_reckon
+from app.services.metadata_cache import MISSING, metadata_cache
 from app.services.redis_client import redis_client
 
 
+def encode_cursor(direction: str, icao24: str) -> str:
+    """Opaque cursor continuing a search ``direction`` ("next" or "prev") of an icao24."""
+    return base64.urlsafe_b64encode(f"{direction}:{icao24}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[str, str]:
+    """Split a cursor back into its direction and icao24; raises ValueError if it is not one."""
+    try:
+        decoded = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    direction, _, icao24 = decoded.partition(":")
+    if direction not in ("next", "prev") or not icao24:
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    return direction, icao24
+
+
+def contains(column, term: str):
+    """Case-insensitive substring match, with LIKE wildcards in ``term`` taken literally.
+
+    Rendered as ``ILIKE '%term%'``, which the trigram indexes on the
+    searchable columns serve for terms of three or more characters.
+    """
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return column.ilike(f"%{escaped}%", escape="\\")
+
+
+class Explain(Executable, ClauseElement):
+    """``EXPLAIN (FORMAT JSON)`` of a statement, keeping its bound parameters."""
+
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(Explain)
+def _compile_explain(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+class TotalCache:
+    """Exact search totals by normalized filters, each kept for a short time."""
+
+    def __init__(self, max_entries: int = 1024):
+        self._max_entries = max_entries
+        self._entries: dict[tuple, tuple[float, int]] = {}
+
+    def get(self, key: tuple) -> int | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires, total = entry
+        if time.monotonic() >= expires:
+            del self._entries[key]
+            return None
+        return total
+
+    def put(self, key: tuple, total: int, ttl: float):
+        now = time.monotonic()
+        if len(self._entries) >= self._max_entries:
+            self._entries = {k: v for k, v in self._entries.items() if v[0] > now}
+            if len(self._entries) >= self._max_entries:
+                # Still full of live entries: drop the oldest
+                del self._entries[next(iter(self._entries))]
+        self._entries[key] = (now + ttl, total)
+
+    def clear(self):
+        self._entries.clear()
+
+
+totals = TotalCache()
+
+
+# Columns search can return; icao24 always is
+SEARCH_FIELDS = tuple(name for name in AircraftBase.model_fields if name != "is_airborne")
+
+
 class AircraftService:
     """Business logic for aircraft operations."""
 
@@ -19,84 +113,189 @@ class AircraftService:
         model: str | None = None,
         operator: str | None = None,
         owner: str | None = None,
+        status: str | None = None,
         page: int = 1,
         per_page: int = 20,
-    ) -> tuple[list[AircraftMetadata], int]:
-        """Search aircraft with pagination."""
-        query = select(AircraftMetadata)
+        after: str | None = None,
+        before: str | None = None,
+        count: str | None = None,
+        fields: tuple[str, ...] = SEARCH_FIELDS,
+    ) -> tuple[list[Row], int, bool]:
+        """Search aircraft with pagination, ordered by icao24.
+
+        Returns the page, the total of matching aircraft and whether that
+        total is exact. Rows hold only icao24 and ``fields`` (names from
+        ``SEARCH_FIELDS``), read as plain rows rather than ORM objects, so
+        unused columns such as ``notes`` are never fetched.
 
-        # Apply filters
+        ``status`` ("airborne" or "ground") keeps only aircraft that are, or
+        are not, tracked in the current generation.
+
+        With ``after`` or ``before`` (an icao24), the page is read by key
+        rather than by offset, so deep pages cost the same as the first. One
+        row beyond the page is included if there is one, to tell the caller
+        whether there is another page that way: first with ``before``, last
+        otherwise.
+
+        ``count`` picks how the total is found, defaulting to the
+        ``search_count`` setting: "exact" counts every match, "capped" stops
+        counting after ``search_count_cap`` and "estimated" takes the query
+        planner's row estimate without counting. Exact totals are cached
+        per filter for ``search_count_cache_seconds``.
+        """
+        # Apply filters; substring matches are served by trigram indexes
+        filters = []
         if registration:
-            query = query.where(
-                AircraftMetadata.registration.ilike(f"%{registration}%")
-            )
+            filters.append(contains(AircraftMetadata.registration, registration))
         if icao24:
-            query = query.where(AircraftMetadata.icao24 == icao24.lower())
+            filters.append(AircraftMetadata.icao24 == icao24.lower())
         if manufacturer:
-            query = query.where(
-                AircraftMetadata.manufacturername.ilike(f"%{manufacturer}%")
-            )
+            filters.append(contains(AircraftMetadata.manufacturername, manufacturer))
         if model:
-            query = query.where(AircraftMetadata.model.ilike(f"%{model}%"))
+            filters.append(contains(AircraftMetadata.model, model))
         if operator:
-            query = query.where(AircraftMetadata.operator.ilike(f"%{operator}%"))
+            filters.append(contains(AircraftMetadata.operator, operator))
         if owner:
-            query = query.where(AircraftMetadata.owner.ilike(f"%{owner}%"))
+            filters.append(contains(AircraftMetadata.owner, owner))
+        if status in ("airborne", "ground"):
+            # A (semi or anti) join against the tracked set, unnested from one
+            # array parameter, so even a generic plan can hash it rather than
+            # compare every row with every tracked aircraft
+            tracked = func.unnest(
+                bindparam("tracked", list(await redis_client.get_airborne()), type_=ARRAY(String))
+            ).table_valued("icao24").render_derived(name="tracked")
+            is_tracked = (
+                select(literal_column("1"))
+                .select_from(tracked)
+                .where(tracked.c.icao24 == AircraftMetadata.icao24)
+                .exists()
+            )
+            filters.append(is_tracked if status == "airborne" else ~is_tracked)
+
+        key = (
+            registration and registration.lower(),
+            icao24 and icao24.lower(),
+            manufacturer and manufacturer.lower(),
+            model and model.lower(),
+            operator and operator.lower(),
+            owner and owner.lower(),
+            status,
+            await redis_client.get_generation() if status else None,
+        )
+        total, exact = await self._count(filters, count or settings.search_count, key)
 
-        # Get total count
-        count_query = select(func.count()).select_from(query.subquery())
-        total = await self.db.scalar(count_query)
+        columns = ["icao24", *(name for name in fields if name != "icao24")]
+        query = select(*(getattr(AircraftMetadata, name) for name in columns)).where(*filters)
 
         # Apply pagination
-        offset = (page - 1) * per_page
-        query = query.offset(offset).limit(per_page)
+        if after is not None:
+            query = query.where(AircraftMetadata.icao24 > after)
+            query = query.order_by(AircraftMetadata.icao24).limit(per_page + 1)
+        elif before is not None:
+            query = query.where(AircraftMetadata.icao24 < before)
+            query = query.order_by(AircraftMetadata.icao24.desc()).limit(per_page + 1)
+        else:
+            offset = (page - 1) * per_page
+            query = query.order_by(AircraftMetadata.icao24).offset(offset).limit(per_page + 1)
 
         result = await self.db.execute(query)
-        return result.scalars().all(), total or 0
+        rows = result.all()
+        if before is not None:
+            rows = rows[::-1]
+        return rows, total, exact
+
+    async def _count(self, filters: list, strategy: str, key: tuple) -> tuple[int, bool]:
+        """Total of aircraft matching ``filters`` and whether it is exact."""
+        if strategy == "estimated":
+            plan = await self.db.scalar(Explain(select(AircraftMetadata.icao24).where(*filters)))
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return int(plan[0]["Plan"]["Plan Rows"]), False
+
+        if strategy == "capped":
+            # Counts at most one row past the cap, so a broad filter stops early
+            cap = settings.search_count_cap
+            capped = select(literal_column("1")).select_from(AircraftMetadata).where(*filters).limit(cap + 1)
+            total = await self.db.scalar(select(func.count()).select_from(capped.subquery())) or 0
+            return min(total, cap), total <= cap
 
-    async def get_by_icao24(self, icao24: str) -> AircraftWithPosition | None:
-        """Get aircraft metadata with live position."""
-        query = select(AircraftMetadata).where(
-            AircraftMetadata.icao24 == icao24.lower()
+        total = totals.get(key)
+        if total is None:
+            # Counted straight off the table rather than a subquery of every column
+            count_query = select(func.count()).select_from(AircraftMetadata).where(*filters)
+            total = await self.db.scalar(count_query) or 0
+            if settings.search_count_cache_seconds > 0:
+                totals.put(key, total, settings.search_count_cache_seconds)
+        return total, True
+
+    async def get_by_icao24(self, icao24: str, extrapolate: bool = False) -> AircraftWithPosition | None:
+        """Get aircraft metadata with live position, estimated forward to now if ``extrapolate``."""
+        icao24 = icao24.lower()
+        # Metadata, usually from the cache, and the position are fetched together
+        aircraft, position_data = await asyncio.gather(
+            self._get_metadata(icao24), redis_client.get_aircraft_position(icao24)
         )
-        result = await self.db.execute(query)
-        aircraft = result.scalar_one_or_none()
 
         if not aircraft:
             return None
 
-        # Get live position from Redis
-        position_data = await redis_client.get_aircraft_position(icao24)
+        if position_data and extrapolate:
+            dead_reckon([position_data], time.time(), settings.extrapolate_max_seconds)
         position = AircraftPosition(**position_data) if position_data else None
 
         return AircraftWithPosition(
-            icao24=aircraft.icao24,
-            registration=aircraft.registration,
-            manufacturericao=aircraft.manufacturericao,
-            manufacturername=aircraft.manufacturername,
-            model=aircraft.model,
-            typecode=aircraft.typecode,
-            serialnumber=aircraft.serialnumber,
-            linenumber=aircraft.linenumber,
-            aircrafttype=aircraft.aircrafttype,
-            operator=aircraft.operator,
-            operatorcallsign=aircraft.operatorcallsign,
-            operatoricao=aircraft.operatoricao,
-            operatoriata=aircraft.operatoriata,
-            owner=aircraft.owner,
-            testreg=aircraft.testreg,
-            registered=aircraft.registered,
-            reguntil=aircraft.reguntil,
-            status=aircraft.status,
-            built=aircraft.built,
-            firstflightdate=aircraft.firstflightdate,
-            seatconfiguration=aircraft.seatconfiguration,
-            engines=aircraft.engines,
-            modes=aircraft.modes,
-            adsb=aircraft.adsb,
-            acars=aircraft.acars,
-            notes=aircraft.notes,
-            category=aircraft.category,
+            **aircraft.model_dump(exclude={"is_airborne"}),
             position=position,
             is_airborne=position is not None,
         )
+
+    async def _get_metadata(self, icao24: str) -> AircraftDetail | None:
+        """Registry metadata of an aircraft, from the cache when it holds it."""
+        aircraft = metadata_cache.get(icao24)
+        if aircraft is not MISSING:
+            return aircraft
+
+        version = metadata_cache.version
+        query = select(AircraftMetadata).where(AircraftMetadata.icao24 == icao24)
+        result = await self.db.execute(query)
+        row = result.scalar_one_or_none()
+        aircraft = AircraftDetail.model_validate(row) if row else None
+        metadata_cache.put(icao24, aircraft, version)
+        return aircraft
+
+    async def get_live(
+        self, hits: list[tuple[str, float | None]], extrapolate: bool = False
+    ) -> list[AircraftLive]:
+        """Join live index hits with their positions and registry metadata.
+
+        Aircraft missing from the registry are still returned with their
+        position; hits whose position has since gone are dropped. With
+        ``extrapolate``, positions are also estimated forward to now.
+        """
+        icao24s = [icao24 for icao24, _ in hits]
+        if not icao24s:
+            return []
+
+        positions = await redis_client.get_positions(icao24s)
+        if extrapolate:
+            dead_reckon(list(positions.values()), time.time(), settings.extrapolate_max_seconds)
+        query = select(AircraftMetadata).where(AircraftMetadata.icao24.in_(icao24s))
+        result = await self.db.execute(query)
+        metadata = {a.icao24: a for a in result.scalars().all()}
+
+        items = []
+        for icao24, distance in hits:
+            position = positions.get(icao24)
+            if position is None:
+                continue
+            aircraft = metadata.get(icao24)
+            base = AircraftBase.model_validate(aircraft).model_dump() if aircraft else {"icao24": icao24}
+            base.pop("is_airborne", None)
+            items.append(
+                AircraftLive(
+                    **base,
+                    position=AircraftPosition(**position),
+                    distance_km=round(distance, 3) if distance is not None else None,
+                )
+            )
+        return items
@@ -0,0 +1,64 @@
+import math
+
+EARTH_RADIUS_M = 6_371_008.8
+
+# Climbs and descents rarely hold for long, so the vertical rate is only
+# applied for this long before the altitude is held
+VERTICAL_HORIZON_SECONDS = 120.0
+
+
+def extrapolate(positions: list[dict], now: float, max_seconds: float) -> list[dict]:
+    """Estimate where each aircraft is at ``now`` by dead reckoning.
+
+    Each position is moved along a great circle from where it was reported,
+    at its ground speed and track, and gains ``age_seconds`` and
+    ``estimated`` keys in place; the reported fields are left untouched.
+    Aircraft on the ground stay where they were reported. There is no
+    estimate for positions older than ``max_seconds`` or lacking the speed
+    and track to move them.
+
+    All positions are handled in one pass, so bulk responses do not pay a
+    call per aircraft.
+    """
+    sin, cos, asin, atan2 = math.sin, math.cos, math.asin, math.atan2
+    radians, degrees = math.radians, math.degrees
+    for p in positions:
+        p["age_seconds"] = None
+        p["estimated"] = None
+        reported = p.get("time_position") or p.get("last_contact")
+        lat, lon = p.get("latitude"), p.get("longitude")
+        if reported is None or lat is None or lon is None:
+            continue
+        age = max(now - reported, 0.0)
+        p["age_seconds"] = round(age, 1)
+        if age > max_seconds:
+            continue
+
+        estimate = {
+            "time": int(now),
+            "latitude": lat,
+            "longitude": lon,
+            "baro_altitude": p.get("baro_altitude"),
+            "geo_altitude": p.get("geo_altitude"),
+        }
+        if not p.get("on_ground"):
+            velocity, track = p.get("velocity"), p.get("true_track")
+            if velocity is None or track is None:
+                continue
+            distance = velocity * age / EARTH_RADIUS_M
+            phi, theta = radians(lat), radians(track)
+            sin_phi, cos_phi = sin(phi), cos(phi)
+            sin_d, cos_d = sin(distance), cos(distance)
+            sin_phi2 = sin_phi * cos_d + cos_phi * sin_d * cos(theta)
+            estimate["latitude"] = round(degrees(asin(sin_phi2)), 5)
+            lon2 = lon + degrees(atan2(sin(theta) * sin_d * cos_phi, cos_d - sin_phi * sin_phi2))
+            estimate["longitude"] = round((lon2 + 180.0) % 360.0 - 180.0, 5)
+
+            climb = p.get("vertical_rate")
+            if climb:
+                climb *= min(age, VERTICAL_HORIZON_SECONDS)
+                for key in ("baro_altitude", "geo_altitude"):
+                    if estimate[key] is not None:
+                        estimate[key] = round(max(estimate[key] + climb, 0.0), 1)
+        p["estimated"] = estimate
+    return positions
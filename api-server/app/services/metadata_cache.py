@@ -0,0 +1,61 @@
+import time
+from collections import OrderedDict
+from app.config import settings
+from app.metrics import METADATA_CACHE_EVICTIONS, METADATA_CACHE_HITS, METADATA_CACHE_MISSES
+from app.schemas.aircraft import AircraftDetail
+
+# Returned by MetadataCache.get for aircraft it holds nothing for
+MISSING = object()
+
+
+class MetadataCache:
+    """Bounded LRU cache of registry metadata by icao24, each entry kept for ``ttl`` seconds.
+
+    The registry only changes on import, so entries are also dropped all at
+    once when the metadata version stamp moves. Aircraft not in the registry
+    are cached as ``None`` so repeated lookups of them stay off the database
+    too.
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self._max_entries = max_entries
+        self._ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, AircraftDetail | None]] = OrderedDict()
+        self.version: int | None = None
+
+    def get(self, icao24: str):
+        """The cached metadata of an aircraft, ``None`` if it is not registered, or ``MISSING``."""
+        entry = self._entries.get(icao24)
+        if entry is not None:
+            expires, aircraft = entry
+            if time.monotonic() < expires:
+                self._entries.move_to_end(icao24)
+                METADATA_CACHE_HITS.inc()
+                return aircraft
+            del self._entries[icao24]
+        METADATA_CACHE_MISSES.inc()
+        return MISSING
+
+    def put(self, icao24: str, aircraft: AircraftDetail | None, version: int | None):
+        """Cache an aircraft's metadata, read while the stamp was ``version``."""
+        if self._max_entries <= 0 or version != self.version:
+            # Read before the stamp moved, so possibly already stale
+            return
+        self._entries[icao24] = (time.monotonic() + self._ttl, aircraft)
+        self._entries.move_to_end(icao24)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+            METADATA_CACHE_EVICTIONS.inc()
+
+    def set_version(self, version: int | None):
+        """Record the current metadata version stamp, dropping every entry if it moved."""
+        if version != self.version:
+            self._entries.clear()
+            self.version = version
+
+    def clear(self):
+        self._entries.clear()
+        self.version = None
+
+
+metadata_cache = MetadataCache(settings.metadata_cache_size, settings.metadata_cache_ttl)
@@ -1,21 +1,58 @@
+import hashlib
 import json
+import math
+import time
 import redis.asyncio as redis
+from app.codec import (
+    CURRENT_GENERATION_KEY,
+    TRACK_FIELD,
+    decode_position,
+    decode_track_point,
+    geo_key,
+    live_key,
+    positions_key,
+    track_key,
+)
 from app.config import settings
 from app.metrics import CACHE_HITS, CACHE_MISSES
 
+KM_PER_DEGREE = 111.32
+
+SEARCH_KEY_PREFIX = "aircraft:search"
+
+
+def search_key(version: int | None, query: dict) -> str:
+    """Key of a cached search page, by metadata version and canonical query."""
+    digest = hashlib.sha1(json.dumps(query, sort_keys=True).encode()).hexdigest()
+    return f"{SEARCH_KEY_PREFIX}:{version}:{digest}"
+
+
+def downsample(points: list, max_points: int) -> list:
+    """Thin points to at most ``max_points`` evenly spaced ones, keeping the first and last."""
+    if len(points) <= max_points:
+        return points
+    if max_points == 1:
+        return points[-1:]
+    step = (len(points) - 1) / (max_points - 1)
+    return [points[round(i * step)] for i in range(max_points)]
+
 
 class RedisClient:
     """Async Redis client for aircraft position data."""
 
     def __init__(self):
         self._client: redis.Redis | None = None
+        self._generation: int | None = None
+        self._generation_checked = float("-inf")
+        self._airborne: tuple[int, frozenset[str]] | None = None
 
     async def connect(self):
         """Initialize Redis connection."""
         self._client = redis.Redis(
             host=settings.redis_host,
             port=settings.redis_port,
-            decode_responses=True,
+            # Positions may be binary-encoded, so values are kept as bytes
+            decode_responses=False,
         )
 
     async def disconnect(self):
@@ -23,26 +60,170 @@ class RedisClient:
         if self._client:
             await self._client.close()
 
+    async def get_generation(self) -> int | None:
+        """Return the current position generation published by adsb-sync.
+
+        Cached briefly; adsb-sync keeps the previous generation readable for
+        longer than this after switching, so a stale value still resolves.
+        """
+        now = time.monotonic()
+        if now - self._generation_checked >= settings.generation_cache_seconds:
+            value = await self._client.get(CURRENT_GENERATION_KEY)
+            self._generation = int(value) if value is not None else None
+            self._generation_checked = now
+        return self._generation
+
     async def get_aircraft_position(self, icao24: str) -> dict | None:
         """Get live position for aircraft by ICAO24."""
-        data = await self._client.get(f"aircraft:{icao24.lower()}")
+        generation = await self.get_generation()
+        data = None
+        if generation is not None:
+            data = await self._client.hget(positions_key(generation), icao24.lower())
         if data:
             CACHE_HITS.inc()
-            return json.loads(data)
+            return decode_position(data)
         CACHE_MISSES.inc()
         return None
 
     async def is_airborne(self, icao24: str) -> bool:
-        """Check if aircraft is currently tracked."""
-        return await self._client.exists(f"aircraft:{icao24.lower()}") > 0
+        """Check if aircraft is in the current generation."""
+        generation = await self.get_generation()
+        if generation is None:
+            return False
+        return bool(await self._client.sismember(live_key(generation), icao24.lower()))
+
+    async def airborne_many(self, icao24s: list[str]) -> list[bool]:
+        """Check many aircraft against the current generation in one round trip."""
+        generation = await self.get_generation()
+        if generation is None or not icao24s:
+            return [False] * len(icao24s)
+        members = await self._client.smismember(
+            live_key(generation), [icao24.lower() for icao24 in icao24s]
+        )
+        return [bool(m) for m in members]
+
+    async def get_airborne(self) -> frozenset[str]:
+        """Return every icao24 tracked in the current generation.
+
+        The set only changes when adsb-sync publishes a new generation, so it
+        is fetched once per generation and reused until then.
+        """
+        generation = await self.get_generation()
+        if generation is None:
+            return frozenset()
+        if self._airborne is None or self._airborne[0] != generation:
+            members = await self._client.smembers(live_key(generation))
+            self._airborne = (generation, frozenset(m.decode() for m in members))
+        return self._airborne[1]
 
     async def get_tracked_count(self) -> int:
-        """Return the number of aircraft keys currently in Redis."""
+        """Return the number of aircraft in the current generation."""
         try:
-            return await self._client.dbsize()
+            generation = await self.get_generation()
+            if generation is None:
+                return 0
+            return await self._client.scard(live_key(generation))
         except Exception:
             return 0
 
+    async def get_positions(self, icao24s: list[str]) -> dict[str, dict]:
+        """Get live positions for many aircraft in one round trip."""
+        generation = await self.get_generation()
+        if generation is None or not icao24s:
+            return {}
+        values = await self._client.hmget(
+            positions_key(generation), [icao24.lower() for icao24 in icao24s]
+        )
+        return {
+            icao24: decode_position(value)
+            for icao24, value in zip(icao24s, values)
+            if value
+        }
+
+    async def search_nearby(
+        self, latitude: float, longitude: float, radius_km: float, limit: int
+    ) -> list[tuple[str, float]]:
+        """Return (icao24, distance_km) for aircraft within a radius, nearest first."""
+        generation = await self.get_generation()
+        if generation is None:
+            return []
+        hits = await self._client.geosearch(
+            geo_key(generation),
+            longitude=longitude,
+            latitude=latitude,
+            radius=radius_km,
+            unit="km",
+            sort="ASC",
+            count=limit,
+            withdist=True,
+        )
+        return [(member.decode(), float(dist)) for member, dist in hits]
+
+    async def search_within(
+        self, lamin: float, lomin: float, lamax: float, lomax: float, limit: int
+    ) -> list[str]:
+        """Return icao24s of aircraft inside a bounding box.
+
+        GEOSEARCH boxes are measured in km around a centre, so the box is
+        sized to cover the bounding box at its widest latitude and the hits
+        are then filtered to the exact bounds. A box crossing the
+        antimeridian (``lomin > lomax``) is searched as two halves.
+        """
+        generation = await self.get_generation()
+        if generation is None:
+            return []
+
+        spans = [(lomin, lomax)] if lomin <= lomax else [(lomin, 180.0), (-180.0, lomax)]
+        widest = 0.0 if lamin <= 0 <= lamax else min(abs(lamin), abs(lamax))
+        icao24s = []
+        for west, east in spans:
+            hits = await self._client.geosearch(
+                geo_key(generation),
+                longitude=(west + east) / 2,
+                latitude=(lamin + lamax) / 2,
+                width=(east - west) * KM_PER_DEGREE * math.cos(math.radians(widest)),
+                height=(lamax - lamin) * KM_PER_DEGREE,
+                unit="km",
+                sort="ASC",
+                withcoord=True,
+            )
+            icao24s.extend(
+                member.decode()
+                for member, (lon, lat) in hits
+                if lamin <= lat <= lamax and west <= lon <= east
+            )
+        return icao24s[:limit]
+
+    async def get_track(
+        self, icao24: str, since: int | None = None, max_points: int | None = None
+    ) -> list[dict]:
+        """Return the recorded track of an aircraft, oldest point first.
+
+        ``since`` is a Unix timestamp; stream entry IDs are the time of each
+        position, so it selects the range without decoding older points.
+        """
+        start = f"{since * 1000}" if since else "-"
+        entries = await self._client.xrange(track_key(icao24.lower()), min=start, max="+")
+        points = [decode_track_point(fields[TRACK_FIELD.encode()]) for _, fields in entries]
+        if max_points:
+            points = downsample(points, max_points)
+        return points
+
+    async def get_search(self, key: str) -> dict | None:
+        """Return a cached search page, or None if it is not cached or Valkey is unavailable."""
+        try:
+            data = await self._client.get(key)
+        except redis.RedisError:
+            return None
+        return json.loads(data) if data else None
+
+    async def set_search(self, key: str, page: dict, ttl: int):
+        """Cache a search page for ``ttl`` seconds; failing to is not an error."""
+        try:
+            await self._client.set(key, json.dumps(page, separators=(",", ":")), ex=ttl)
+        except redis.RedisError:
+            pass
+
     async def ping(self) -> bool:
         """Health check for Redis connection."""
         try:
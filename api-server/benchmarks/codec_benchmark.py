@@ -0,0 +1,64 @@
+"""Microbenchmark comparing the JSON and binary position codecs.
+
+Run from the api-server directory:
+
+    python -m benchmarks.codec_benchmark [--records 10000] [--repeat 5]
+"""
+import argparse
+import json
+import random
+import timeit
+
+from app.codec import decode_position, encode_position
+
+
+def make_records(n: int) -> list[dict]:
+    """Build plausible position records resembling an OpenSky snapshot."""
+    rng = random.Random(42)
+    countries = ["United States", "Germany", "United Kingdom", "China", "Brazil", "Côte d'Ivoire"]
+    records = []
+    for i in range(n):
+        records.append({
+            "icao24": f"{rng.randrange(0x1000000):06x}",
+            "callsign": f"{rng.choice(['BAW', 'DLH', 'UAL', 'N'])}{rng.randrange(10000)}",
+            "origin_country": rng.choice(countries),
+            "time_position": 1700000000 + rng.randrange(60),
+            "last_contact": 1700000000 + rng.randrange(60),
+            "longitude": round(rng.uniform(-180, 180), 4),
+            "latitude": round(rng.uniform(-85, 85), 4),
+            "baro_altitude": round(rng.uniform(0, 12000), 2),
+            "on_ground": i % 10 == 0,
+            "velocity": round(rng.uniform(0, 300), 2),
+            "true_track": round(rng.uniform(0, 360), 2),
+            "vertical_rate": round(rng.uniform(-20, 20), 2),
+            "geo_altitude": round(rng.uniform(0, 12500), 2) if i % 7 else None,
+            "squawk": f"{rng.randrange(8000):04d}" if i % 5 else None,
+        })
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    records = make_records(args.records)
+    codecs = {
+        "json": (lambda d: json.dumps(d).encode("utf-8"), json.loads),
+        "binary": (encode_position, decode_position),
+    }
+
+    print(f"{args.records} records, best of {args.repeat}")
+    print(f"{'codec':<8}{'bytes/rec':>12}{'encode us/rec':>16}{'decode us/rec':>16}")
+    for name, (encode, decode) in codecs.items():
+        encoded = [encode(r) for r in records]
+        size = sum(len(e) for e in encoded) / len(encoded)
+        enc = min(timeit.repeat(lambda: [encode(r) for r in records], number=1, repeat=args.repeat))
+        dec = min(timeit.repeat(lambda: [decode(e) for e in encoded], number=1, repeat=args.repeat))
+        per = 1e6 / len(records)
+        print(f"{name:<8}{size:>12.1f}{enc * per:>16.2f}{dec * per:>16.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,27 @@
 """Shared test fixtures for API server tests."""
 import pytest
+from collections import namedtuple
 from unittest.mock import AsyncMock, MagicMock, patch
 from fastapi.testclient import TestClient
 
 from app.main import app
 from app.database import get_db
 from app.models.aircraft import AircraftMetadata
+from app.services.aircraft import SEARCH_FIELDS, totals
+from app.services.metadata_cache import metadata_cache
+
+# Stands in for the rows search reads, which have the same attributes and _asdict()
+SearchRow = namedtuple("SearchRow", SEARCH_FIELDS)
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """Keep cached search totals and metadata from leaking between tests."""
+    totals.clear()
+    metadata_cache.clear()
+    yield
+    totals.clear()
+    metadata_cache.clear()
 
 
 @pytest.fixture
@@ -77,6 +93,21 @@ def sample_aircraft_list(sample_aircraft):
     return [sample_aircraft, aircraft2]
 
 
+@pytest.fixture
+def sample_row(sample_aircraft):
+    """Sample aircraft as a search row of its list fields."""
+    return SearchRow(**{name: getattr(sample_aircraft, name) for name in SEARCH_FIELDS})
+
+
+@pytest.fixture
+def sample_row_list(sample_aircraft_list):
+    """Sample aircraft as search rows."""
+    return [
+        SearchRow(**{name: getattr(aircraft, name) for name in SEARCH_FIELDS})
+        for aircraft in sample_aircraft_list
+    ]
+
+
 @pytest.fixture
 def sample_position_data():
     """Create sample aircraft position data."""
@@ -112,6 +143,9 @@ def mock_redis_client():
     client.get.return_value = None
     client.exists.return_value = 0
     client.ping.return_value = True
+    client.airborne_many.side_effect = lambda icao24s: [False] * len(icao24s)
+    client.get_generation.return_value = 1
+    client.get_search.return_value = None
     return client
 
 
@@ -2,96 +2,90 @@
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 import json
+import time
+from sqlalchemy.dialects import postgresql
 
-from app.services.aircraft import AircraftService
+from app.services.aircraft import SEARCH_FIELDS, AircraftService
+from app.services.dead_reckoning import extrapolate
+from app.services.metadata_cache import MISSING, MetadataCache, metadata_cache
 
 
 class TestAircraftServiceSearch:
     """Tests for AircraftService.search() method."""
 
     @pytest.mark.asyncio
-    async def test_search_no_filters(self, mock_db_session, sample_aircraft_list):
+    async def test_search_no_filters(self, mock_db_session, sample_row_list):
         """Test search without any filters returns all results."""
         mock_result = MagicMock()
-        mock_scalars = MagicMock()
-        mock_scalars.all.return_value = sample_aircraft_list
-        mock_result.scalars.return_value = mock_scalars
+        mock_result.all.return_value = sample_row_list
 
         mock_db_session.execute = AsyncMock(return_value=mock_result)
         mock_db_session.scalar = AsyncMock(return_value=2)
 
         service = AircraftService(mock_db_session)
-        results, total = await service.search()
+        results, total, _ = await service.search()
 
         assert len(results) == 2
         assert total == 2
         assert mock_db_session.execute.called
 
     @pytest.mark.asyncio
-    async def test_search_with_registration_filter(self, mock_db_session, sample_aircraft):
+    async def test_search_with_registration_filter(self, mock_db_session, sample_row):
         """Test search with registration filter."""
         mock_result = MagicMock()
-        mock_scalars = MagicMock()
-        mock_scalars.all.return_value = [sample_aircraft]
-        mock_result.scalars.return_value = mock_scalars
+        mock_result.all.return_value = [sample_row]
 
         mock_db_session.execute = AsyncMock(return_value=mock_result)
         mock_db_session.scalar = AsyncMock(return_value=1)
 
         service = AircraftService(mock_db_session)
-        results, total = await service.search(registration="N12345")
+        results, total, _ = await service.search(registration="N12345")
 
         assert len(results) == 1
         assert results[0].registration == "N12345"
 
     @pytest.mark.asyncio
-    async def test_search_with_manufacturer_filter(self, mock_db_session, sample_aircraft):
+    async def test_search_with_manufacturer_filter(self, mock_db_session, sample_row):
         """Test search with manufacturer filter."""
         mock_result = MagicMock()
-        mock_scalars = MagicMock()
-        mock_scalars.all.return_value = [sample_aircraft]
-        mock_result.scalars.return_value = mock_scalars
+        mock_result.all.return_value = [sample_row]
 
         mock_db_session.execute = AsyncMock(return_value=mock_result)
         mock_db_session.scalar = AsyncMock(return_value=1)
 
         service = AircraftService(mock_db_session)
-        results, total = await service.search(manufacturer="Boeing")
+        results, total, _ = await service.search(manufacturer="Boeing")
 
         assert len(results) == 1
         assert results[0].manufacturername == "Boeing"
 
     @pytest.mark.asyncio
-    async def test_search_with_icao24_filter(self, mock_db_session, sample_aircraft):
+    async def test_search_with_icao24_filter(self, mock_db_session, sample_row):
         """Test search with icao24 filter converts to lowercase."""
         mock_result = MagicMock()
-        mock_scalars = MagicMock()
-        mock_scalars.all.return_value = [sample_aircraft]
-        mock_result.scalars.return_value = mock_scalars
+        mock_result.all.return_value = [sample_row]
 
         mock_db_session.execute = AsyncMock(return_value=mock_result)
         mock_db_session.scalar = AsyncMock(return_value=1)
 
         service = AircraftService(mock_db_session)
-        results, total = await service.search(icao24="ABC123")
+        results, total, _ = await service.search(icao24="ABC123")
 
         assert len(results) == 1
         # Verify execute was called (query was built)
         assert mock_db_session.execute.called
 
     @pytest.mark.asyncio
-    async def test_search_with_multiple_filters(self, mock_db_session, sample_aircraft):
+    async def test_search_with_multiple_filters(self, mock_db_session, sample_row):
         """Test search with multiple filters combined."""
         mock_result = MagicMock()
-        mock_scalars = MagicMock()
-        mock_scalars.all.return_value = [sample_aircraft]
-        mock_result.scalars.return_value = mock_scalars
+        mock_result.all.return_value = [sample_row]
 
         mock_db_session.execute = AsyncMock(return_value=mock_result)
         mock_db_session.scalar = AsyncMock(return_value=1)
 
         service = AircraftService(mock_db_session)
-        results, total = await service.search(
+        results, total, _ = await service.search(
             manufacturer="Boeing",
             operator="Test Airlines"
         )
@@ -99,35 +93,31 @@ class TestAircraftServiceSearch:
         assert len(results) == 1
 
     @pytest.mark.asyncio
-    async def test_search_pagination_first_page(self, mock_db_session, sample_aircraft_list):
+    async def test_search_pagination_first_page(self, mock_db_session, sample_row_list):
         """Test search pagination returns correct offset for first page."""
         mock_result = MagicMock()
-        mock_scalars = MagicMock()
-        mock_scalars.all.return_value = sample_aircraft_list
-        mock_result.scalars.return_value = mock_scalars
+        mock_result.all.return_value = sample_row_list
 
         mock_db_session.execute = AsyncMock(return_value=mock_result)
         mock_db_session.scalar = AsyncMock(return_value=50)
 
         service = AircraftService(mock_db_session)
-        results, total = await service.search(page=1, per_page=20)
+        results, total, _ = await service.search(page=1, per_page=20)
 
         assert total == 50
         assert mock_db_session.execute.called
 
     @pytest.mark.asyncio
-    async def test_search_pagination_second_page(self, mock_db_session, sample_aircraft_list):
+    async def test_search_pagination_second_page(self, mock_db_session, sample_row_list):
         """Test search pagination calculates correct offset for page 2."""
         mock_result = MagicMock()
-        mock_scalars = MagicMock()
-        mock_scalars.all.return_value = sample_aircraft_list
-        mock_result.scalars.return_value = mock_scalars
+        mock_result.all.return_value = sample_row_list
 
         mock_db_session.execute = AsyncMock(return_value=mock_result)
         mock_db_session.scalar = AsyncMock(return_value=50)
 
         service = AircraftService(mock_db_session)
-        results, total = await service.search(page=2, per_page=20)
+        results, total, _ = await service.search(page=2, per_page=20)
 
         # Offset should be (2-1) * 20 = 20
         assert mock_db_session.execute.called
@@ -136,19 +126,185 @@ class TestAircraftServiceSearch:
     async def test_search_empty_results(self, mock_db_session):
         """Test search returns empty list when no matches."""
         mock_result = MagicMock()
-        mock_scalars = MagicMock()
-        mock_scalars.all.return_value = []
-        mock_result.scalars.return_value = mock_scalars
+        mock_result.all.return_value = []
 
         mock_db_session.execute = AsyncMock(return_value=mock_result)
         mock_db_session.scalar = AsyncMock(return_value=0)
 
         service = AircraftService(mock_db_session)
-        results, total = await service.search(manufacturer="NonExistent")
+        results, total, _ = await service.search(manufacturer="NonExistent")
 
         assert len(results) == 0
         assert total == 0
 
+    @pytest.mark.asyncio
+    async def test_search_substring_filters_are_index_friendly(self, mock_db_session):
+        """Test substring filters render as ILIKE with wildcards escaped, counted off the table."""
+        mock_result = MagicMock()
+        mock_result.all.return_value = []
+
+        mock_db_session.execute = AsyncMock(return_value=mock_result)
+        mock_db_session.scalar = AsyncMock(return_value=0)
+
+        service = AircraftService(mock_db_session)
+        await service.search(registration="N1_%")
+
+        count = mock_db_session.scalar.call_args.args[0].compile(dialect=postgresql.dialect())
+        assert "aircraft_metadata.registration ILIKE" in str(count)
+        assert "FROM aircraft_metadata" in str(count)
+        assert "anon" not in str(count)
+        assert list(count.params.values()) == ["%N1\\_\\%%"]
+
+    @pytest.mark.asyncio
+    async def test_search_keyset_pages(self, mock_db_session, sample_row_list):
+        """Test keyset pages seek by icao24 and read one row ahead, ascending either way."""
+        mock_result = MagicMock()
+        mock_result.all.return_value = list(reversed(sample_row_list))
+
+        mock_db_session.execute = AsyncMock(return_value=mock_result)
+        mock_db_session.scalar = AsyncMock(return_value=2)
+
+        service = AircraftService(mock_db_session)
+        results, _, _ = await service.search(per_page=1, before="fff000")
+
+        assert [a.icao24 for a in results] == ["abc123", "def456"]
+        query = mock_db_session.execute.call_args.args[0].compile(dialect=postgresql.dialect())
+        assert "aircraft_metadata.icao24 < %(icao24_1)s" in str(query)
+        assert "ORDER BY aircraft_metadata.icao24 DESC" in str(query)
+        assert "OFFSET" not in str(query)
+        assert query.params["param_1"] == 2
+
+    @pytest.mark.asyncio
+    async def test_search_selects_only_list_columns(self, mock_db_session):
+        """Test search reads the requested columns as rows, never the whole entity."""
+        mock_result = MagicMock()
+        mock_result.all.return_value = []
+
+        mock_db_session.execute = AsyncMock(return_value=mock_result)
+        mock_db_session.scalar = AsyncMock(return_value=0)
+
+        service = AircraftService(mock_db_session)
+        await service.search()
+        full = mock_db_session.execute.call_args.args[0]
+        await service.search(fields=("model", "registration"))
+        sparse = mock_db_session.execute.call_args.args[0]
+
+        assert [c.name for c in full.selected_columns] == ["icao24", *SEARCH_FIELDS[1:]]
+        assert "notes" not in str(full)
+        assert [c.name for c in sparse.selected_columns] == ["icao24", "model", "registration"]
+
+    @pytest.mark.asyncio
+    async def test_search_exact_total_cached(self, mock_db_session):
+        """Test exact totals are reused for the same filters, whatever their case."""
+        mock_result = MagicMock()
+        mock_result.all.return_value = []
+
+        mock_db_session.execute = AsyncMock(return_value=mock_result)
+        mock_db_session.scalar = AsyncMock(return_value=42)
+
+        service = AircraftService(mock_db_session)
+        _, first, _ = await service.search(manufacturer="Boeing", count="exact")
+        _, second, exact = await service.search(manufacturer="BOEING", page=3, count="exact")
+        await service.search(manufacturer="Airbus", count="exact")
+
+        assert first == second == 42
+        assert exact is True
+        assert mock_db_session.scalar.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_search_capped_total(self, mock_db_session):
+        """Test a capped count reads at most one row past the cap."""
+        mock_result = MagicMock()
+        mock_result.all.return_value = []
+
+        mock_db_session.execute = AsyncMock(return_value=mock_result)
+        mock_db_session.scalar = AsyncMock(return_value=101)
+
+        service = AircraftService(mock_db_session)
+        with patch("app.services.aircraft.settings.search_count_cap", 100):
+            _, total, exact = await service.search(operator="Air", count="capped")
+
+        assert (total, exact) == (100, False)
+        count = mock_db_session.scalar.call_args.args[0].compile(dialect=postgresql.dialect())
+        assert "LIMIT %(param_1)s" in str(count)
+        assert count.params["param_1"] == 101
+
+    @pytest.mark.asyncio
+    async def test_search_estimated_total(self, mock_db_session):
+        """Test an estimated total comes from the planner without counting."""
+        mock_result = MagicMock()
+        mock_result.all.return_value = []
+
+        mock_db_session.execute = AsyncMock(return_value=mock_result)
+        mock_db_session.scalar = AsyncMock(return_value=json.dumps([{"Plan": {"Plan Rows": 1234}}]))
+
+        service = AircraftService(mock_db_session)
+        _, total, exact = await service.search(model="737", count="estimated")
+
+        assert (total, exact) == (1234, False)
+        explain = str(mock_db_session.scalar.call_args.args[0].compile(dialect=postgresql.dialect()))
+        assert explain.startswith("EXPLAIN (FORMAT JSON) SELECT aircraft_metadata.icao24")
+        assert "count(" not in explain
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("status, operator", [("airborne", "AND (EXISTS"), ("ground", "AND NOT (EXISTS")])
+    async def test_search_status_filter_in_sql(self, mock_db_session, status, operator):
+        """Test the status filter is a join in SQL against the unnested tracked set."""
+        mock_result = MagicMock()
+        mock_result.all.return_value = []
+
+        mock_db_session.execute = AsyncMock(return_value=mock_result)
+        mock_db_session.scalar = AsyncMock(return_value=0)
+
+        mock_redis = MagicMock()
+        mock_redis.get_airborne = AsyncMock(return_value=frozenset({"abc123", "def456"}))
+        mock_redis.get_generation = AsyncMock(return_value=7)
+
+        with patch("app.services.aircraft.redis_client", mock_redis):
+            service = AircraftService(mock_db_session)
+            await service.search(manufacturer="Boeing", status=status)
+
+        for call in (mock_db_session.execute.call_args, mock_db_session.scalar.call_args):
+            compiled = call.args[0].compile(dialect=postgresql.dialect())
+            assert f"{operator} (SELECT 1 \nFROM unnest(%(tracked)s::VARCHAR[]) AS tracked(icao24)" in str(compiled)
+            assert "tracked.icao24 = aircraft_metadata.icao24" in str(compiled)
+            assert sorted(compiled.params["tracked"]) == ["abc123", "def456"]
+
+
+class TestMetadataCache:
+    """Tests for the in-process metadata cache."""
+
+    def test_evicts_least_recently_used(self):
+        """Test the entry used longest ago is evicted once the cache is full."""
+        cache = MetadataCache(max_entries=2, ttl=60)
+        cache.put("aaa111", None, None)
+        cache.put("bbb222", None, None)
+        cache.get("aaa111")
+        cache.put("ccc333", None, None)
+
+        assert cache.get("aaa111") is None
+        assert cache.get("bbb222") is MISSING
+        assert cache.get("ccc333") is None
+
+    def test_entries_expire(self):
+        """Test entries are not served after their TTL."""
+        cache = MetadataCache(max_entries=10, ttl=60)
+        cache.put("aaa111", None, None)
+
+        with patch("app.services.metadata_cache.time.monotonic", return_value=time.monotonic() + 61):
+            assert cache.get("aaa111") is MISSING
+
+    def test_stale_reads_not_cached(self):
+        """Test metadata read before the version stamp moved is not cached."""
+        cache = MetadataCache(max_entries=10, ttl=60)
+        cache.set_version(1)
+        cache.put("aaa111", None, 1)
+        cache.set_version(2)
+        cache.put("bbb222", None, 1)
+
+        assert cache.get("aaa111") is MISSING
+        assert cache.get("bbb222") is MISSING
+
 
 class TestAircraftServiceGetByIcao24:
     """Tests for AircraftService.get_by_icao24() method."""
@@ -194,6 +350,31 @@ class TestAircraftServiceGetByIcao24:
         assert result.position is not None
         assert result.position.latitude == 37.7749
 
+    @pytest.mark.asyncio
+    async def test_get_by_icao24_extrapolated(
+        self, mock_db_session, sample_aircraft, sample_position_data
+    ):
+        """Test get_by_icao24 estimates the position forward to now, keeping the report."""
+        mock_result = MagicMock()
+        mock_result.scalar_one_or_none.return_value = sample_aircraft
+        mock_db_session.execute = AsyncMock(return_value=mock_result)
+
+        mock_redis = MagicMock()
+        mock_redis.get_aircraft_position = AsyncMock(return_value=sample_position_data)
+
+        with patch("app.services.aircraft.redis_client", mock_redis), \
+                patch("app.services.aircraft.time.time", return_value=1699999999 + 60):
+            service = AircraftService(mock_db_session)
+            result = await service.get_by_icao24("abc123", extrapolate=True)
+
+        position = result.position
+        assert position.latitude == 37.7749
+        assert position.age_seconds == 60
+        # 250 m/s due south for a minute is 15 km, about 0.135 degrees of latitude
+        assert position.estimated.time == 1699999999 + 60
+        assert position.estimated.latitude == pytest.approx(37.7749 - 0.1349, abs=1e-3)
+        assert position.estimated.longitude == pytest.approx(-122.4194, abs=1e-6)
+
     @pytest.mark.asyncio
     async def test_get_by_icao24_not_found(self, mock_db_session):
         """Test get_by_icao24 when aircraft doesn't exist."""
@@ -201,11 +382,39 @@ class TestAircraftServiceGetByIcao24:
         mock_result.scalar_one_or_none.return_value = None
         mock_db_session.execute = AsyncMock(return_value=mock_result)
 
-        service = AircraftService(mock_db_session)
-        result = await service.get_by_icao24("nonexistent")
+        mock_redis = MagicMock()
+        mock_redis.get_aircraft_position = AsyncMock(return_value=None)
+
+        with patch("app.services.aircraft.redis_client", mock_redis):
+            service = AircraftService(mock_db_session)
+            result = await service.get_by_icao24("nonexistent")
 
         assert result is None
 
+    @pytest.mark.asyncio
+    async def test_get_by_icao24_metadata_cached(self, mock_db_session, sample_aircraft):
+        """Test repeated lookups are served from the metadata cache until the version stamp moves."""
+        mock_result = MagicMock()
+        mock_result.scalar_one_or_none.return_value = sample_aircraft
+        mock_db_session.execute = AsyncMock(return_value=mock_result)
+
+        mock_redis = MagicMock()
+        mock_redis.get_aircraft_position = AsyncMock(return_value=None)
+
+        with patch("app.services.aircraft.redis_client", mock_redis):
+            service = AircraftService(mock_db_session)
+            first = await service.get_by_icao24("abc123")
+            second = await service.get_by_icao24("ABC123")
+            assert mock_db_session.execute.await_count == 1
+
+            metadata_cache.set_version(2)
+            await service.get_by_icao24("abc123")
+
+        assert first == second
+        assert second.registration == "N12345"
+        assert mock_db_session.execute.await_count == 2
+        assert mock_redis.get_aircraft_position.await_count == 3
+
     @pytest.mark.asyncio
     async def test_get_by_icao24_lowercase_conversion(self, mock_db_session, sample_aircraft):
         """Test that icao24 is converted to lowercase before query."""
@@ -223,3 +432,88 @@ class TestAircraftServiceGetByIcao24:
         assert result is not None
         # Redis should be called with lowercase
         mock_redis.get_aircraft_position.assert_called()
+
+
+class TestAircraftServiceGetLive:
+    """Tests for AircraftService.get_live() method."""
+
+    @pytest.mark.asyncio
+    async def test_get_live_joins_metadata_and_positions(
+        self, mock_db_session, sample_aircraft, sample_position_data
+    ):
+        """Test that hits are joined in order and unknown aircraft keep their position."""
+        mock_result = MagicMock()
+        mock_scalars = MagicMock()
+        mock_scalars.all.return_value = [sample_aircraft]
+        mock_result.scalars.return_value = mock_scalars
+        mock_db_session.execute = AsyncMock(return_value=mock_result)
+
+        unknown = dict(sample_position_data, icao24="fff000")
+        mock_redis = MagicMock()
+        mock_redis.get_positions = AsyncMock(
+            return_value={"abc123": sample_position_data, "fff000": unknown}
+        )
+
+        with patch("app.services.aircraft.redis_client", mock_redis):
+            service = AircraftService(mock_db_session)
+            result = await service.get_live([("fff000", 0.5), ("abc123", 2.0), ("gone00", 3.0)])
+
+        assert [a.icao24 for a in result] == ["fff000", "abc123"]
+        assert result[0].registration is None
+        assert result[1].registration == "N12345"
+        assert result[1].position.latitude == 37.7749
+        assert result[1].distance_km == 2.0
+        assert all(a.is_airborne for a in result)
+
+    @pytest.mark.asyncio
+    async def test_get_live_no_hits(self, mock_db_session):
+        """Test that an empty hit list does not touch the database."""
+        mock_db_session.execute = AsyncMock()
+
+        service = AircraftService(mock_db_session)
+        result = await service.get_live([])
+
+        assert result == []
+        mock_db_session.execute.assert_not_called()
+
+
+class TestDeadReckoning:
+    """Tests for dead-reckoning position extrapolation."""
+
+    def test_not_extrapolated_when_stationary_on_ground(self, sample_position_data):
+        """Test aircraft on the ground are estimated where they were reported."""
+        position = dict(sample_position_data, on_ground=True)
+        (result,) = extrapolate([position], 1699999999 + 300, max_seconds=2100)
+
+        assert result["age_seconds"] == 300
+        assert result["estimated"]["latitude"] == 37.7749
+        assert result["estimated"]["longitude"] == -122.4194
+
+    def test_too_old_has_age_but_no_estimate(self, sample_position_data):
+        """Test positions older than the horizon are not extrapolated."""
+        (result,) = extrapolate([dict(sample_position_data)], 1699999999 + 3000, max_seconds=2100)
+
+        assert result["age_seconds"] == 3000
+        assert result["estimated"] is None
+
+    def test_missing_velocity_has_no_estimate(self, sample_position_data):
+        """Test airborne positions without a speed cannot be moved."""
+        position = dict(sample_position_data, velocity=None)
+        (result,) = extrapolate([position], 1699999999 + 60, max_seconds=2100)
+
+        assert result["estimated"] is None
+
+    def test_vertical_rate_applied_briefly(self, sample_position_data):
+        """Test climbs are only extrapolated for a short horizon."""
+        position = dict(sample_position_data, vertical_rate=10.0)
+        (result,) = extrapolate([position], 1699999999 + 600, max_seconds=2100)
+
+        assert result["estimated"]["baro_altitude"] == 10000.0 + 10.0 * 120
+        assert result["estimated"]["geo_altitude"] == 10050.0 + 10.0 * 120
+
+    def test_wraps_across_antimeridian(self, sample_position_data):
+        """Test eastbound aircraft crossing 180 degrees come out near -180."""
+        position = dict(sample_position_data, latitude=0.0, longitude=179.99, true_track=90.0)
+        (result,) = extrapolate([position], 1699999999 + 60, max_seconds=2100)
+
+        assert result["estimated"]["longitude"] == pytest.approx(-179.875, abs=1e-3)
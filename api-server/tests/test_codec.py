@@ -0,0 +1,118 @@
+"""Tests for the shared position codec."""
+from pathlib import Path
+import json
+import pytest
+
+from app import codec
+from app.codec import (
+    MAGIC,
+    decode_changes,
+    decode_position,
+    decode_track_point,
+    encode_changes,
+    encode_position,
+    encode_track_point,
+)
+
+
+class TestPositionCodec:
+    """Tests for encode_position() and decode_position()."""
+
+    def test_binary_round_trip(self, sample_position_data):
+        """Test that a full record survives binary encoding unchanged."""
+        encoded = encode_position(sample_position_data)
+
+        assert encoded[0] == MAGIC
+        assert decode_position(encoded) == sample_position_data
+
+    def test_binary_is_smaller_than_json(self, sample_position_data):
+        """Test that the binary form drops the repeated field names."""
+        encoded = encode_position(sample_position_data)
+
+        assert len(encoded) < len(json.dumps(sample_position_data)) / 2
+
+    def test_null_fields_round_trip(self, sample_position_data):
+        """Test that missing values decode as None, not zero."""
+        data = dict(
+            sample_position_data,
+            callsign=None,
+            squawk=None,
+            latitude=None,
+            longitude=None,
+            time_position=None,
+            on_ground=True,
+        )
+
+        assert decode_position(encode_position(data)) == data
+
+    def test_non_ascii_country(self, sample_position_data):
+        """Test that origin_country is stored as UTF-8."""
+        data = dict(sample_position_data, origin_country="Côte d'Ivoire")
+
+        assert decode_position(encode_position(data)) == data
+
+    def test_oversized_field_falls_back_to_json(self, sample_position_data):
+        """Test that records that do not fit the layout are stored as JSON."""
+        data = dict(sample_position_data, callsign="TOOLONGCALL")
+        encoded = encode_position(data)
+
+        assert json.loads(encoded) == data
+        assert decode_position(encoded) == data
+
+    def test_decodes_legacy_json_str(self, sample_position_data):
+        """Test that JSON text written by older adsb-sync versions is readable."""
+        assert decode_position(json.dumps(sample_position_data)) == sample_position_data
+
+    def test_decodes_legacy_json_bytes(self, sample_position_data):
+        """Test that JSON values read as bytes are readable."""
+        raw = json.dumps(sample_position_data).encode("utf-8")
+
+        assert decode_position(raw) == sample_position_data
+
+    def test_unknown_version_rejected(self, sample_position_data):
+        """Test that a newer encoding version is not silently misread."""
+        encoded = bytearray(encode_position(sample_position_data))
+        encoded[1] = 99
+
+        with pytest.raises(ValueError):
+            decode_position(bytes(encoded))
+
+    def test_track_point_round_trip(self, sample_position_data):
+        """Test that a track point keeps time, position and the optional extras."""
+        point = decode_track_point(encode_track_point(sample_position_data))
+
+        assert point["time"] == sample_position_data["time_position"]
+        assert point["longitude"] == sample_position_data["longitude"]
+        assert point["latitude"] == sample_position_data["latitude"]
+        assert point["baro_altitude"] == pytest.approx(sample_position_data["baro_altitude"])
+        assert point["velocity"] == pytest.approx(sample_position_data["velocity"])
+
+    def test_track_point_unknown_extras(self, sample_position_data):
+        """Test that missing altitude, track and speed decode as None."""
+        data = {**sample_position_data, "baro_altitude": None, "true_track": None, "velocity": None}
+        point = decode_track_point(encode_track_point(data))
+
+        assert point["baro_altitude"] is None
+        assert point["true_track"] is None
+        assert point["velocity"] is None
+
+    def test_changes_round_trip(self):
+        """Test that a change set survives the stream field encoding."""
+        fields = encode_changes(9, False, ["abc123"], ["def456", "fed654"], [])
+        raw = {k.encode(): str(v).encode() for k, v in fields.items()}
+
+        assert decode_changes(raw) == {
+            "generation": 9,
+            "full": False,
+            "appeared": ["abc123"],
+            "moved": ["def456", "fed654"],
+            "disappeared": [],
+        }
+
+    def test_matches_adsb_sync_copy(self):
+        """Test that the writer's copy of the codec is identical to the reader's."""
+        writer_copy = Path(__file__).parents[2] / "adsb-sync" / "app" / "codec.py"
+        if not writer_copy.exists():
+            pytest.skip("adsb-sync sources not available")
+
+        assert writer_copy.read_text() == Path(codec.__file__).read_text()
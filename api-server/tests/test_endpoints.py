@@ -1,7 +1,10 @@
 """Tests for API endpoints."""
 import pytest
+from collections import namedtuple
 from unittest.mock import patch, AsyncMock, MagicMock
 
+from app.services.aircraft import decode_cursor, encode_cursor
+
 
 class TestRootEndpoint:
     """Tests for the root endpoint."""
@@ -62,13 +65,11 @@ class TestHealthEndpoints:
 class TestAircraftSearchEndpoint:
     """Tests for aircraft search endpoint."""
 
-    def test_search_without_filters(self, client, mock_db_session, sample_aircraft_list):
+    def test_search_without_filters(self, client, mock_db_session, sample_row_list):
         """Test search endpoint without any filters."""
         # Setup mock
         mock_result = MagicMock()
-        mock_scalars = MagicMock()
-        mock_scalars.all.return_value = sample_aircraft_list
-        mock_result.scalars.return_value = mock_scalars
+        mock_result.all.return_value = sample_row_list
 
         mock_db_session.execute = AsyncMock(return_value=mock_result)
         mock_db_session.scalar = AsyncMock(return_value=2)
@@ -81,12 +82,10 @@ class TestAircraftSearchEndpoint:
         assert "page" in data
         assert "per_page" in data
 
-    def test_search_with_manufacturer_filter(self, client, mock_db_session, sample_aircraft):
+    def test_search_with_manufacturer_filter(self, client, mock_db_session, sample_row):
         """Test search with manufacturer filter."""
         mock_result = MagicMock()
-        mock_scalars = MagicMock()
-        mock_scalars.all.return_value = [sample_aircraft]
-        mock_result.scalars.return_value = mock_scalars
+        mock_result.all.return_value = [sample_row]
 
         mock_db_session.execute = AsyncMock(return_value=mock_result)
         mock_db_session.scalar = AsyncMock(return_value=1)
@@ -96,12 +95,10 @@ class TestAircraftSearchEndpoint:
         data = response.json()
         assert "items" in data
 
-    def test_search_with_registration_filter(self, client, mock_db_session, sample_aircraft):
+    def test_search_with_registration_filter(self, client, mock_db_session, sample_row):
         """Test search with registration filter."""
         mock_result = MagicMock()
-        mock_scalars = MagicMock()
-        mock_scalars.all.return_value = [sample_aircraft]
-        mock_result.scalars.return_value = mock_scalars
+        mock_result.all.return_value = [sample_row]
 
         mock_db_session.execute = AsyncMock(return_value=mock_result)
         mock_db_session.scalar = AsyncMock(return_value=1)
@@ -111,12 +108,10 @@ class TestAircraftSearchEndpoint:
         data = response.json()
         assert "items" in data
 
-    def test_search_with_icao24_filter(self, client, mock_db_session, sample_aircraft):
+    def test_search_with_icao24_filter(self, client, mock_db_session, sample_row):
         """Test search with icao24 filter."""
         mock_result = MagicMock()
-        mock_scalars = MagicMock()
-        mock_scalars.all.return_value = [sample_aircraft]
-        mock_result.scalars.return_value = mock_scalars
+        mock_result.all.return_value = [sample_row]
 
         mock_db_session.execute = AsyncMock(return_value=mock_result)
         mock_db_session.scalar = AsyncMock(return_value=1)
@@ -126,12 +121,10 @@ class TestAircraftSearchEndpoint:
         data = response.json()
         assert "items" in data
 
-    def test_search_pagination(self, client, mock_db_session, sample_aircraft_list):
+    def test_search_pagination(self, client, mock_db_session, sample_row_list):
         """Test search pagination parameters."""
         mock_result = MagicMock()
-        mock_scalars = MagicMock()
-        mock_scalars.all.return_value = sample_aircraft_list
-        mock_result.scalars.return_value = mock_scalars
+        mock_result.all.return_value = sample_row_list
 
         mock_db_session.execute = AsyncMock(return_value=mock_result)
         mock_db_session.scalar = AsyncMock(return_value=50)
@@ -145,9 +138,7 @@ class TestAircraftSearchEndpoint:
     def test_search_empty_results(self, client, mock_db_session):
         """Test search with no matching results."""
         mock_result = MagicMock()
-        mock_scalars = MagicMock()
-        mock_scalars.all.return_value = []
-        mock_result.scalars.return_value = mock_scalars
+        mock_result.all.return_value = []
 
         mock_db_session.execute = AsyncMock(return_value=mock_result)
         mock_db_session.scalar = AsyncMock(return_value=0)
@@ -158,23 +149,277 @@ class TestAircraftSearchEndpoint:
         assert data["items"] == []
         assert data["total"] == 0
 
-    def test_search_with_status_filter_airborne(self, client, mock_db_session, sample_aircraft, mock_redis_client):
+    def test_search_with_status_filter_airborne(self, client, mock_db_session, sample_row, mock_redis_client):
         """Test search with airborne status filter."""
         mock_result = MagicMock()
-        mock_scalars = MagicMock()
-        mock_scalars.all.return_value = [sample_aircraft]
-        mock_result.scalars.return_value = mock_scalars
+        mock_result.all.return_value = [sample_row]
 
         mock_db_session.execute = AsyncMock(return_value=mock_result)
         mock_db_session.scalar = AsyncMock(return_value=1)
 
         # Mock redis to show aircraft is airborne
-        mock_redis_client.exists.return_value = 1
+        mock_redis_client.get_airborne.return_value = frozenset({"abc123"})
 
-        with patch("app.routers.aircraft.redis_client", mock_redis_client):
+        with patch("app.services.aircraft.redis_client", mock_redis_client):
             response = client.get("/api/v1/aircraft?status=airborne")
 
         assert response.status_code == 200
+        data = response.json()
+        assert [item["icao24"] for item in data["items"]] == ["abc123"]
+        assert data["items"][0]["is_airborne"] is True
+        assert data["total"] == 1
+        mock_redis_client.airborne_many.assert_not_called()
+
+    def test_search_resolves_airborne_status_in_one_call(
+        self, client, mock_db_session, sample_row_list, mock_redis_client
+    ):
+        """Test a page of results has its airborne status looked up in one batch."""
+        mock_result = MagicMock()
+        mock_result.all.return_value = sample_row_list
+
+        mock_db_session.execute = AsyncMock(return_value=mock_result)
+        mock_db_session.scalar = AsyncMock(return_value=2)
+        mock_redis_client.airborne_many.side_effect = lambda icao24s: [False, True]
+
+        response = client.get("/api/v1/aircraft")
+
+        assert response.status_code == 200
+        items = response.json()["items"]
+        assert [item["is_airborne"] for item in items] == [False, True]
+        mock_redis_client.airborne_many.assert_awaited_once()
+        mock_redis_client.is_airborne.assert_not_called()
+
+
+    def test_search_offset_page_links_cursor(self, client, mock_db_session, sample_row_list):
+        """Test an offset page with more results hands out a cursor after its last row."""
+        mock_result = MagicMock()
+        mock_result.all.return_value = sample_row_list
+
+        mock_db_session.execute = AsyncMock(return_value=mock_result)
+        mock_db_session.scalar = AsyncMock(return_value=5)
+
+        response = client.get("/api/v1/aircraft?per_page=1")
+
+        data = response.json()
+        assert [item["icao24"] for item in data["items"]] == ["abc123"]
+        assert decode_cursor(data["next_cursor"]) == ("next", "abc123")
+        assert data["prev_cursor"] is None
+
+    def test_search_capped_total(self, client, mock_db_session, sample_row_list):
+        """Test a total that reached the cap is reported as not exact, and paging goes on past it."""
+        mock_result = MagicMock()
+        mock_result.all.return_value = sample_row_list
+
+        mock_db_session.execute = AsyncMock(return_value=mock_result)
+        mock_db_session.scalar = AsyncMock(return_value=10001)
+
+        with patch("app.services.aircraft.settings.search_count_cap", 10000):
+            response = client.get("/api/v1/aircraft?per_page=1&page=10000&count=capped")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total"] == 10000
+        assert data["total_exact"] is False
+        assert data["next_cursor"] is not None
+
+    def test_search_cached_page(self, client, mock_db_session, mock_redis_client):
+        """Test a cached page is served without the database, with fresh airborne flags."""
+        mock_db_session.execute = AsyncMock()
+        mock_db_session.scalar = AsyncMock()
+        mock_redis_client.get_search.return_value = {
+            "items": [{"icao24": "abc123", "registration": "N12345"}],
+            "total": 1,
+            "total_exact": True,
+            "pages": 1,
+            "next_cursor": None,
+            "prev_cursor": None,
+            "seconds": 0.05,
+        }
+        mock_redis_client.airborne_many.side_effect = lambda icao24s: [True] * len(icao24s)
+
+        response = client.get("/api/v1/aircraft?registration=N12345")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["items"][0]["registration"] == "N12345"
+        assert data["items"][0]["is_airborne"] is True
+        mock_db_session.execute.assert_not_called()
+        mock_db_session.scalar.assert_not_called()
+
+    def test_search_page_cached_by_normalized_query(
+        self, client, mock_db_session, mock_redis_client, sample_row
+    ):
+        """Test a searched page is cached without airborne flags, under a case-insensitive key."""
+        mock_result = MagicMock()
+        mock_result.all.return_value = [sample_row]
+
+        mock_db_session.execute = AsyncMock(return_value=mock_result)
+        mock_db_session.scalar = AsyncMock(return_value=1)
+
+        client.get("/api/v1/aircraft?manufacturer=Boeing")
+        client.get("/api/v1/aircraft?manufacturer=BOEING")
+
+        first, second = mock_redis_client.set_search.call_args_list
+        assert first.args[0] == second.args[0]
+        key, page, ttl = first.args
+        assert [item["icao24"] for item in page["items"]] == ["abc123"]
+        assert "is_airborne" not in page["items"][0]
+        assert page["total"] == 1
+
+    def test_search_sparse_fields(self, client, mock_db_session):
+        """Test fields= returns only the requested fields, plus icao24 and is_airborne."""
+        Row = namedtuple("Row", ["icao24", "registration"])
+        mock_result = MagicMock()
+        mock_result.all.return_value = [Row(icao24="abc123", registration="N12345")]
+
+        mock_db_session.execute = AsyncMock(return_value=mock_result)
+        mock_db_session.scalar = AsyncMock(return_value=1)
+
+        response = client.get("/api/v1/aircraft?fields=registration")
+
+        assert response.status_code == 200
+        assert response.json()["items"] == [
+            {"icao24": "abc123", "registration": "N12345", "is_airborne": False}
+        ]
+        query = mock_db_session.execute.call_args.args[0]
+        assert [c.name for c in query.selected_columns] == ["icao24", "registration"]
+
+    def test_search_unknown_fields(self, client):
+        """Test asking for a field search does not return is rejected."""
+        response = client.get("/api/v1/aircraft?fields=registration,notes")
+        assert response.status_code == 422
+        assert "notes" in response.json()["detail"]
+
+    def test_search_invalid_count(self, client):
+        """Test an unknown count strategy is rejected."""
+        response = client.get("/api/v1/aircraft?count=guess")
+        assert response.status_code == 422
+
+    def test_search_with_cursor(self, client, mock_db_session, sample_row_list):
+        """Test a cursor page drops the look-ahead row and links both ways."""
+        mock_result = MagicMock()
+        mock_result.all.return_value = sample_row_list
+
+        mock_db_session.execute = AsyncMock(return_value=mock_result)
+        mock_db_session.scalar = AsyncMock(return_value=5)
+
+        cursor = encode_cursor("next", "aaa000")
+        response = client.get(f"/api/v1/aircraft?per_page=1&cursor={cursor}")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert [item["icao24"] for item in data["items"]] == ["abc123"]
+        assert decode_cursor(data["next_cursor"]) == ("next", "abc123")
+        assert decode_cursor(data["prev_cursor"]) == ("prev", "abc123")
+
+    def test_search_last_cursor_page(self, client, mock_db_session, sample_row):
+        """Test the last cursor page has no next cursor."""
+        mock_result = MagicMock()
+        mock_result.all.return_value = [sample_row]
+
+        mock_db_session.execute = AsyncMock(return_value=mock_result)
+        mock_db_session.scalar = AsyncMock(return_value=5)
+
+        cursor = encode_cursor("next", "aaa000")
+        response = client.get(f"/api/v1/aircraft?per_page=1&cursor={cursor}")
+
+        assert response.json()["next_cursor"] is None
+
+    def test_search_invalid_cursor(self, client):
+        """Test a cursor that was not handed out is rejected."""
+        response = client.get("/api/v1/aircraft?cursor=not-a-cursor")
+        assert response.status_code == 422
+
+
+class TestAircraftGeoEndpoints:
+    """Tests for nearby and bounding-box live aircraft endpoints."""
+
+    def test_nearby(self, client, mock_db_session, mock_redis_client, sample_aircraft, sample_position_data):
+        """Test nearby returns metadata joined with positions."""
+        mock_result = MagicMock()
+        mock_scalars = MagicMock()
+        mock_scalars.all.return_value = [sample_aircraft]
+        mock_result.scalars.return_value = mock_scalars
+        mock_db_session.execute = AsyncMock(return_value=mock_result)
+
+        mock_redis_client.search_nearby = AsyncMock(return_value=[("abc123", 4.2)])
+        mock_redis_client.get_positions = AsyncMock(return_value={"abc123": sample_position_data})
+
+        with patch("app.services.aircraft.redis_client", mock_redis_client):
+            response = client.get("/api/v1/aircraft/nearby?lat=37.7&lon=-122.4&radius_km=25")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["count"] == 1
+        assert data["items"][0]["registration"] == "N12345"
+        assert data["items"][0]["distance_km"] == 4.2
+        assert data["items"][0]["position"]["latitude"] == 37.7749
+        mock_redis_client.search_nearby.assert_called_once_with(37.7, -122.4, 25.0, 100)
+
+    def test_nearby_requires_coordinates(self, client):
+        """Test nearby rejects a missing point."""
+        response = client.get("/api/v1/aircraft/nearby?lat=37.7")
+        assert response.status_code == 422
+
+    def test_within(self, client, mock_db_session, mock_redis_client, sample_aircraft, sample_position_data):
+        """Test within parses the bbox and joins results."""
+        mock_result = MagicMock()
+        mock_scalars = MagicMock()
+        mock_scalars.all.return_value = [sample_aircraft]
+        mock_result.scalars.return_value = mock_scalars
+        mock_db_session.execute = AsyncMock(return_value=mock_result)
+
+        mock_redis_client.search_within = AsyncMock(return_value=["abc123"])
+        mock_redis_client.get_positions = AsyncMock(return_value={"abc123": sample_position_data})
+
+        with patch("app.services.aircraft.redis_client", mock_redis_client):
+            response = client.get("/api/v1/aircraft/within?bbox=37,-123,38,-122")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["items"][0]["icao24"] == "abc123"
+        assert data["items"][0]["distance_km"] is None
+        mock_redis_client.search_within.assert_called_once_with(37.0, -123.0, 38.0, -122.0, 100)
+
+    def test_within_invalid_bbox(self, client):
+        """Test within rejects a malformed bbox."""
+        response = client.get("/api/v1/aircraft/within?bbox=1,2,3")
+        assert response.status_code == 422
+
+    def test_within_out_of_range_bbox(self, client):
+        """Test within rejects a bbox with impossible coordinates."""
+        response = client.get("/api/v1/aircraft/within?bbox=10,0,5,1")
+        assert response.status_code == 422
+
+
+class TestAircraftTrackEndpoint:
+    """Tests for the aircraft track endpoint."""
+
+    def test_get_track(self, client, mock_redis_client):
+        """Test the track is returned with its point count."""
+        points = [
+            {"time": 1700000000, "longitude": -122.4, "latitude": 37.7,
+             "baro_altitude": 10000.0, "true_track": 90.0, "velocity": 230.0},
+        ]
+        mock_redis_client.get_track = AsyncMock(return_value=points)
+
+        response = client.get("/api/v1/aircraft/ABC123/track?since=1699999000&max_points=50")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["icao24"] == "abc123"
+        assert data["count"] == 1
+        assert data["points"][0]["latitude"] == 37.7
+        mock_redis_client.get_track.assert_called_once_with("ABC123", since=1699999000, max_points=50)
+
+    def test_get_track_empty(self, client, mock_redis_client):
+        """Test an untracked aircraft has an empty track."""
+        mock_redis_client.get_track = AsyncMock(return_value=[])
+
+        response = client.get("/api/v1/aircraft/abc123/track")
+
+        assert response.status_code == 200
+        assert response.json() == {"icao24": "abc123", "points": [], "count": 0}
 
 
 class TestAircraftDetailEndpoint:
@@ -198,13 +443,15 @@ class TestAircraftDetailEndpoint:
         assert data["icao24"] == "abc123"
         assert data["registration"] == "N12345"
 
-    def test_get_aircraft_not_found(self, client, mock_db_session):
+    def test_get_aircraft_not_found(self, client, mock_db_session, mock_redis_client):
         """Test getting aircraft details when not found."""
         mock_result = MagicMock()
         mock_result.scalar_one_or_none.return_value = None
         mock_db_session.execute = AsyncMock(return_value=mock_result)
+        mock_redis_client.get_aircraft_position = AsyncMock(return_value=None)
 
-        response = client.get("/api/v1/aircraft/nonexistent")
+        with patch("app.services.aircraft.redis_client", mock_redis_client):
+            response = client.get("/api/v1/aircraft/nonexistent")
         assert response.status_code == 404
         data = response.json()
         assert "detail" in data
@@ -231,6 +478,26 @@ class TestAircraftDetailEndpoint:
         assert data["position"] is not None
         assert data["position"]["latitude"] == 37.7749
 
+    def test_get_aircraft_extrapolated(
+        self, client, mock_db_session, sample_aircraft, sample_position_data
+    ):
+        """Test extrapolate adds the age and estimated position to the response."""
+        mock_result = MagicMock()
+        mock_result.scalar_one_or_none.return_value = sample_aircraft
+        mock_db_session.execute = AsyncMock(return_value=mock_result)
+
+        mock_redis = MagicMock()
+        mock_redis.get_aircraft_position = AsyncMock(return_value=sample_position_data)
+
+        with patch("app.services.aircraft.redis_client", mock_redis):
+            response = client.get("/api/v1/aircraft/abc123?extrapolate=true")
+
+        assert response.status_code == 200
+        position = response.json()["position"]
+        assert position["latitude"] == 37.7749
+        assert position["age_seconds"] > 0
+        assert "estimated" in position
+
     def test_get_aircraft_icao24_case_insensitive(self, client, mock_db_session, sample_aircraft):
         """Test that icao24 lookup is case insensitive."""
         mock_result = MagicMock()
@@ -3,7 +3,9 @@ import pytest
 from unittest.mock import AsyncMock, patch, MagicMock
 import json
 
-from app.services.redis_client import RedisClient
+from app.codec import encode_position, encode_track_point
+import redis.asyncio as redis
+from app.services.redis_client import RedisClient, downsample, search_key
 
 
 class TestRedisClientConnect:
@@ -42,6 +44,44 @@ class TestRedisClientConnect:
         await client.disconnect()
 
 
+class TestRedisClientGeneration:
+    """Tests for RedisClient.get_generation() method."""
+
+    @pytest.mark.asyncio
+    async def test_get_generation(self):
+        """Test that the current generation pointer is parsed."""
+        client = RedisClient()
+        mock_redis_instance = AsyncMock()
+        mock_redis_instance.get.return_value = b"7"
+        client._client = mock_redis_instance
+
+        assert await client.get_generation() == 7
+        mock_redis_instance.get.assert_called_once_with("aircraft:generation")
+
+    @pytest.mark.asyncio
+    async def test_get_generation_missing(self):
+        """Test that no generation is reported before adsb-sync has published one."""
+        client = RedisClient()
+        mock_redis_instance = AsyncMock()
+        mock_redis_instance.get.return_value = None
+        client._client = mock_redis_instance
+
+        assert await client.get_generation() is None
+
+    @pytest.mark.asyncio
+    async def test_get_generation_cached(self):
+        """Test that the pointer is not re-read on every lookup."""
+        client = RedisClient()
+        mock_redis_instance = AsyncMock()
+        mock_redis_instance.get.return_value = b"7"
+        client._client = mock_redis_instance
+
+        await client.get_generation()
+        await client.get_generation()
+
+        mock_redis_instance.get.assert_called_once()
+
+
 class TestRedisClientGetAircraftPosition:
     """Tests for RedisClient.get_aircraft_position() method."""
 
@@ -50,7 +90,8 @@ class TestRedisClientGetAircraftPosition:
         """Test getting position when aircraft data exists."""
         client = RedisClient()
         mock_redis_instance = AsyncMock()
-        mock_redis_instance.get.return_value = json.dumps(sample_position_data)
+        mock_redis_instance.get.return_value = b"7"
+        mock_redis_instance.hget.return_value = json.dumps(sample_position_data)
         client._client = mock_redis_instance
 
         result = await client.get_aircraft_position("abc123")
@@ -58,33 +99,61 @@ class TestRedisClientGetAircraftPosition:
         assert result is not None
         assert result["icao24"] == "abc123"
         assert result["latitude"] == 37.7749
-        mock_redis_instance.get.assert_called_once_with("aircraft:abc123")
+        mock_redis_instance.hget.assert_called_once_with("aircraft:positions:7", "abc123")
+
+    @pytest.mark.asyncio
+    async def test_get_aircraft_position_binary(self, sample_position_data):
+        """Test getting position stored in the compact binary encoding."""
+        client = RedisClient()
+        mock_redis_instance = AsyncMock()
+        mock_redis_instance.get.return_value = b"7"
+        mock_redis_instance.hget.return_value = encode_position(sample_position_data)
+        client._client = mock_redis_instance
+
+        result = await client.get_aircraft_position("abc123")
+
+        assert result == sample_position_data
 
     @pytest.mark.asyncio
     async def test_get_aircraft_position_not_found(self):
         """Test getting position when aircraft not in cache."""
         client = RedisClient()
         mock_redis_instance = AsyncMock()
-        mock_redis_instance.get.return_value = None
+        mock_redis_instance.get.return_value = b"7"
+        mock_redis_instance.hget.return_value = None
         client._client = mock_redis_instance
 
         result = await client.get_aircraft_position("nonexistent")
 
         assert result is None
-        mock_redis_instance.get.assert_called_once_with("aircraft:nonexistent")
+        mock_redis_instance.hget.assert_called_once_with("aircraft:positions:7", "nonexistent")
+
+    @pytest.mark.asyncio
+    async def test_get_aircraft_position_no_generation(self):
+        """Test getting position before any generation has been published."""
+        client = RedisClient()
+        mock_redis_instance = AsyncMock()
+        mock_redis_instance.get.return_value = None
+        client._client = mock_redis_instance
+
+        result = await client.get_aircraft_position("abc123")
+
+        assert result is None
+        mock_redis_instance.hget.assert_not_called()
 
     @pytest.mark.asyncio
     async def test_get_aircraft_position_lowercase_conversion(self, sample_position_data):
         """Test that icao24 is converted to lowercase."""
         client = RedisClient()
         mock_redis_instance = AsyncMock()
-        mock_redis_instance.get.return_value = json.dumps(sample_position_data)
+        mock_redis_instance.get.return_value = b"7"
+        mock_redis_instance.hget.return_value = json.dumps(sample_position_data)
         client._client = mock_redis_instance
 
         await client.get_aircraft_position("ABC123")
 
         # Should query with lowercase
-        mock_redis_instance.get.assert_called_once_with("aircraft:abc123")
+        mock_redis_instance.hget.assert_called_once_with("aircraft:positions:7", "abc123")
 
 
 class TestRedisClientIsAirborne:
@@ -92,23 +161,25 @@ class TestRedisClientIsAirborne:
 
     @pytest.mark.asyncio
     async def test_is_airborne_true(self):
-        """Test is_airborne returns True when key exists."""
+        """Test is_airborne returns True when aircraft is in the current generation."""
         client = RedisClient()
         mock_redis_instance = AsyncMock()
-        mock_redis_instance.exists.return_value = 1
+        mock_redis_instance.get.return_value = b"7"
+        mock_redis_instance.sismember.return_value = True
         client._client = mock_redis_instance
 
         result = await client.is_airborne("abc123")
 
         assert result is True
-        mock_redis_instance.exists.assert_called_once_with("aircraft:abc123")
+        mock_redis_instance.sismember.assert_called_once_with("aircraft:live:7", "abc123")
 
     @pytest.mark.asyncio
     async def test_is_airborne_false(self):
-        """Test is_airborne returns False when key doesn't exist."""
+        """Test is_airborne returns False when aircraft is not in the generation."""
         client = RedisClient()
         mock_redis_instance = AsyncMock()
-        mock_redis_instance.exists.return_value = 0
+        mock_redis_instance.get.return_value = b"7"
+        mock_redis_instance.sismember.return_value = False
         client._client = mock_redis_instance
 
         result = await client.is_airborne("nonexistent")
@@ -120,13 +191,276 @@ class TestRedisClientIsAirborne:
         """Test that icao24 is converted to lowercase."""
         client = RedisClient()
         mock_redis_instance = AsyncMock()
-        mock_redis_instance.exists.return_value = 1
+        mock_redis_instance.get.return_value = b"7"
+        mock_redis_instance.sismember.return_value = True
         client._client = mock_redis_instance
 
         await client.is_airborne("ABC123")
 
         # Should query with lowercase
-        mock_redis_instance.exists.assert_called_once_with("aircraft:abc123")
+        mock_redis_instance.sismember.assert_called_once_with("aircraft:live:7", "abc123")
+
+
+class TestRedisClientAirborneSet:
+    """Tests for batch membership and enumeration of the tracked set."""
+
+    @pytest.mark.asyncio
+    async def test_airborne_many(self):
+        """Test batch status uses a single SMISMEMBER."""
+        client = RedisClient()
+        mock_redis_instance = AsyncMock()
+        mock_redis_instance.get.return_value = b"7"
+        mock_redis_instance.smismember.return_value = [1, 0]
+        client._client = mock_redis_instance
+
+        result = await client.airborne_many(["ABC123", "def456"])
+
+        assert result == [True, False]
+        mock_redis_instance.smismember.assert_called_once_with("aircraft:live:7", ["abc123", "def456"])
+
+    @pytest.mark.asyncio
+    async def test_airborne_many_without_generation(self):
+        """Test batch status is all False before a generation is published."""
+        client = RedisClient()
+        mock_redis_instance = AsyncMock()
+        mock_redis_instance.get.return_value = None
+        client._client = mock_redis_instance
+
+        assert await client.airborne_many(["abc123", "def456"]) == [False, False]
+        mock_redis_instance.smismember.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_get_airborne_cached_per_generation(self):
+        """Test the tracked set is fetched once per generation."""
+        client = RedisClient()
+        mock_redis_instance = AsyncMock()
+        mock_redis_instance.get.return_value = b"7"
+        mock_redis_instance.smembers.return_value = {b"abc123", b"def456"}
+        client._client = mock_redis_instance
+
+        first = await client.get_airborne()
+        second = await client.get_airborne()
+
+        assert first == {"abc123", "def456"}
+        assert second is first
+        mock_redis_instance.smembers.assert_called_once_with("aircraft:live:7")
+
+    @pytest.mark.asyncio
+    async def test_get_airborne_refetched_on_new_generation(self):
+        """Test a new generation invalidates the cached set."""
+        client = RedisClient()
+        mock_redis_instance = AsyncMock()
+        mock_redis_instance.smembers.side_effect = [{b"abc123"}, {b"def456"}]
+        client._client = mock_redis_instance
+
+        client._generation, client._generation_checked = 7, float("inf")
+        assert await client.get_airborne() == {"abc123"}
+        client._generation = 8
+        assert await client.get_airborne() == {"def456"}
+
+
+class TestRedisClientTrackedCount:
+    """Tests for RedisClient.get_tracked_count() method."""
+
+    @pytest.mark.asyncio
+    async def test_tracked_count_uses_generation_size(self):
+        """Test that the count is the size of the current generation."""
+        client = RedisClient()
+        mock_redis_instance = AsyncMock()
+        mock_redis_instance.get.return_value = b"7"
+        mock_redis_instance.scard.return_value = 9500
+        client._client = mock_redis_instance
+
+        assert await client.get_tracked_count() == 9500
+        mock_redis_instance.scard.assert_called_once_with("aircraft:live:7")
+
+
+class TestRedisClientGeoSearch:
+    """Tests for the live GEO index queries."""
+
+    @pytest.mark.asyncio
+    async def test_search_nearby(self):
+        """Test that radius hits are returned with their distance."""
+        client = RedisClient()
+        mock_redis_instance = AsyncMock()
+        mock_redis_instance.get.return_value = b"7"
+        mock_redis_instance.geosearch.return_value = [[b"abc123", 1.5], [b"def456", 12.25]]
+        client._client = mock_redis_instance
+
+        result = await client.search_nearby(37.7, -122.4, 50, 10)
+
+        assert result == [("abc123", 1.5), ("def456", 12.25)]
+        kwargs = mock_redis_instance.geosearch.call_args.kwargs
+        assert mock_redis_instance.geosearch.call_args.args == ("aircraft:geo:7",)
+        assert kwargs["radius"] == 50
+        assert kwargs["count"] == 10
+
+    @pytest.mark.asyncio
+    async def test_search_within_filters_to_exact_bounds(self):
+        """Test that hits from the covering box outside the bbox are dropped."""
+        client = RedisClient()
+        mock_redis_instance = AsyncMock()
+        mock_redis_instance.get.return_value = b"7"
+        mock_redis_instance.geosearch.return_value = [
+            [b"abc123", (10.0, 50.0)],
+            [b"def456", (12.5, 50.0)],
+        ]
+        client._client = mock_redis_instance
+
+        result = await client.search_within(49.0, 9.0, 51.0, 11.0, 10)
+
+        assert result == ["abc123"]
+
+    @pytest.mark.asyncio
+    async def test_search_within_antimeridian(self):
+        """Test that a bbox crossing the antimeridian is searched as two boxes."""
+        client = RedisClient()
+        mock_redis_instance = AsyncMock()
+        mock_redis_instance.get.return_value = b"7"
+        mock_redis_instance.geosearch.side_effect = [
+            [[b"abc123", (179.5, 10.0)]],
+            [[b"def456", (-179.5, 10.0)]],
+        ]
+        client._client = mock_redis_instance
+
+        result = await client.search_within(0.0, 179.0, 20.0, -179.0, 10)
+
+        assert result == ["abc123", "def456"]
+        assert mock_redis_instance.geosearch.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_search_without_generation(self):
+        """Test that queries are empty before adsb-sync has published a generation."""
+        client = RedisClient()
+        mock_redis_instance = AsyncMock()
+        mock_redis_instance.get.return_value = None
+        client._client = mock_redis_instance
+
+        assert await client.search_nearby(0, 0, 10, 10) == []
+        assert await client.search_within(0, 0, 1, 1, 10) == []
+        mock_redis_instance.geosearch.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_get_positions(self, sample_position_data):
+        """Test batch position lookup skips aircraft without a position."""
+        client = RedisClient()
+        mock_redis_instance = AsyncMock()
+        mock_redis_instance.get.return_value = b"7"
+        mock_redis_instance.hmget.return_value = [encode_position(sample_position_data), None]
+        client._client = mock_redis_instance
+
+        result = await client.get_positions(["abc123", "def456"])
+
+        assert result == {"abc123": sample_position_data}
+        mock_redis_instance.hmget.assert_called_once_with("aircraft:positions:7", ["abc123", "def456"])
+
+    @pytest.mark.asyncio
+    async def test_get_positions_lowercases(self, sample_position_data):
+        """Test batch position lookup is case-insensitive but keyed as requested."""
+        client = RedisClient()
+        mock_redis_instance = AsyncMock()
+        mock_redis_instance.get.return_value = b"7"
+        mock_redis_instance.hmget.return_value = [encode_position(sample_position_data)]
+        client._client = mock_redis_instance
+
+        result = await client.get_positions(["ABC123"])
+
+        assert result == {"ABC123": sample_position_data}
+        mock_redis_instance.hmget.assert_called_once_with("aircraft:positions:7", ["abc123"])
+
+
+class TestRedisClientTrack:
+    """Tests for RedisClient.get_track() and downsample()."""
+
+    @pytest.mark.asyncio
+    async def test_get_track(self, sample_position_data):
+        """Test track points are decoded oldest first."""
+        client = RedisClient()
+        mock_redis_instance = AsyncMock()
+        mock_redis_instance.xrange.return_value = [
+            (b"1700000000000-0", {b"p": encode_track_point(sample_position_data)}),
+        ]
+        client._client = mock_redis_instance
+
+        result = await client.get_track("ABC123")
+
+        assert len(result) == 1
+        assert result[0]["time"] == sample_position_data["time_position"]
+        mock_redis_instance.xrange.assert_called_once_with("aircraft:track:abc123", min="-", max="+")
+
+    @pytest.mark.asyncio
+    async def test_get_track_since(self):
+        """Test since selects the range by entry ID."""
+        client = RedisClient()
+        mock_redis_instance = AsyncMock()
+        mock_redis_instance.xrange.return_value = []
+        client._client = mock_redis_instance
+
+        assert await client.get_track("abc123", since=1700000000) == []
+        mock_redis_instance.xrange.assert_called_once_with(
+            "aircraft:track:abc123", min="1700000000000", max="+"
+        )
+
+    @pytest.mark.asyncio
+    async def test_get_track_downsampled(self, sample_position_data):
+        """Test max_points thins the returned track."""
+        client = RedisClient()
+        mock_redis_instance = AsyncMock()
+        mock_redis_instance.xrange.return_value = [
+            (f"{i}-0".encode(), {b"p": encode_track_point({**sample_position_data, "time_position": i + 1})})
+            for i in range(10)
+        ]
+        client._client = mock_redis_instance
+
+        result = await client.get_track("abc123", max_points=4)
+
+        assert [p["time"] for p in result] == [1, 4, 7, 10]
+
+    def test_downsample_keeps_endpoints(self):
+        """Test down-sampling keeps the first and last points."""
+        points = list(range(100))
+
+        assert downsample(points, 3) == [0, 50, 99]
+        assert downsample(points, 1) == [99]
+        assert downsample(points[:2], 5) == [0, 1]
+
+
+class TestRedisClientSearchCache:
+    """Tests for the shared search page cache."""
+
+    def test_search_key_canonical(self):
+        """Test the key ignores dict order and changes with the metadata version."""
+        a = search_key(3, {"model": "737", "page": 1})
+        assert a == search_key(3, {"page": 1, "model": "737"})
+        assert a.startswith("aircraft:search:3:")
+        assert a != search_key(4, {"model": "737", "page": 1})
+
+    @pytest.mark.asyncio
+    async def test_search_round_trip(self):
+        """Test a cached page is stored with its TTL and read back."""
+        client = RedisClient()
+        mock_redis_instance = AsyncMock()
+        client._client = mock_redis_instance
+        page = {"items": [{"icao24": "abc123"}], "total": 1}
+
+        await client.set_search("aircraft:search:1:x", page, 60)
+        stored = mock_redis_instance.set.call_args
+        assert stored.kwargs["ex"] == 60
+        mock_redis_instance.get.return_value = stored.args[1].encode()
+
+        assert await client.get_search("aircraft:search:1:x") == page
+
+    @pytest.mark.asyncio
+    async def test_search_unavailable(self):
+        """Test Valkey errors read as a cache miss."""
+        client = RedisClient()
+        mock_redis_instance = AsyncMock()
+        mock_redis_instance.get.side_effect = redis.ConnectionError("down")
+        mock_redis_instance.set.side_effect = redis.ConnectionError("down")
+        client._client = mock_redis_instance
+
+        assert await client.get_search("aircraft:search:1:x") is None
+        await client.set_search("aircraft:search:1:x", {}, 60)
 
 
 class TestRedisClientPing:
@@ -0,0 +1,40 @@
+"""Apply pending schema migrations from the migrations directory.
+
+Each ``NNN_name.sql`` file is applied once, in order, in its own
+transaction, and recorded in ``schema_migrations``. Runs during container
+initialization and can be run again against an existing database, e.g.
+``docker-compose exec postgres python3 /migrate.py``. Connection settings
+come from the usual libpq environment variables (PGHOST, PGUSER, ...).
+"""
+import os
+from pathlib import Path
+import psycopg2
+
+MIGRATIONS = Path(os.environ.get("MIGRATIONS_DIR", "/migrations"))
+
+conn = psycopg2.connect(dbname=os.environ.get("PGDATABASE", "postgres"),
+                        user=os.environ.get("PGUSER", "postgres"))
+cur = conn.cursor()
+cur.execute("""
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version TEXT PRIMARY KEY,
+        applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+    )
+""")
+conn.commit()
+
+cur.execute("SELECT version FROM schema_migrations")
+applied = {row[0] for row in cur.fetchall()}
+
+pending = [path for path in sorted(MIGRATIONS.glob("*.sql")) if path.stem not in applied]
+if not pending:
+    print("Schema is up to date")
+
+for path in pending:
+    print(f"Applying {path.name}...")
+    cur.execute(path.read_text())
+    cur.execute("INSERT INTO schema_migrations (version) VALUES (%s)", (path.stem,))
+    conn.commit()
+
+conn.close()
+print(f"Applied {len(pending)} migration(s)")
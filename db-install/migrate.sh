@@ -0,0 +1,6 @@
+#!/bin/bash
+set -e
+
+echo "Applying schema migrations..."
+python3 /migrate.py
+echo "Migrations complete!"
@@ -0,0 +1,17 @@
+-- Trigram indexes so ILIKE '%term%' searches are index scans rather than
+-- sequential scans of the whole table. Terms shorter than three characters
+-- have no trigrams and still scan.
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS aircraft_metadata_registration_trgm
+    ON aircraft_metadata USING gin (registration gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS aircraft_metadata_manufacturername_trgm
+    ON aircraft_metadata USING gin (manufacturername gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS aircraft_metadata_model_trgm
+    ON aircraft_metadata USING gin (model gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS aircraft_metadata_operator_trgm
+    ON aircraft_metadata USING gin (operator gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS aircraft_metadata_owner_trgm
+    ON aircraft_metadata USING gin (owner gin_trgm_ops);
+
+ANALYZE aircraft_metadata;
@@ -0,0 +1,22 @@
+-- Version stamp of the aircraft registry. Every statement that changes
+-- aircraft_metadata bumps it, so the API server can cache metadata and
+-- drop the cache when the stamp moves, without asking for rows each time.
+CREATE TABLE IF NOT EXISTS metadata_version (
+    id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+    version BIGINT NOT NULL DEFAULT 1,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+INSERT INTO metadata_version DEFAULT VALUES ON CONFLICT DO NOTHING;
+
+CREATE OR REPLACE FUNCTION bump_metadata_version() RETURNS trigger AS $$
+BEGIN
+    UPDATE metadata_version SET version = version + 1, updated_at = now();
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Per statement rather than per row, so a bulk UPDATE or COPY bumps it once
+DROP TRIGGER IF EXISTS aircraft_metadata_version ON aircraft_metadata;
+CREATE TRIGGER aircraft_metadata_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON aircraft_metadata
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_metadata_version();
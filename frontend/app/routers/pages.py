@@ -27,6 +27,7 @@ async def search(
     owner: str | None = Query(None),
     status: str | None = Query(None),
     page: int = Query(1, ge=1),
+    cursor: str | None = Query(None),
 ):
     """Aircraft search page with results."""
     error = None
@@ -44,6 +45,7 @@ async def search(
                 owner=owner,
                 status=status,
                 page=page,
+                cursor=cursor,
             )
         except Exception as e:
             logger.error(f"Search failed: {e}")
@@ -72,11 +74,14 @@ async def aircraft_detail(request: Request, icao24: str):
     """Aircraft details page."""
     error = None
     aircraft = None
+    track = None
 
     try:
         aircraft = await api_client.get_aircraft(icao24)
         if not aircraft:
             error = f"Aircraft with ICAO24 '{icao24}' not found"
+        elif aircraft.get("position"):
+            track = await api_client.get_track(icao24)
     except Exception as e:
         logger.error(f"Failed to get aircraft: {e}")
         error = "Failed to connect to API server"
@@ -86,6 +91,7 @@ async def aircraft_detail(request: Request, icao24: str):
         {
             "request": request,
             "aircraft": aircraft,
+            "track": track,
             "error": error,
             "icao24": icao24,
         },
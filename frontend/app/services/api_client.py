@@ -19,8 +19,9 @@ class APIClient:
         status: str | None = None,
         page: int = 1,
         per_page: int = 20,
+        cursor: str | None = None,
     ) -> dict:
-        """Search aircraft registry."""
+        """Search aircraft registry, continuing from ``cursor`` if given."""
         params = {
             k: v
             for k, v in {
@@ -33,6 +34,7 @@ class APIClient:
                 "status": status,
                 "page": page,
                 "per_page": per_page,
+                "cursor": cursor,
             }.items()
             if v
         }
@@ -53,6 +55,19 @@ class APIClient:
             response.raise_for_status()
             return response.json()
 
+    async def get_track(self, icao24: str, max_points: int = 200) -> dict | None:
+        """Get the recent track of an aircraft."""
+        try:
+            async with httpx.AsyncClient(timeout=10.0) as client:
+                response = await client.get(
+                    f"{self.base_url}/api/v1/aircraft/{icao24}/track",
+                    params={"max_points": max_points},
+                )
+                response.raise_for_status()
+                return response.json()
+        except Exception:
+            return None
+
     async def get_health(self) -> dict | None:
         """Get system health status."""
         try:
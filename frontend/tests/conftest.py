@@ -33,9 +33,12 @@ def sample_search_results(sample_aircraft_data):
     return {
         "items": [sample_aircraft_data],
         "total": 1,
+        "total_exact": True,
         "page": 1,
         "per_page": 20,
         "pages": 1,
+        "next_cursor": None,
+        "prev_cursor": None,
     }
 
 
@@ -129,6 +132,7 @@ def mock_api_client():
         "per_page": 20,
     }
     client.get_aircraft.return_value = None
+    client.get_track.return_value = None
     client.get_health.return_value = None
     client.get_connectivity.return_value = None
     return client
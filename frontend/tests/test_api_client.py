@@ -98,6 +98,26 @@ class TestAPIClientSearchAircraft:
             assert params["page"] == 2
             assert params["per_page"] == 50
 
+    @pytest.mark.asyncio
+    async def test_search_aircraft_with_cursor(self, sample_search_results):
+        """Test search passes a cursor from a previous page through."""
+        mock_response = MagicMock()
+        mock_response.json.return_value = sample_search_results
+        mock_response.raise_for_status = MagicMock()
+
+        with patch("httpx.AsyncClient") as mock_client_class:
+            mock_client = AsyncMock()
+            mock_client.get.return_value = mock_response
+            mock_client_class.return_value.__aenter__.return_value = mock_client
+
+            client = APIClient()
+            client.base_url = "http://test-api:8080"
+            await client.search_aircraft(manufacturer="Boeing", page=2, cursor="bmV4dDphYmMxMjM")
+
+            params = mock_client.get.call_args[1]["params"]
+            assert params["cursor"] == "bmV4dDphYmMxMjM"
+            assert params["page"] == 2
+
 
 class TestAPIClientGetAircraft:
     """Tests for APIClient.get_aircraft() method."""
@@ -178,6 +198,46 @@ class TestAPIClientGetHealth:
             assert result is None
 
 
+class TestAPIClientGetTrack:
+    """Tests for APIClient.get_track() method."""
+
+    @pytest.mark.asyncio
+    async def test_get_track_success(self):
+        """Test getting an aircraft track requests a down-sampled track."""
+        track = {"icao24": "abc123", "points": [], "count": 0}
+        mock_response = MagicMock()
+        mock_response.json.return_value = track
+        mock_response.raise_for_status = MagicMock()
+
+        with patch("httpx.AsyncClient") as mock_client_class:
+            mock_client = AsyncMock()
+            mock_client.get.return_value = mock_response
+            mock_client_class.return_value.__aenter__.return_value = mock_client
+
+            client = APIClient()
+            client.base_url = "http://test-api:8080"
+            result = await client.get_track("abc123")
+
+            assert result == track
+            call_args = mock_client.get.call_args
+            assert "http://test-api:8080/api/v1/aircraft/abc123/track" in str(call_args)
+            assert call_args[1]["params"] == {"max_points": 200}
+
+    @pytest.mark.asyncio
+    async def test_get_track_failure_returns_none(self):
+        """Test that a failed track request does not break the details page."""
+        with patch("httpx.AsyncClient") as mock_client_class:
+            mock_client = AsyncMock()
+            mock_client.get.side_effect = httpx.ConnectError("Connection refused")
+            mock_client_class.return_value.__aenter__.return_value = mock_client
+
+            client = APIClient()
+            client.base_url = "http://test-api:8080"
+            result = await client.get_track("abc123")
+
+            assert result is None
+
+
 class TestAPIClientGetConnectivity:
     """Tests for APIClient.get_connectivity() method."""
 